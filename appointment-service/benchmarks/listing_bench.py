@@ -0,0 +1,141 @@
+"""
+Benchmark: GET /api/appointments on a large table, before and after the
+Core projection + ORJSONResponse fast path.
+
+Fills a throwaway SQLite database with synthetic appointments, then times
+the listing through the ASGI app three ways - the previous implementation
+(ORM rows -> AppointmentResponse -> response_model validation), the current
+endpoint, and the current endpoint with a sparse fields= list - and prints
+per-request latency and peak traced memory as JSON.
+
+    python benchmarks/listing_bench.py --rows 100000 --rounds 5
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+_db_dir = tempfile.mkdtemp(prefix="listing-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/appointments.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from main import AppointmentDB, AppointmentResponse  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+TYPES = ["CHECKUP", "VACCINATION", "SURGERY", "EMERGENCY", "DENTAL", "GROOMING"]
+STATUSES = ["SCHEDULED", "CONFIRMED", "COMPLETED", "CANCELLED"]
+
+
+@main.app.get("/bench/previous", response_model=List[AppointmentResponse])
+async def previous_listing():
+    """GET /api/appointments as it was implemented before the fast path."""
+    db = main.SessionLocal()
+    try:
+        appointments = db.query(AppointmentDB).all()
+        return [
+            AppointmentResponse(
+                id=a.id,
+                petId=a.pet_id,
+                vetId=a.vet_id,
+                date=a.date,
+                time=a.time,
+                endTime=a.end_time,
+                appointmentType=a.appointment_type,
+                status=a.status,
+                notes=a.notes,
+                petName=a.pet_name,
+                ownerName=a.owner_name,
+                createdAt=a.created_at.isoformat() if a.created_at else None
+            )
+            for a in appointments
+        ]
+    finally:
+        db.close()
+
+
+def fill(rows):
+    main.Base.metadata.create_all(bind=main.engine)
+    start = datetime(2024, 1, 1, 9, 0)
+    batch = []
+    with main.engine.begin() as connection:
+        for i in range(rows):
+            day = start + timedelta(days=i % 365)
+            batch.append({
+                "pet_id": 1 + i % 5000,
+                "vet_id": 1 + i % 6,
+                "date": day.date().isoformat(),
+                "time": f"{9 + i % 8:02d}:{(i % 2) * 30:02d}",
+                "end_time": f"{9 + i % 8:02d}:{(i % 2) * 30 + 29:02d}",
+                "appointment_type": TYPES[i % len(TYPES)],
+                "status": STATUSES[i % len(STATUSES)],
+                "notes": f"Synthetic appointment {i}",
+                "pet_name": f"Pet{i % 5000}",
+                "owner_name": f"Owner {i % 3000}",
+                "created_at": day,
+                "updated_at": day,
+            })
+            if len(batch) == 10000:
+                connection.execute(AppointmentDB.__table__.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(AppointmentDB.__table__.insert(), batch)
+
+
+def time_listing(client, url, rounds):
+    latencies = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        response = client.get(url)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+    # Memory from a separate run: tracing slows allocation-heavy code down
+    tracemalloc.start()
+    client.get(url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(latencies) * 1000, 1),
+        "min_ms": round(min(latencies) * 1000, 1),
+        "peak_traced_mb": round(peak / 2 ** 20, 1),
+        "response_mb": round(len(response.content) / 2 ** 20, 2),
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    fill(args.rows)
+    client = TestClient(main.app)
+    previous = client.get("/bench/previous").json()
+    current = client.get("/api/appointments").json()
+    if previous != current:
+        sys.exit("Fast path response differs from the previous implementation")
+
+    report = {
+        "rows": args.rows,
+        "previous": time_listing(client, "/bench/previous", args.rounds),
+        "current": time_listing(client, "/api/appointments", args.rounds),
+        "current_sparse": time_listing(client, "/api/appointments?fields=id,date,time,status", args.rounds),
+    }
+    report["speedup"] = round(report["previous"]["median_ms"] / report["current"]["median_ms"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_()
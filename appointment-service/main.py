@@ -6,18 +6,33 @@
 """
 
 import os
+import sys
+import hmac
 import json
+import asyncio
 import logging
+import threading
+from contextvars import ContextVar
 from datetime import datetime, date, time, timedelta
+from time import perf_counter, sleep
 from typing import List, Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
+# Startup timing starts here, so the breakdown includes third-party imports
+IMPORTS_STARTED = perf_counter()
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, generate_latest
 from pydantic import BaseModel, Field
-from sqlalchemy import create_engine, Column, Integer, String, Date, Time, DateTime, Text, Boolean
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import (
+    create_engine, func, select, text, type_coerce, Column, Integer, String, Date, Time, DateTime, Text, Boolean,
+    UniqueConstraint, event
+)
+from sqlalchemy.orm import declarative_base, sessionmaker
+from starlette.datastructures import MutableHeaders
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,8 +46,12 @@ Base = declarative_base()
 
 # Kafka configuration
 KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+KAFKA_RETRY_MAX_SECONDS = float(os.getenv("KAFKA_RETRY_MAX_SECONDS", "30"))
 kafka_producer = None
 
+# Demo appointments are seeded into an empty table unless this is off
+LOAD_SAMPLE_DATA = os.getenv("LOAD_SAMPLE_DATA", "true").lower() in ("1", "true", "yes")
+
 
 # ═══════════════════════════════════════════════════════════════
 # DATABASE MODELS
@@ -56,6 +75,40 @@ class AppointmentDB(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class AppointmentSeriesDB(Base):
+    """A recurring appointment, stored once and expanded per calendar window."""
+    __tablename__ = "appointment_series"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    pet_id = Column(Integer, nullable=False, index=True)
+    vet_id = Column(Integer, nullable=False, index=True)
+    rrule = Column(String, nullable=False)
+    start_date = Column(String, nullable=False, index=True)
+    end_date = Column(String, nullable=False, index=True)  # date of the last occurrence
+    time = Column(String, nullable=False)
+    end_time = Column(String, nullable=True)
+    appointment_type = Column(String, nullable=False)
+    status = Column(String, default="SCHEDULED")
+    notes = Column(Text, nullable=True)
+    pet_name = Column(String, nullable=True)
+    owner_name = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SeriesExceptionDB(Base):
+    """One occurrence of a series that was skipped (new_date is NULL) or moved."""
+    __tablename__ = "appointment_series_exceptions"
+    __table_args__ = (UniqueConstraint("series_id", "original_date"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    series_id = Column(Integer, nullable=False, index=True)
+    original_date = Column(String, nullable=False)
+    new_date = Column(String, nullable=True, index=True)
+    new_time = Column(String, nullable=True)
+    new_end_time = Column(String, nullable=True)
+
+
 # ═══════════════════════════════════════════════════════════════
 # PYDANTIC MODELS
 # ═══════════════════════════════════════════════════════════════
@@ -114,11 +167,64 @@ class AppointmentResponse(BaseModel):
         from_attributes = True
 
 
+class AppointmentSeriesCreate(BaseModel):
+    pet_id: int = Field(..., alias="petId")
+    vet_id: int = Field(1, alias="vetId")
+    start_date: str = Field(..., alias="startDate")
+    time: str
+    end_time: Optional[str] = Field(None, alias="endTime")
+    rrule: str = Field(..., description="FREQ=DAILY|WEEKLY|MONTHLY;INTERVAL=n;COUNT=n or UNTIL=YYYYMMDD")
+    appointment_type: str = Field(..., alias="appointmentType")
+    notes: Optional[str] = None
+    status: str = "SCHEDULED"
+    pet_name: Optional[str] = Field(None, alias="petName")
+    owner_name: Optional[str] = Field(None, alias="ownerName")
+    
+    class Config:
+        populate_by_name = True
+
+
+class OccurrenceMove(BaseModel):
+    date: Optional[str] = None
+    time: Optional[str] = None
+    end_time: Optional[str] = Field(None, alias="endTime")
+    
+    class Config:
+        populate_by_name = True
+
+
+class SeriesException(BaseModel):
+    originalDate: str
+    skipped: bool
+    date: Optional[str] = None
+    time: Optional[str] = None
+    endTime: Optional[str] = None
+
+
+class AppointmentSeriesResponse(BaseModel):
+    id: int
+    petId: int
+    vetId: int
+    rrule: str
+    startDate: str
+    endDate: str
+    occurrences: int
+    time: str
+    endTime: Optional[str] = None
+    appointmentType: str
+    status: str
+    notes: Optional[str] = None
+    petName: Optional[str] = None
+    ownerName: Optional[str] = None
+    exceptions: List[SeriesException] = []
+
+
 class TimeSlot(BaseModel):
     time: str
     endTime: str
     available: bool
     appointmentId: Optional[int] = None
+    seriesId: Optional[int] = None
     petName: Optional[str] = None
     appointmentType: Optional[str] = None
 
@@ -132,35 +238,563 @@ class CalendarDay(BaseModel):
     availableSlots: int
 
 
+# ═══════════════════════════════════════════════════════════════
+# RESPONSE PROJECTION
+# ═══════════════════════════════════════════════════════════════
+
+# API field -> column, in response order (the AppointmentResponse shape).
+# Read endpoints select just the requested columns with SQLAlchemy Core and
+# return plain dicts through ORJSONResponse, so no ORM objects are loaded
+# and FastAPI does not re-validate rows against response_model.
+APPOINTMENT_FIELDS = {
+    "id": AppointmentDB.id,
+    "petId": AppointmentDB.pet_id,
+    "vetId": AppointmentDB.vet_id,
+    "date": AppointmentDB.date,
+    "time": AppointmentDB.time,
+    "endTime": AppointmentDB.end_time,
+    "appointmentType": AppointmentDB.appointment_type,
+    "status": AppointmentDB.status,
+    "notes": AppointmentDB.notes,
+    "petName": AppointmentDB.pet_name,
+    "ownerName": AppointmentDB.owner_name,
+    "createdAt": AppointmentDB.created_at,
+}
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Response fields named by a fields= parameter; all of them if it is empty."""
+    if not fields:
+        return list(APPOINTMENT_FIELDS)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in APPOINTMENT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def select_appointments(db, *criteria, order_by=(), fields: Optional[List[str]] = None) -> List[dict]:
+    """
+    Appointments matching criteria as response dicts with the given fields.
+    createdAt stays a datetime; orjson renders it like isoformat().
+    """
+    names = fields or list(APPOINTMENT_FIELDS)
+    statement = select(*(APPOINTMENT_FIELDS[name] for name in names)).where(*criteria).order_by(*order_by)
+    return [dict(zip(names, row)) for row in db.execute(statement)]
+
+
+def appointment_response(appointment: AppointmentDB) -> AppointmentResponse:
+    """Response model of a loaded appointment (write endpoints)."""
+    values = {name: getattr(appointment, column.key) for name, column in APPOINTMENT_FIELDS.items()}
+    values["createdAt"] = values["createdAt"].isoformat() if values["createdAt"] else None
+    return AppointmentResponse(**values)
+
+
+# ═══════════════════════════════════════════════════════════════
+# ANALYTICS EXPORT
+# ═══════════════════════════════════════════════════════════════
+
+# /api/appointments/export streams the table as Arrow IPC or Parquet for
+# analytics jobs. Rows come off a server-side cursor EXPORT_BATCH_ROWS at a
+# time and go straight into column arrays, so memory stays at one batch
+# however large the export is. pyarrow is imported on first export only.
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "65536"))
+EXPORT_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+EXPORT_INTEGER_FIELDS = {"id", "petId", "vetId"}
+
+
+class ExportSink:
+    """Write-only file for pyarrow writers; drain() returns what was written since the last call."""
+    
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+    
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self.position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def export_schema(pa, names: List[str]):
+    """Arrow schema of the exported fields, in the requested order."""
+    def arrow_type(name):
+        if name in EXPORT_INTEGER_FIELDS:
+            return pa.int64()
+        if name == "createdAt":
+            return pa.timestamp("us")
+        return pa.string()
+    return pa.schema([pa.field(name, arrow_type(name)) for name in names])
+
+
+def export_stream(export_format: str, names: List[str], criteria: list):
+    """
+    Encoded export, one chunk per record batch. Each cursor partition is
+    transposed into columns and converted by pyarrow in one call per column.
+    createdAt is read as the driver returns it (SQLite: text) and cast by
+    Arrow, which is much cheaper than SQLAlchemy building a datetime per row.
+    """
+    import pyarrow as pa
+    
+    schema = export_schema(pa, names)
+    sink = ExportSink()
+    if export_format == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    
+    columns = [
+        type_coerce(APPOINTMENT_FIELDS[name], String) if name == "createdAt" else APPOINTMENT_FIELDS[name]
+        for name in names
+    ]
+    statement = (
+        select(*columns)
+        .where(*criteria)
+        .order_by(AppointmentDB.id)
+    )
+    with engine.connect() as connection:
+        result = connection.execution_options(yield_per=EXPORT_BATCH_ROWS).execute(statement)
+        for rows in result.partitions():
+            arrays = [
+                pa.array(values).cast(field.type) if pa.types.is_timestamp(field.type)
+                else pa.array(values, type=field.type)
+                for values, field in zip(zip(*rows), schema)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    writer.close()
+    yield sink.drain()
+
+
 # ═══════════════════════════════════════════════════════════════
 # KAFKA PRODUCER
 # ═══════════════════════════════════════════════════════════════
 
-def init_kafka_producer():
-    """Initialize Kafka producer with error handling."""
+def ensure_state_topic():
+    """
+    Create the compacted appointment-state topic this service owns, before
+    the first send could auto-create it without compaction.
+    """
+    from kafka.admin import KafkaAdminClient, NewTopic
+    from kafka.errors import TopicAlreadyExistsError
+    admin = KafkaAdminClient(bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS)
+    try:
+        admin.create_topics([NewTopic(
+            "appointment-state", num_partitions=3, replication_factor=1,
+            topic_configs={"cleanup.policy": "compact"}
+        )])
+        logger.info("Created compacted topic appointment-state")
+    except TopicAlreadyExistsError:
+        pass
+    finally:
+        admin.close()
+
+
+def init_kafka_producer() -> bool:
+    """Initialize Kafka producer with error handling. Returns whether it connected."""
     global kafka_producer
     try:
         from kafka import KafkaProducer
+        ensure_state_topic()
         kafka_producer = KafkaProducer(
             bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
-            value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+            # None is a tombstone on the compacted state topic
+            value_serializer=lambda v: json.dumps(v).encode('utf-8') if v is not None else None,
             key_serializer=lambda k: k.encode('utf-8') if k else None
         )
         logger.info(f"Kafka producer connected to {KAFKA_BOOTSTRAP_SERVERS}")
+        return True
     except Exception as e:
-        logger.warning(f"Kafka not available: {e}. Events will not be published.")
+        logger.warning(f"Kafka not available: {e}. Events are not published until it connects.")
         kafka_producer = None
+        return False
 
 
 def send_event(topic: str, key: str, event: dict):
     """Send event to Kafka topic."""
     if kafka_producer:
+        started = perf_counter()
         try:
             kafka_producer.send(topic, key=key, value=event)
             kafka_producer.flush()
             logger.info(f"Sent event to {topic}: {event.get('eventType')}")
         except Exception as e:
             logger.warning(f"Failed to send event: {e}")
+        finally:
+            record_span("kafka", perf_counter() - started)
+
+
+def send_state(appointment_id: int, state: Optional[dict]):
+    """
+    Publish an appointment's full state (None once deleted) to the compacted
+    appointment-state topic. Sent before the matching event.
+    """
+    if kafka_producer:
+        started = perf_counter()
+        try:
+            kafka_producer.send("appointment-state", key=str(appointment_id), value=state)
+        except Exception as e:
+            logger.warning(f"Failed to send appointment state: {e}")
+        finally:
+            record_span("kafka", perf_counter() - started)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CALENDAR STREAM HUB
+# ═══════════════════════════════════════════════════════════════
+
+CALENDAR_STREAM_KEEPALIVE = float(os.getenv("CALENDAR_STREAM_KEEPALIVE", "15"))
+CALENDAR_STREAM_BACKLOG = 100
+MAX_STREAM_DAYS = 31
+
+
+class CalendarHub:
+    """
+    In-process fan-out of slot changes to /api/calendar/stream subscribers.
+
+    Each subscriber is a bounded queue registered under every (vet id, date)
+    it watches, so a change costs one dict lookup plus one put per watcher,
+    and an idle subscriber costs nothing. Messages are encoded once and
+    shared. Everything runs on the event loop, so there is no locking. A
+    subscriber that falls CALENDAR_STREAM_BACKLOG messages behind has its
+    backlog replaced by None, telling the stream to resync.
+    """
+
+    def __init__(self):
+        self.watchers = {}
+
+    def subscribe(self, vet_id: int, dates: List[str]) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=CALENDAR_STREAM_BACKLOG)
+        for day in dates:
+            self.watchers.setdefault((vet_id, day), set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, vet_id: int, dates: List[str]):
+        for day in dates:
+            watchers = self.watchers.get((vet_id, day))
+            if watchers is not None:
+                watchers.discard(queue)
+                if not watchers:
+                    del self.watchers[(vet_id, day)]
+
+    def is_watched(self, vet_id: int, day: str) -> bool:
+        return (vet_id, day) in self.watchers
+
+    def publish(self, vet_id: int, day: str, message: str):
+        for queue in self.watchers.get((vet_id, day), ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def subscriber_count(self) -> int:
+        return len({id(queue) for watchers in self.watchers.values() for queue in watchers})
+
+
+calendar_hub = CalendarHub()
+
+
+def sse_message(event: str, data) -> str:
+    """One server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+def publish_slot_changes(db, changed: set):
+    """
+    Push the current state of changed (vet id, date, time) slots to the
+    calendar streams watching them. Slots nobody watches cost nothing.
+    Called after the commit; also stops requests from joining calendar
+    reads of those days that started before it.
+    """
+    calendar_flights.forget({(vet_id, day) for vet_id, day, _ in changed})
+    grid = {slot["time"]: slot for slot in generate_time_slots(WORKING_START, WORKING_END, SLOT_DURATION)}
+    by_day = {}
+    for vet_id, day, slot_time in changed:
+        if slot_time in grid and calendar_hub.is_watched(vet_id, day):
+            by_day.setdefault((vet_id, day), set()).add(slot_time)
+    
+    for (vet_id, day), times in by_day.items():
+        if DAY_NAMES[datetime.strptime(day, "%Y-%m-%d").weekday()] not in WORKING_DAYS:
+            continue
+        # Same bookings, series occurrences included, as the calendar
+        booked_times = day_bookings(db, [vet_id], day, day).get((vet_id, day), {})
+        calendar_hub.publish(vet_id, day, sse_message("slots", {
+            "vetId": vet_id,
+            "date": day,
+            "slots": [slot_view(grid[t], booked_times.get(t)) for t in sorted(times)]
+        }))
+
+
+# ═══════════════════════════════════════════════════════════════
+# REQUEST COALESCING
+# ═══════════════════════════════════════════════════════════════
+
+# Identical calendar reads that arrive while one is already running (every
+# terminal loading today's calendar at opening) wait for that computation
+# instead of repeating it. The coalesced share of requests is
+# appointment_coalesced_requests_total{outcome="joined"} over all outcomes.
+COALESCED_REQUESTS = Counter(
+    "appointment_coalesced_requests_total",
+    "Calendar reads by endpoint; joined ones shared an in-flight computation",
+    ["endpoint", "outcome"]
+)
+COALESCED_IN_FLIGHT = Gauge(
+    "appointment_coalesced_in_flight", "Calendar computations currently running", ["endpoint"]
+)
+
+
+class SingleFlight:
+    """
+    Shares one running computation between concurrent identical requests.
+
+    A flight runs compute() on a worker thread (the event loop stays free)
+    and is keyed by the request's parameters. Each flight also records the
+    (vet id, date) days it reads: forget() is called after a write commits,
+    so requests arriving later start a fresh flight and see the write while
+    those already waiting get the result that was in progress.
+    Loop-confined; only touched from the event loop thread.
+    """
+    
+    def __init__(self):
+        self._flights = {}  # key -> (task, days)
+    
+    async def do(self, endpoint: str, key: tuple, days: set, compute):
+        flight = self._flights.get(key)
+        if flight is not None:
+            COALESCED_REQUESTS.labels(endpoint, "joined").inc()
+            task = flight[0]
+        else:
+            COALESCED_REQUESTS.labels(endpoint, "computed").inc()
+            task = asyncio.ensure_future(asyncio.to_thread(compute))
+            self._flights[key] = (task, days)
+            COALESCED_IN_FLIGHT.labels(endpoint).inc()
+            task.add_done_callback(lambda done: self._landed(endpoint, key, done))
+        # A disconnecting client must not cancel the flight for the others
+        return await asyncio.shield(task)
+    
+    def _landed(self, endpoint: str, key: tuple, task):
+        COALESCED_IN_FLIGHT.labels(endpoint).dec()
+        flight = self._flights.get(key)
+        if flight is not None and flight[0] is task:
+            del self._flights[key]
+    
+    def forget(self, changed_days: set):
+        """Detach in-flight computations that read any of the (vet id, date) days."""
+        stale = [key for key, (_, days) in self._flights.items() if days & changed_days]
+        for key in stale:
+            del self._flights[key]
+
+
+calendar_flights = SingleFlight()
+
+
+# ═══════════════════════════════════════════════════════════════
+# STARTUP
+# ═══════════════════════════════════════════════════════════════
+
+# Only the schema is created before serving. Kafka and sample data are
+# retried on background threads, so an unreachable broker or a slow seed
+# never holds up a (rolling) restart. /health is liveness; /ready says
+# whether this instance should take traffic.
+background_stop = threading.Event()
+readiness = {"accepting": False, "kafka": "connecting", "sample_data": "pending"}
+
+
+def retry_in_background(name: str, task, max_delay: float = 30.0):
+    """
+    Run task() on a daemon thread until it returns True, waiting 1s, 2s,
+    4s ... up to max_delay between attempts. Gives up at shutdown.
+    """
+    def run():
+        started = perf_counter()
+        delay, attempts = 1.0, 1
+        while not task():
+            logger.warning(f"⚠️ {name} failed, retrying in {delay:.0f}s")
+            if background_stop.wait(delay):
+                return
+            delay = min(delay * 2, max_delay)
+            attempts += 1
+        logger.info(f"⏱️ {name} finished {perf_counter() - started:.2f}s after startup ({attempts} attempt(s))")
+    
+    threading.Thread(target=run, name=name, daemon=True).start()
+
+
+def connect_kafka() -> bool:
+    """Background Kafka connection attempt."""
+    if not init_kafka_producer():
+        return False
+    readiness["kafka"] = "connected"
+    return True
+
+
+def seed_sample_data() -> bool:
+    """Background sample data load."""
+    if not load_sample_data():
+        readiness["sample_data"] = "retrying"
+        return False
+    readiness["sample_data"] = "loaded"
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROFILING AND REQUEST SPANS (admin, opt-in)
+# ═══════════════════════════════════════════════════════════════
+
+# /admin/* needs ADMIN_TOKEN (sent as "Authorization: Bearer <token>") and
+# answers 404 while it is unset. /admin/profile samples every thread's
+# stack for N seconds and returns collapsed stacks (flamegraph.pl or
+# speedscope input). /admin/spans switches per-request phase timings on or
+# off: db (statement execution), kafka and serialize, reported in a
+# Server-Timing header and a log line. Switched off, each hook is one check.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+MAX_PROFILE_SECONDS = 60
+MAX_PROFILE_HZ = 1000
+profile_lock = threading.Lock()
+
+request_spans_enabled = os.getenv("REQUEST_SPANS", "false").lower() in ("1", "true", "yes")
+current_spans: ContextVar[Optional[list]] = ContextVar("current_spans", default=None)
+
+
+def require_admin(authorization: str = Header(None)):
+    """Dependency for /admin routes."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest((authorization or "").encode(), f"Bearer {ADMIN_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+def sample_stacks(seconds: float, hz: int) -> str:
+    """
+    Wall-clock samples of every other thread's Python stack, as collapsed
+    stacks: "thread;outer;...;inner count" per line.
+    """
+    me = threading.get_ident()
+    counts = {}
+    deadline = perf_counter() + seconds
+    while perf_counter() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            key = ";".join(reversed(stack))
+            counts[key] = counts.get(key, 0) + 1
+        sleep(1.0 / hz)
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
+
+def record_span(phase: str, seconds: float):
+    """Add a timed phase to the current request's spans, if they are on."""
+    spans = current_spans.get()
+    if spans is not None:
+        spans.append((phase, seconds))
+
+
+def server_timing(spans: list, total: float) -> str:
+    """Server-Timing value: milliseconds and call count per phase, then the total."""
+    phases = {}
+    for phase, seconds in spans:
+        spent, calls = phases.get(phase, (0.0, 0))
+        phases[phase] = (spent + seconds, calls + 1)
+    parts = [f'{phase};dur={spent * 1000:.2f};desc="{calls}x"' for phase, (spent, calls) in phases.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("span_started", []).append(perf_counter())
+
+
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("span_started")
+    if started:
+        record_span("db", perf_counter() - started.pop())
+
+
+def set_request_spans(enabled: bool):
+    """Switch request spans; the DB hooks are only attached while they are on."""
+    global request_spans_enabled
+    if enabled != event.contains(engine, "before_cursor_execute", _statement_started):
+        for name, hook in (("before_cursor_execute", _statement_started), ("after_cursor_execute", _statement_finished)):
+            (event.listen if enabled else event.remove)(engine, name, hook)
+    request_spans_enabled = enabled
+
+
+class RequestSpansMiddleware:
+    """ASGI middleware collecting a request's spans while they are switched on."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if not request_spans_enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        spans = []
+        token = current_spans.set(spans)
+        started = perf_counter()
+        status = None
+        
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", server_timing(spans, perf_counter() - started))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_spans.reset(token)
+            logger.info(f"⏱️ {scope['method']} {scope['path']} {status} {server_timing(spans, perf_counter() - started)}")
+
+
+class TimedRender:
+    """Response mixin recording render() as the serialize span."""
+    
+    def render(self, content) -> bytes:
+        if current_spans.get() is None:
+            return super().render(content)
+        started = perf_counter()
+        try:
+            return super().render(content)
+        finally:
+            record_span("serialize", perf_counter() - started)
+
+
+class TimedJSONResponse(TimedRender, JSONResponse):
+    pass
+
+
+class TimedORJSONResponse(TimedRender, ORJSONResponse):
+    pass
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -171,6 +805,7 @@ def send_event(topic: str, key: str, event: dict):
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Startup
+    lifespan_started = perf_counter()
     print("""
 ╔════════════════════════════════════════════════════════════════╗
 ║                                                                ║
@@ -178,9 +813,25 @@ async def lifespan(app: FastAPI):
 ║                                                                ║
 ╚════════════════════════════════════════════════════════════════╝
     """)
+    schema_started = perf_counter()
     Base.metadata.create_all(bind=engine)
-    init_kafka_producer()
-    load_sample_data()
+    schema_done = perf_counter()
+    
+    set_request_spans(request_spans_enabled)
+    background_stop.clear()
+    retry_in_background("Kafka connection", connect_kafka, KAFKA_RETRY_MAX_SECONDS)
+    if LOAD_SAMPLE_DATA:
+        retry_in_background("Sample data", seed_sample_data)
+    else:
+        readiness["sample_data"] = "disabled"
+    readiness["accepting"] = True
+    
+    logger.info(
+        f"⏱️ Startup: imports {lifespan_started - IMPORTS_STARTED:.2f}s, "
+        f"schema {schema_done - schema_started:.2f}s, "
+        f"ready {perf_counter() - IMPORTS_STARTED:.2f}s after import "
+        f"(Kafka{' and sample data' if LOAD_SAMPLE_DATA else ''} continue in background)"
+    )
     print("""
 ╔════════════════════════════════════════════════════════════════╗
 ║   🎮 APPOINTMENT SERVICE ONLINE - PORT 8081                    ║
@@ -189,6 +840,8 @@ async def lifespan(app: FastAPI):
     """)
     yield
     # Shutdown
+    readiness["accepting"] = False
+    background_stop.set()
     if kafka_producer:
         kafka_producer.close()
 
@@ -197,7 +850,8 @@ app = FastAPI(
     title="DataVet Appointment Service",
     description="🗓️ Appointment scheduling microservice for DataVet",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse
 )
 
 # CORS middleware
@@ -208,12 +862,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestSpansMiddleware)
 
 
 # ═══════════════════════════════════════════════════════════════
 # HELPER FUNCTIONS
 # ═══════════════════════════════════════════════════════════════
 
+# Default working hours (should come from vet settings in production)
+WORKING_START = "09:00"
+WORKING_END = "17:00"
+SLOT_DURATION = 30
+WORKING_DAYS = ["MON", "TUE", "WED", "THU", "FRI"]
+DAY_NAMES = ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"]
+
+
 def calculate_end_time(start_time: str, duration_minutes: int = 30) -> str:
     """Calculate end time from start time and duration."""
     hours, minutes = map(int, start_time.split(':'))
@@ -243,15 +906,275 @@ def generate_time_slots(start_hour: str, end_hour: str, slot_duration: int = 30)
     return slots
 
 
+def slot_view(slot: dict, appt) -> TimeSlot:
+    """A calendar slot, booked by appt (a row or an Occurrence) or free if appt is None."""
+    if appt is None:
+        return TimeSlot(
+            time=slot["time"],
+            endTime=slot["endTime"],
+            available=True,
+            appointmentId=None,
+            petName=None,
+            appointmentType=None
+        )
+    return TimeSlot(
+        time=slot["time"],
+        endTime=appt.end_time or slot["endTime"],
+        available=False,
+        appointmentId=appt.id,
+        seriesId=appt.series_id if isinstance(appt, Occurrence) else None,
+        petName=appt.pet_name,
+        appointmentType=appt.appointment_type
+    )
+
+
+# ═══════════════════════════════════════════════════════════════
+# RECURRING SERIES
+# ═══════════════════════════════════════════════════════════════
+
+# A series is one appointment_series row plus its exceptions. Occurrences
+# are never stored: day_bookings() computes the ones inside the requested
+# window, so calendar and conflict checks see one-off appointments and
+# series occurrences alike, at a cost proportional to the window.
+MAX_SERIES_OCCURRENCES = 1000
+RECURRENCE_STEP_DAYS = {"DAILY": 1, "WEEKLY": 7}
+
+
+class Recurrence:
+    """
+    The RRULE subset series use: FREQ=DAILY|WEEKLY|MONTHLY with INTERVAL
+    and COUNT or UNTIL, anchored at the start date (weekly on its weekday,
+    monthly on its day of the month). Occurrence n is computed directly,
+    so finding the occurrences in a window never walks the series.
+    """
+    
+    def __init__(self, rule: str, start: date):
+        parts = {}
+        rule = rule.strip().upper()
+        if rule.startswith("RRULE:"):
+            rule = rule[len("RRULE:"):]
+        for part in filter(None, rule.split(";")):
+            name, sep, value = part.partition("=")
+            if not sep:
+                raise ValueError(f"Malformed RRULE part: {part}")
+            parts[name.strip()] = value.strip()
+        unsupported = set(parts) - {"FREQ", "INTERVAL", "COUNT", "UNTIL"}
+        if unsupported:
+            raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(unsupported))}")
+        
+        self.freq = parts.get("FREQ")
+        if self.freq not in ("DAILY", "WEEKLY", "MONTHLY"):
+            raise ValueError("FREQ must be DAILY, WEEKLY or MONTHLY")
+        self.interval = int(parts.get("INTERVAL", "1"))
+        if self.interval < 1:
+            raise ValueError("INTERVAL must be at least 1")
+        self.start = start
+        if self.freq == "MONTHLY" and start.day > 28:
+            raise ValueError("Monthly series must start on day 1-28 of the month")
+        
+        if ("COUNT" in parts) == ("UNTIL" in parts):
+            raise ValueError("Give exactly one of COUNT or UNTIL")
+        if "COUNT" in parts:
+            self.count = int(parts["COUNT"])
+        else:
+            until = datetime.strptime(parts["UNTIL"][:8], "%Y%m%d").date()
+            self.count = self._index_on_or_before(until) + 1
+        if not 1 <= self.count <= MAX_SERIES_OCCURRENCES:
+            raise ValueError(f"A series has 1 to {MAX_SERIES_OCCURRENCES} occurrences")
+    
+    def nth(self, n: int) -> date:
+        """Date of occurrence n (0-based)."""
+        if self.freq == "MONTHLY":
+            months = self.start.month - 1 + n * self.interval
+            return self.start.replace(year=self.start.year + months // 12, month=months % 12 + 1)
+        return self.start + timedelta(days=n * self.interval * RECURRENCE_STEP_DAYS[self.freq])
+    
+    def _index_on_or_before(self, day: date) -> int:
+        """Index of the last occurrence on or before day, ignoring COUNT; -1 before the start."""
+        if self.freq == "MONTHLY":
+            n = ((day.year - self.start.year) * 12 + day.month - self.start.month) // self.interval
+            if n >= 0 and self.nth(n) > day:
+                n -= 1
+        else:
+            n = (day - self.start).days // (self.interval * RECURRENCE_STEP_DAYS[self.freq])
+        return max(n, -1)
+    
+    @property
+    def last(self) -> date:
+        return self.nth(self.count - 1)
+    
+    def between(self, first: date, last: date):
+        """Occurrence dates from first to last inclusive."""
+        low = self._index_on_or_before(first - timedelta(days=1)) + 1
+        high = min(self._index_on_or_before(last), self.count - 1)
+        return [self.nth(n) for n in range(low, high + 1)]
+    
+    def occurs_on(self, day: date) -> bool:
+        n = self._index_on_or_before(day)
+        return 0 <= n < self.count and self.nth(n) == day
+
+
+class Occurrence:
+    """
+    One occurrence of a series as the calendar code sees it. Reads like an
+    AppointmentDB row (pet_name, status, ... come from the series) with id
+    None; series_id and original_date identify it.
+    """
+    
+    id = None
+    
+    def __init__(self, series: AppointmentSeriesDB, original_date: str, day: str, slot_time: str, end_time: Optional[str]):
+        self.series = series
+        self.original_date = original_date
+        self.date = day
+        self.time = slot_time
+        self.end_time = end_time
+    
+    @property
+    def series_id(self) -> int:
+        return self.series.id
+    
+    def __getattr__(self, name):
+        return getattr(self.series, name)
+
+
+def parse_day(value: str) -> date:
+    """A YYYY-MM-DD date, or 400."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+
+
+def series_recurrence(series: AppointmentSeriesDB) -> Recurrence:
+    return Recurrence(series.rrule, date.fromisoformat(series.start_date))
+
+
+def day_bookings(db, vet_ids: List[int], first: str, last: str) -> dict:
+    """
+    Non-cancelled bookings of the vets from first to last (YYYY-MM-DD), as
+    {(vet id, date): {time: AppointmentDB or Occurrence}}. Series occurrences
+    in the window are expanded, skipped or moved ones dropped, and ones moved
+    into the window added; a one-off appointment wins a time it shares.
+    """
+    first_day, last_day = parse_day(first), parse_day(last)
+    bookings = {}
+    
+    series_rows = db.query(AppointmentSeriesDB).filter(
+        AppointmentSeriesDB.vet_id.in_(vet_ids),
+        AppointmentSeriesDB.start_date <= last,
+        AppointmentSeriesDB.end_date >= first,
+        AppointmentSeriesDB.status != "CANCELLED"
+    ).all()
+    if series_rows:
+        excepted = set(db.execute(
+            select(SeriesExceptionDB.series_id, SeriesExceptionDB.original_date).where(
+                SeriesExceptionDB.series_id.in_([series.id for series in series_rows]),
+                SeriesExceptionDB.original_date.between(first, last)
+            )
+        ).all())
+        for series in series_rows:
+            for day in series_recurrence(series).between(first_day, last_day):
+                day = day.isoformat()
+                if (series.id, day) not in excepted:
+                    bookings.setdefault((series.vet_id, day), {})[series.time] = Occurrence(
+                        series, day, day, series.time, series.end_time
+                    )
+    
+    moved_in = db.query(SeriesExceptionDB, AppointmentSeriesDB).join(
+        AppointmentSeriesDB, AppointmentSeriesDB.id == SeriesExceptionDB.series_id
+    ).filter(
+        AppointmentSeriesDB.vet_id.in_(vet_ids),
+        SeriesExceptionDB.new_date.between(first, last),
+        AppointmentSeriesDB.status != "CANCELLED"
+    ).all()
+    for exception, series in moved_in:
+        bookings.setdefault((series.vet_id, exception.new_date), {})[exception.new_time] = Occurrence(
+            series, exception.original_date, exception.new_date, exception.new_time, exception.new_end_time
+        )
+    
+    for appt in db.query(AppointmentDB).filter(
+        AppointmentDB.vet_id.in_(vet_ids),
+        AppointmentDB.date.between(first, last),
+        AppointmentDB.status != "CANCELLED"
+    ):
+        bookings.setdefault((appt.vet_id, appt.date), {})[appt.time] = appt
+    return bookings
+
+
+def slot_booking(db, vet_id: int, day: str, slot_time: str):
+    """Whatever books the vet's slot (a row or an Occurrence), or None."""
+    return day_bookings(db, [vet_id], day, day).get((vet_id, day), {}).get(slot_time)
+
+
+def series_slots(db, series: AppointmentSeriesDB) -> set:
+    """(vet id, date, time) of every current occurrence, for publish_slot_changes."""
+    slots = {(series.vet_id, day.isoformat(), series.time) for day in series_recurrence(series).between(
+        date.fromisoformat(series.start_date), date.fromisoformat(series.end_date)
+    )}
+    for exception in db.query(SeriesExceptionDB).filter(SeriesExceptionDB.series_id == series.id):
+        slots.discard((series.vet_id, exception.original_date, series.time))
+        if exception.new_date:
+            slots.add((series.vet_id, exception.new_date, exception.new_time))
+    return slots
+
+
+def series_response(db, series: AppointmentSeriesDB) -> AppointmentSeriesResponse:
+    exceptions = db.query(SeriesExceptionDB).filter(
+        SeriesExceptionDB.series_id == series.id
+    ).order_by(SeriesExceptionDB.original_date).all()
+    return AppointmentSeriesResponse(
+        id=series.id,
+        petId=series.pet_id,
+        vetId=series.vet_id,
+        rrule=series.rrule,
+        startDate=series.start_date,
+        endDate=series.end_date,
+        occurrences=series_recurrence(series).count,
+        time=series.time,
+        endTime=series.end_time,
+        appointmentType=series.appointment_type,
+        status=series.status,
+        notes=series.notes,
+        petName=series.pet_name,
+        ownerName=series.owner_name,
+        exceptions=[
+            SeriesException(
+                originalDate=e.original_date, skipped=e.new_date is None,
+                date=e.new_date, time=e.new_time, endTime=e.new_end_time
+            )
+            for e in exceptions
+        ]
+    )
+
+
+def occurrence_view(occurrence: Occurrence) -> dict:
+    series = occurrence.series
+    return {
+        "seriesId": series.id,
+        "originalDate": occurrence.original_date,
+        "date": occurrence.date,
+        "time": occurrence.time,
+        "endTime": occurrence.end_time,
+        "moved": (occurrence.date, occurrence.time) != (occurrence.original_date, series.time),
+        "petId": series.pet_id,
+        "vetId": series.vet_id,
+        "appointmentType": series.appointment_type,
+        "status": series.status,
+        "petName": series.pet_name,
+        "ownerName": series.owner_name,
+    }
+
+
 # ═══════════════════════════════════════════════════════════════
 # SAMPLE DATA
 # ═══════════════════════════════════════════════════════════════
 
-def load_sample_data():
-    """Load sample appointment data."""
+def load_sample_data() -> bool:
+    """Load sample appointment data into an empty table. Returns False if it failed."""
     db = SessionLocal()
     try:
-        if db.query(AppointmentDB).count() == 0:
+        if db.execute(select(AppointmentDB.id).limit(1)).first() is None:
             logger.info("Loading sample appointment data...")
             today = date.today().isoformat()
             tomorrow = (date.today() + timedelta(days=1)).isoformat()
@@ -288,8 +1211,10 @@ def load_sample_data():
                 db.add(appt)
             db.commit()
             logger.info(f"Loaded {len(sample_appointments)} sample appointments")
+        return True
     except Exception as e:
         logger.error(f"Error loading sample data: {e}")
+        return False
     finally:
         db.close()
 
@@ -300,59 +1225,121 @@ def load_sample_data():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Liveness: the process is up and serving. Never touches the database or Kafka."""
     return {"status": "UP", "service": "appointment-service"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)], include_in_schema=False)
+async def admin_profile(
+    seconds: float = Query(10, gt=0, le=MAX_PROFILE_SECONDS, description="How long to sample"),
+    hz: int = Query(100, ge=1, le=MAX_PROFILE_HZ, description="Samples per second")
+):
+    """Sample the service's stacks and return them collapsed, for a flamegraph."""
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        stacks = await asyncio.to_thread(sample_stacks, seconds, hz)
+    finally:
+        profile_lock.release()
+    return Response(stacks, media_type="text/plain", headers={
+        "Content-Disposition": f'attachment; filename="appointment-service-{os.getpid()}.collapsed"'
+    })
+
+
+class SpansToggle(BaseModel):
+    enabled: bool
+
+
+@app.get("/admin/spans", dependencies=[Depends(require_admin)], include_in_schema=False)
+async def get_request_spans():
+    """Whether per-request spans are on."""
+    return {"enabled": request_spans_enabled}
+
+
+@app.post("/admin/spans", dependencies=[Depends(require_admin)], include_in_schema=False)
+async def toggle_request_spans(toggle: SpansToggle):
+    """Switch per-request spans on or off."""
+    set_request_spans(toggle.enabled)
+    logger.info(f"Request spans {'enabled' if toggle.enabled else 'disabled'}")
+    return {"enabled": request_spans_enabled}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness: startup finished, not shutting down and the database answers.
+    Kafka and sample data are reported but do not gate traffic; without a
+    broker, events are dropped exactly as before.
+    """
+    status = {"service": "appointment-service", **readiness}
+    if not readiness["accepting"]:
+        return TimedORJSONResponse({"status": "NOT_READY", **status, "reason": "not accepting traffic"}, status_code=503)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception as e:
+        return TimedORJSONResponse({"status": "NOT_READY", **status, "reason": f"database: {e}"}, status_code=503)
+    return TimedORJSONResponse({"status": "READY", **status})
+
+
 @app.get("/api/appointments", response_model=List[AppointmentResponse])
-async def get_all_appointments():
+async def get_all_appointments(fields: str = Query(None, description="Comma-separated fields to return")):
     """Get all appointments."""
+    names = parse_fields(fields)
     db = SessionLocal()
     try:
-        appointments = db.query(AppointmentDB).all()
-        return [
-            AppointmentResponse(
-                id=a.id,
-                petId=a.pet_id,
-                vetId=a.vet_id,
-                date=a.date,
-                time=a.time,
-                endTime=a.end_time,
-                appointmentType=a.appointment_type,
-                status=a.status,
-                notes=a.notes,
-                petName=a.pet_name,
-                ownerName=a.owner_name,
-                createdAt=a.created_at.isoformat() if a.created_at else None
-            )
-            for a in appointments
-        ]
+        return TimedORJSONResponse(select_appointments(db, fields=names))
     finally:
         db.close()
 
 
+@app.get("/api/appointments/export")
+async def export_appointments(
+    export_format: str = Query("arrow", alias="format", description="arrow (IPC stream) or parquet"),
+    from_date: str = Query(None, alias="from", description="First appointment date (YYYY-MM-DD)"),
+    to_date: str = Query(None, alias="to", description="Last appointment date (YYYY-MM-DD)"),
+    fields: str = Query(None, description="Comma-separated fields to export")
+):
+    """Stream appointments as Arrow or Parquet for analytics jobs."""
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    names = parse_fields(fields)
+    criteria = []
+    try:
+        if from_date:
+            criteria.append(AppointmentDB.date >= datetime.strptime(from_date, "%Y-%m-%d").date().isoformat())
+        if to_date:
+            criteria.append(AppointmentDB.date <= datetime.strptime(to_date, "%Y-%m-%d").date().isoformat())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        export_stream(export_format, names, criteria),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="appointments.{extension}"'}
+    )
+
+
 @app.get("/api/appointments/{appointment_id}", response_model=AppointmentResponse)
-async def get_appointment(appointment_id: int):
+async def get_appointment(
+    appointment_id: int,
+    fields: str = Query(None, description="Comma-separated fields to return")
+):
     """Get appointment by ID."""
+    names = parse_fields(fields)
     db = SessionLocal()
     try:
-        appointment = db.query(AppointmentDB).filter(AppointmentDB.id == appointment_id).first()
-        if not appointment:
+        appointments = select_appointments(db, AppointmentDB.id == appointment_id, fields=names)
+        if not appointments:
             raise HTTPException(status_code=404, detail="Appointment not found")
-        return AppointmentResponse(
-            id=appointment.id,
-            petId=appointment.pet_id,
-            vetId=appointment.vet_id,
-            date=appointment.date,
-            time=appointment.time,
-            endTime=appointment.end_time,
-            appointmentType=appointment.appointment_type,
-            status=appointment.status,
-            notes=appointment.notes,
-            petName=appointment.pet_name,
-            ownerName=appointment.owner_name,
-            createdAt=appointment.created_at.isoformat() if appointment.created_at else None
-        )
+        return TimedORJSONResponse(appointments[0])
     finally:
         db.close()
 
@@ -362,15 +1349,8 @@ async def create_appointment(appointment: AppointmentCreate):
     """Create a new appointment."""
     db = SessionLocal()
     try:
-        # Check for conflicting appointments
-        existing = db.query(AppointmentDB).filter(
-            AppointmentDB.vet_id == appointment.vet_id,
-            AppointmentDB.date == appointment.date,
-            AppointmentDB.time == appointment.time,
-            AppointmentDB.status != "CANCELLED"
-        ).first()
-        
-        if existing:
+        # Check for conflicting appointments and series occurrences
+        if slot_booking(db, appointment.vet_id, appointment.date, appointment.time) is not None:
             raise HTTPException(status_code=409, detail="Time slot already booked")
         
         # Calculate end time if not provided (default 30 min)
@@ -391,6 +1371,10 @@ async def create_appointment(appointment: AppointmentCreate):
         db.add(db_appointment)
         db.commit()
         db.refresh(db_appointment)
+        publish_slot_changes(db, {(db_appointment.vet_id, db_appointment.date, db_appointment.time)})
+        
+        response = appointment_response(db_appointment)
+        send_state(db_appointment.id, response.model_dump())
         
         # Send Kafka event
         send_event("appointment-events", str(db_appointment.id), {
@@ -404,20 +1388,7 @@ async def create_appointment(appointment: AppointmentCreate):
             "timestamp": datetime.utcnow().isoformat()
         })
         
-        return AppointmentResponse(
-            id=db_appointment.id,
-            petId=db_appointment.pet_id,
-            vetId=db_appointment.vet_id,
-            date=db_appointment.date,
-            time=db_appointment.time,
-            endTime=db_appointment.end_time,
-            appointmentType=db_appointment.appointment_type,
-            status=db_appointment.status,
-            notes=db_appointment.notes,
-            petName=db_appointment.pet_name,
-            ownerName=db_appointment.owner_name,
-            createdAt=db_appointment.created_at.isoformat() if db_appointment.created_at else None
-        )
+        return response
     finally:
         db.close()
 
@@ -431,6 +1402,7 @@ async def update_appointment(appointment_id: int, appointment: AppointmentUpdate
         if not db_appointment:
             raise HTTPException(status_code=404, detail="Appointment not found")
         
+        previous_slot = (db_appointment.vet_id, db_appointment.date, db_appointment.time)
         update_data = appointment.model_dump(exclude_unset=True, by_alias=False)
         
         if "pet_id" in update_data and update_data["pet_id"] is not None:
@@ -457,6 +1429,10 @@ async def update_appointment(appointment_id: int, appointment: AppointmentUpdate
         db_appointment.updated_at = datetime.utcnow()
         db.commit()
         db.refresh(db_appointment)
+        publish_slot_changes(db, {previous_slot, (db_appointment.vet_id, db_appointment.date, db_appointment.time)})
+        
+        response = appointment_response(db_appointment)
+        send_state(db_appointment.id, response.model_dump())
         
         # Send Kafka event
         send_event("appointment-events", str(db_appointment.id), {
@@ -471,20 +1447,7 @@ async def update_appointment(appointment_id: int, appointment: AppointmentUpdate
             "timestamp": datetime.utcnow().isoformat()
         })
         
-        return AppointmentResponse(
-            id=db_appointment.id,
-            petId=db_appointment.pet_id,
-            vetId=db_appointment.vet_id,
-            date=db_appointment.date,
-            time=db_appointment.time,
-            endTime=db_appointment.end_time,
-            appointmentType=db_appointment.appointment_type,
-            status=db_appointment.status,
-            notes=db_appointment.notes,
-            petName=db_appointment.pet_name,
-            ownerName=db_appointment.owner_name,
-            createdAt=db_appointment.created_at.isoformat() if db_appointment.created_at else None
-        )
+        return response
     finally:
         db.close()
 
@@ -498,8 +1461,12 @@ async def delete_appointment(appointment_id: int):
         if not db_appointment:
             raise HTTPException(status_code=404, detail="Appointment not found")
         
+        previous_slot = (db_appointment.vet_id, db_appointment.date, db_appointment.time)
         db.delete(db_appointment)
         db.commit()
+        publish_slot_changes(db, {previous_slot})
+        
+        send_state(appointment_id, None)
         
         # Send Kafka event
         send_event("appointment-events", str(appointment_id), {
@@ -514,82 +1481,232 @@ async def delete_appointment(appointment_id: int):
 
 
 @app.get("/api/appointments/pet/{pet_id}", response_model=List[AppointmentResponse])
-async def get_appointments_by_pet(pet_id: int):
+async def get_appointments_by_pet(
+    pet_id: int,
+    fields: str = Query(None, description="Comma-separated fields to return")
+):
     """Get all appointments for a specific pet."""
+    names = parse_fields(fields)
     db = SessionLocal()
     try:
-        appointments = db.query(AppointmentDB).filter(AppointmentDB.pet_id == pet_id).all()
-        return [
-            AppointmentResponse(
-                id=a.id,
-                petId=a.pet_id,
-                vetId=a.vet_id,
-                date=a.date,
-                time=a.time,
-                endTime=a.end_time,
-                appointmentType=a.appointment_type,
-                status=a.status,
-                notes=a.notes,
-                petName=a.pet_name,
-                ownerName=a.owner_name,
-                createdAt=a.created_at.isoformat() if a.created_at else None
-            )
-            for a in appointments
-        ]
+        return TimedORJSONResponse(select_appointments(db, AppointmentDB.pet_id == pet_id, fields=names))
     finally:
         db.close()
 
 
 @app.get("/api/appointments/vet/{vet_id}", response_model=List[AppointmentResponse])
-async def get_appointments_by_vet(vet_id: int):
+async def get_appointments_by_vet(
+    vet_id: int,
+    fields: str = Query(None, description="Comma-separated fields to return")
+):
     """Get all appointments for a specific vet."""
+    names = parse_fields(fields)
     db = SessionLocal()
     try:
-        appointments = db.query(AppointmentDB).filter(AppointmentDB.vet_id == vet_id).order_by(AppointmentDB.date, AppointmentDB.time).all()
-        return [
-            AppointmentResponse(
-                id=a.id,
-                petId=a.pet_id,
-                vetId=a.vet_id,
-                date=a.date,
-                time=a.time,
-                endTime=a.end_time,
-                appointmentType=a.appointment_type,
-                status=a.status,
-                notes=a.notes,
-                petName=a.pet_name,
-                ownerName=a.owner_name,
-                createdAt=a.created_at.isoformat() if a.created_at else None
-            )
-            for a in appointments
-        ]
+        return TimedORJSONResponse(select_appointments(
+            db, AppointmentDB.vet_id == vet_id,
+            order_by=(AppointmentDB.date, AppointmentDB.time), fields=names
+        ))
     finally:
         db.close()
 
 
 @app.get("/api/appointments/date/{appointment_date}", response_model=List[AppointmentResponse])
-async def get_appointments_by_date(appointment_date: str):
+async def get_appointments_by_date(
+    appointment_date: str,
+    fields: str = Query(None, description="Comma-separated fields to return")
+):
     """Get all appointments for a specific date."""
+    names = parse_fields(fields)
     db = SessionLocal()
     try:
-        appointments = db.query(AppointmentDB).filter(AppointmentDB.date == appointment_date).order_by(AppointmentDB.time).all()
-        return [
-            AppointmentResponse(
-                id=a.id,
-                petId=a.pet_id,
-                vetId=a.vet_id,
-                date=a.date,
-                time=a.time,
-                endTime=a.end_time,
-                appointmentType=a.appointment_type,
-                status=a.status,
-                notes=a.notes,
-                petName=a.pet_name,
-                ownerName=a.owner_name,
-                createdAt=a.created_at.isoformat() if a.created_at else None
+        return TimedORJSONResponse(select_appointments(
+            db, AppointmentDB.date == appointment_date, order_by=(AppointmentDB.time,), fields=names
+        ))
+    finally:
+        db.close()
+
+
+# ═══════════════════════════════════════════════════════════════
+# SERIES ENDPOINTS
+# ═══════════════════════════════════════════════════════════════
+
+def get_series(db, series_id: int) -> AppointmentSeriesDB:
+    series = db.query(AppointmentSeriesDB).filter(AppointmentSeriesDB.id == series_id).first()
+    if not series:
+        raise HTTPException(status_code=404, detail="Series not found")
+    return series
+
+
+def get_occurrence_exception(db, series: AppointmentSeriesDB, occurrence_date: str) -> Optional[SeriesExceptionDB]:
+    """The exception recorded for an occurrence (None if it is as scheduled); 404 if there is no such occurrence."""
+    if not series_recurrence(series).occurs_on(parse_day(occurrence_date)):
+        raise HTTPException(status_code=404, detail="Series has no occurrence on that date")
+    return db.query(SeriesExceptionDB).filter(
+        SeriesExceptionDB.series_id == series.id,
+        SeriesExceptionDB.original_date == occurrence_date
+    ).first()
+
+
+@app.post("/api/appointments/series", response_model=AppointmentSeriesResponse, status_code=201)
+async def create_appointment_series(series: AppointmentSeriesCreate):
+    """Create a recurring appointment series (RRULE-style) as a single row."""
+    start = parse_day(series.start_date)
+    try:
+        recurrence = Recurrence(series.rrule, start)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rrule: {e}")
+    
+    db = SessionLocal()
+    try:
+        # Every occurrence must be free, against appointments and other series
+        last = recurrence.last.isoformat()
+        booked = day_bookings(db, [series.vet_id], start.isoformat(), last)
+        for day in recurrence.between(start, recurrence.last):
+            if series.time in booked.get((series.vet_id, day.isoformat()), {}):
+                raise HTTPException(status_code=409, detail=f"Time slot already booked on {day.isoformat()}")
+        
+        db_series = AppointmentSeriesDB(
+            pet_id=series.pet_id,
+            vet_id=series.vet_id,
+            rrule=series.rrule.strip().upper(),
+            start_date=start.isoformat(),
+            end_date=last,
+            time=series.time,
+            end_time=series.end_time or calculate_end_time(series.time, 30),
+            appointment_type=series.appointment_type,
+            status=series.status or "SCHEDULED",
+            notes=series.notes,
+            pet_name=series.pet_name,
+            owner_name=series.owner_name
+        )
+        db.add(db_series)
+        db.commit()
+        db.refresh(db_series)
+        publish_slot_changes(db, series_slots(db, db_series))
+        logger.info(f"Created series {db_series.id}: {recurrence.count} occurrences from {db_series.start_date}")
+        return series_response(db, db_series)
+    finally:
+        db.close()
+
+
+@app.get("/api/appointments/series/{series_id}", response_model=AppointmentSeriesResponse)
+async def get_appointment_series(series_id: int):
+    """Get a series with its skipped and moved occurrences."""
+    db = SessionLocal()
+    try:
+        return series_response(db, get_series(db, series_id))
+    finally:
+        db.close()
+
+
+@app.get("/api/appointments/series/{series_id}/occurrences")
+async def get_series_occurrences(
+    series_id: int,
+    from_date: str = Query(None, alias="from", description="First date (YYYY-MM-DD), default the series start"),
+    to_date: str = Query(None, alias="to", description="Last date (YYYY-MM-DD), default the series end")
+):
+    """
+    Occurrences of a series in a date window, as the calendar books them.
+    The default window also reaches occurrences moved outside the series dates.
+    """
+    db = SessionLocal()
+    try:
+        series = get_series(db, series_id)
+        moved_first, moved_last = db.execute(
+            select(func.min(SeriesExceptionDB.new_date), func.max(SeriesExceptionDB.new_date)).where(
+                SeriesExceptionDB.series_id == series_id
             )
-            for a in appointments
+        ).one()
+        first = parse_day(from_date).isoformat() if from_date else min(series.start_date, moved_first or series.start_date)
+        last = parse_day(to_date).isoformat() if to_date else max(series.end_date, moved_last or series.end_date)
+        occurrences = [
+            booking
+            for day in day_bookings(db, [series.vet_id], first, last).values()
+            for booking in day.values()
+            if isinstance(booking, Occurrence) and booking.series_id == series_id
         ]
+        occurrences.sort(key=lambda occurrence: (occurrence.date, occurrence.time))
+        return TimedORJSONResponse([occurrence_view(occurrence) for occurrence in occurrences])
+    finally:
+        db.close()
+
+
+@app.put("/api/appointments/series/{series_id}/occurrences/{occurrence_date}")
+async def move_series_occurrence(series_id: int, occurrence_date: str, move: OccurrenceMove):
+    """Move one occurrence to another date and/or time (also restores a skipped one)."""
+    db = SessionLocal()
+    try:
+        series = get_series(db, series_id)
+        exception = get_occurrence_exception(db, series, occurrence_date)
+        if exception is None:
+            previous = (occurrence_date, series.time)
+        else:
+            previous = (exception.new_date, exception.new_time)
+        
+        new_date = parse_day(move.date).isoformat() if move.date else (previous[0] or occurrence_date)
+        new_time = move.time or previous[1] or series.time
+        taken = slot_booking(db, series.vet_id, new_date, new_time)
+        if taken is not None and not (
+            isinstance(taken, Occurrence) and taken.series_id == series_id and taken.original_date == occurrence_date
+        ):
+            raise HTTPException(status_code=409, detail="Time slot already booked")
+        
+        if (new_date, new_time) == (occurrence_date, series.time) and not move.end_time:
+            # Back where the series puts it: no exception needed
+            if exception is not None:
+                db.delete(exception)
+        else:
+            if exception is None:
+                exception = SeriesExceptionDB(series_id=series_id, original_date=occurrence_date)
+                db.add(exception)
+            exception.new_date = new_date
+            exception.new_time = new_time
+            exception.new_end_time = move.end_time or (
+                series.end_time if new_time == series.time else calculate_end_time(new_time, 30)
+            )
+        db.commit()
+        publish_slot_changes(db, {
+            (series.vet_id, previous[0], previous[1]), (series.vet_id, new_date, new_time)
+        } if previous[0] else {(series.vet_id, new_date, new_time)})
+        return series_response(db, series)
+    finally:
+        db.close()
+
+
+@app.delete("/api/appointments/series/{series_id}/occurrences/{occurrence_date}")
+async def skip_series_occurrence(series_id: int, occurrence_date: str):
+    """Skip one occurrence of a series."""
+    db = SessionLocal()
+    try:
+        series = get_series(db, series_id)
+        exception = get_occurrence_exception(db, series, occurrence_date)
+        if exception is None:
+            previous = (occurrence_date, series.time)
+            db.add(SeriesExceptionDB(series_id=series_id, original_date=occurrence_date))
+        else:
+            previous = (exception.new_date, exception.new_time)
+            exception.new_date = exception.new_time = exception.new_end_time = None
+        db.commit()
+        if previous[0]:
+            publish_slot_changes(db, {(series.vet_id, previous[0], previous[1])})
+        return series_response(db, series)
+    finally:
+        db.close()
+
+
+@app.delete("/api/appointments/series/{series_id}")
+async def delete_appointment_series(series_id: int):
+    """Delete a series and all its occurrences."""
+    db = SessionLocal()
+    try:
+        series = get_series(db, series_id)
+        changed = series_slots(db, series)
+        db.query(SeriesExceptionDB).filter(SeriesExceptionDB.series_id == series_id).delete()
+        db.delete(series)
+        db.commit()
+        publish_slot_changes(db, changed)
+        return {"success": True, "message": "Series deleted successfully"}
     finally:
         db.close()
 
@@ -606,32 +1723,34 @@ async def get_vet_calendar(
 ):
     """
     Get calendar view for a specific vet showing available and booked slots.
+    Concurrent identical requests share one computation.
     """
+    # Default start date is today
+    if not start_date:
+        start_date = date.today().isoformat()
+    
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    covered = {(vet_id, (start + timedelta(days=i)).isoformat()) for i in range(days)}
+    return await calendar_flights.do(
+        "calendar", ("calendar", vet_id, start_date, days), covered,
+        lambda: build_vet_calendar(vet_id, start_date, start, days)
+    )
+
+
+def build_vet_calendar(vet_id: int, start_date: str, start: date, days: int) -> dict:
+    """Calendar view of a vet's slots over days from start."""
     db = SessionLocal()
     try:
-        # Default start date is today
-        if not start_date:
-            start_date = date.today().isoformat()
-        
-        start = datetime.strptime(start_date, "%Y-%m-%d").date()
-        
-        # Default working hours (should come from vet settings in production)
-        working_start = "09:00"
-        working_end = "17:00"
-        slot_duration = 30
-        working_days = ["MON", "TUE", "WED", "THU", "FRI"]
-        
-        day_names = ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"]
-        
+        booked = day_bookings(db, [vet_id], start.isoformat(), (start + timedelta(days=days - 1)).isoformat())
         calendar_days = []
         
         for i in range(days):
             current_date = start + timedelta(days=i)
-            day_of_week = day_names[current_date.weekday()]
+            day_of_week = DAY_NAMES[current_date.weekday()]
             date_str = current_date.isoformat()
             
             # Check if it's a working day
-            if day_of_week not in working_days:
+            if day_of_week not in WORKING_DAYS:
                 calendar_days.append(CalendarDay(
                     date=date_str,
                     dayOfWeek=day_of_week,
@@ -643,40 +1762,13 @@ async def get_vet_calendar(
                 continue
             
             # Generate all time slots for the day
-            all_slots = generate_time_slots(working_start, working_end, slot_duration)
-            
-            # Get booked appointments for this vet on this date
-            booked_appointments = db.query(AppointmentDB).filter(
-                AppointmentDB.vet_id == vet_id,
-                AppointmentDB.date == date_str,
-                AppointmentDB.status != "CANCELLED"
-            ).all()
+            all_slots = generate_time_slots(WORKING_START, WORKING_END, SLOT_DURATION)
             
-            # Create a set of booked times
-            booked_times = {appt.time: appt for appt in booked_appointments}
+            # Appointments and series occurrences booked on this date
+            booked_times = booked.get((vet_id, date_str), {})
             
             # Build slots with availability info
-            slots = []
-            for slot in all_slots:
-                if slot["time"] in booked_times:
-                    appt = booked_times[slot["time"]]
-                    slots.append(TimeSlot(
-                        time=slot["time"],
-                        endTime=appt.end_time or slot["endTime"],
-                        available=False,
-                        appointmentId=appt.id,
-                        petName=appt.pet_name,
-                        appointmentType=appt.appointment_type
-                    ))
-                else:
-                    slots.append(TimeSlot(
-                        time=slot["time"],
-                        endTime=slot["endTime"],
-                        available=True,
-                        appointmentId=None,
-                        petName=None,
-                        appointmentType=None
-                    ))
+            slots = [slot_view(slot, booked_times.get(slot["time"])) for slot in all_slots]
             
             booked_count = len([s for s in slots if not s.available])
             
@@ -699,30 +1791,82 @@ async def get_vet_calendar(
         db.close()
 
 
+@app.get("/api/calendar/stream")
+async def stream_vet_calendar(
+    request: Request,
+    vet_id: int = Query(..., description="Vet ID"),
+    from_date: str = Query(None, alias="from", description="First date (YYYY-MM-DD), default today"),
+    to_date: str = Query(None, alias="to", description="Last date (YYYY-MM-DD), default a week on")
+):
+    """
+    Server-sent events for a vet's calendar. The first event, "calendar",
+    is the /api/calendar/vet view of the range; each "slots" event then
+    carries the slots of one date that a create, update or delete changed.
+    A "resync" event means the client fell behind and should reconnect.
+    Comment lines keep idle connections open.
+    """
+    try:
+        start = datetime.strptime(from_date, "%Y-%m-%d").date() if from_date else date.today()
+        end = datetime.strptime(to_date, "%Y-%m-%d").date() if to_date else start + timedelta(days=6)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    days = (end - start).days + 1
+    if not 1 <= days <= MAX_STREAM_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must cover 1 to {MAX_STREAM_DAYS} days")
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+    
+    async def events():
+        # Subscribe before reading the calendar so no change falls in between
+        queue = calendar_hub.subscribe(vet_id, dates)
+        try:
+            calendar = await get_vet_calendar(vet_id, start_date=start.isoformat(), days=days)
+            yield sse_message("calendar", calendar)
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), CALENDAR_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    yield sse_message("resync", {"vetId": vet_id})
+                    return
+                yield message
+        finally:
+            calendar_hub.unsubscribe(queue, vet_id, dates)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/calendar/available-slots")
 async def get_available_slots(
     vet_id: int = Query(..., description="Vet ID"),
     date: str = Query(..., description="Date (YYYY-MM-DD)")
 ):
-    """Get available time slots for a specific vet on a specific date."""
+    """
+    Get available time slots for a specific vet on a specific date.
+    Concurrent identical requests share one computation.
+    """
+    return await calendar_flights.do(
+        "available-slots", ("available-slots", vet_id, date), {(vet_id, date)},
+        lambda: build_available_slots(vet_id, date)
+    )
+
+
+def build_available_slots(vet_id: int, date: str) -> dict:
+    """Open slots of a vet on a date."""
     db = SessionLocal()
     try:
-        # Default working hours
-        working_start = "09:00"
-        working_end = "17:00"
-        slot_duration = 30
-        
         # Generate all time slots
-        all_slots = generate_time_slots(working_start, working_end, slot_duration)
+        all_slots = generate_time_slots(WORKING_START, WORKING_END, SLOT_DURATION)
         
-        # Get booked appointments
-        booked_appointments = db.query(AppointmentDB).filter(
-            AppointmentDB.vet_id == vet_id,
-            AppointmentDB.date == date,
-            AppointmentDB.status != "CANCELLED"
-        ).all()
-        
-        booked_times = {appt.time for appt in booked_appointments}
+        # Appointments and series occurrences booked that day
+        booked_times = day_bookings(db, [vet_id], date, date).get((vet_id, date), {})
         
         # Filter to only available slots
         available_slots = [
@@ -756,19 +1900,14 @@ async def search_available_appointments(
         vet_ids = [1, 2, 3, 4, 5, 6] if not vet_id else [vet_id]
         
         results = []
+        booked = day_bookings(db, vet_ids, search_date, search_date)
         
         for vid in vet_ids:
-            # Get booked appointments
-            booked = db.query(AppointmentDB).filter(
-                AppointmentDB.vet_id == vid,
-                AppointmentDB.date == search_date,
-                AppointmentDB.status != "CANCELLED"
-            ).all()
-            
-            booked_times = {appt.time for appt in booked}
+            # Appointments and series occurrences booked that day
+            booked_times = booked.get((vid, search_date), {})
             
             # Generate available slots
-            all_slots = generate_time_slots("09:00", "17:00", 30)
+            all_slots = generate_time_slots(WORKING_START, WORKING_END, SLOT_DURATION)
             available = [s for s in all_slots if s["time"] not in booked_times]
             
             if available:
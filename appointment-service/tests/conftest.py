@@ -0,0 +1,21 @@
+import os
+import sys
+import tempfile
+
+# Point the service at a throwaway database before it is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/appointments.db"
+os.environ["LOAD_SAMPLE_DATA"] = "false"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    """The app over an empty schema; the lifespan (Kafka, seeding) is not run."""
+    main.Base.metadata.drop_all(bind=main.engine)
+    main.Base.metadata.create_all(bind=main.engine)
+    return TestClient(main.app)
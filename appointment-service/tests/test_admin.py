@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+import main
+
+HEADERS = {"Authorization": "Bearer secret"}
+
+
+@pytest.fixture
+def admin(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    yield client
+    main.set_request_spans(False)
+
+
+def test_admin_routes_are_hidden_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "")
+    assert client.get("/admin/spans", headers={"Authorization": "Bearer "}).status_code == 404
+    assert client.get("/admin/profile?seconds=0.01").status_code == 404
+
+
+def test_admin_routes_need_the_bearer_token(admin):
+    assert admin.get("/admin/spans").status_code == 401
+    assert admin.get("/admin/spans", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert admin.get("/admin/spans", headers=HEADERS).json() == {"enabled": False}
+
+
+def test_profile_returns_collapsed_stacks_of_busy_threads(admin):
+    stop = threading.Event()
+    busy = threading.Thread(target=stop.wait, name="busy-thread")
+    busy.start()
+    try:
+        response = admin.get("/admin/profile?seconds=0.05&hz=200", headers=HEADERS)
+    finally:
+        stop.set()
+        busy.join()
+
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    busy_stacks = [line for line in lines if line.startswith("busy-thread;")]
+    assert busy_stacks and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert "wait (threading.py:" in busy_stacks[0]
+    assert admin.get("/admin/profile?seconds=120", headers=HEADERS).status_code == 422
+
+
+def test_spans_time_the_database_and_serialization(admin):
+    assert admin.post("/admin/spans", json={"enabled": True}, headers=HEADERS).json() == {"enabled": True}
+
+    timing = admin.get("/api/appointments").headers["server-timing"]
+
+    phases = [part.split(";")[0] for part in timing.split(", ")]
+    assert phases[-1] == "total" and {"db", "serialize"} <= set(phases)
+    admin.post("/admin/spans", json={"enabled": False}, headers=HEADERS)
+    assert "server-timing" not in admin.get("/api/appointments").headers
+    assert not main.event.contains(main.engine, "before_cursor_execute", main._statement_started)
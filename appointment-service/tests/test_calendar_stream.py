@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import main
+
+MONDAY = "2025-03-03"
+
+
+def parse_event(message):
+    event, data = message.rstrip("\n").split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+def booking(**changes):
+    return main.AppointmentCreate(**{
+        "petId": 1, "vetId": 1, "date": MONDAY, "time": "10:00", "appointmentType": "CHECKUP", "petName": "Max",
+        **changes
+    })
+
+
+def test_hub_delivers_only_to_watchers_and_unsubscribes():
+    async def scenario():
+        hub = main.CalendarHub()
+        monday = hub.subscribe(1, [MONDAY])
+        both = hub.subscribe(1, [MONDAY, "2025-03-04"])
+        assert hub.subscriber_count() == 2
+
+        hub.publish(1, MONDAY, "a")
+        hub.publish(1, "2025-03-04", "b")
+        hub.publish(2, MONDAY, "c")
+        assert [monday.get_nowait()] == ["a"] and monday.empty()
+        assert [both.get_nowait(), both.get_nowait()] == ["a", "b"]
+
+        hub.unsubscribe(monday, 1, [MONDAY])
+        hub.unsubscribe(both, 1, [MONDAY, "2025-03-04"])
+        assert hub.watchers == {} and not hub.is_watched(1, MONDAY)
+
+    asyncio.run(scenario())
+
+
+def test_a_subscriber_that_falls_behind_is_told_to_resync(monkeypatch):
+    monkeypatch.setattr(main, "CALENDAR_STREAM_BACKLOG", 2)
+
+    async def scenario():
+        hub = main.CalendarHub()
+        queue = hub.subscribe(1, [MONDAY])
+        for message in ("a", "b", "c"):
+            hub.publish(1, MONDAY, message)
+        assert queue.get_nowait() is None and queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_writes_push_the_changed_slots_of_watched_days(client):
+    async def scenario():
+        queue = main.calendar_hub.subscribe(1, [MONDAY])
+        try:
+            created = await main.create_appointment(booking())
+            event, data = parse_event(queue.get_nowait())
+            assert event == "slots"
+            assert data["vetId"] == 1 and data["date"] == MONDAY
+            assert [(slot["time"], slot["available"], slot["appointmentId"]) for slot in data["slots"]] == \
+                [("10:00", False, created.id)]
+
+            await main.update_appointment(created.id, main.AppointmentUpdate(time="11:00"))
+            _, data = parse_event(queue.get_nowait())
+            assert [(slot["time"], slot["available"]) for slot in data["slots"]] == [("10:00", True), ("11:00", False)]
+
+            await main.delete_appointment(created.id)
+            _, data = parse_event(queue.get_nowait())
+            assert [(slot["time"], slot["available"]) for slot in data["slots"]] == [("11:00", True)]
+
+            await main.create_appointment(booking(vetId=2))
+            assert queue.empty()
+        finally:
+            main.calendar_hub.unsubscribe(queue, 1, [MONDAY])
+
+    asyncio.run(scenario())
+
+
+def test_stream_opens_with_the_calendar_then_follows_changes(client):
+    class Connected:
+        async def is_disconnected(self):
+            return False
+
+    async def scenario():
+        response = await main.stream_vet_calendar(Connected(), vet_id=1, from_date=MONDAY, to_date=MONDAY)
+        events = response.body_iterator
+        event, calendar = parse_event(await events.__anext__())
+        assert event == "calendar"
+        assert all(slot["available"] for day in calendar["days"] for slot in day["slots"])
+
+        created = await main.create_appointment(booking())
+        event, data = parse_event(await events.__anext__())
+        assert event == "slots" and data["slots"][0]["appointmentId"] == created.id
+
+        await events.aclose()
+        assert not main.calendar_hub.is_watched(1, MONDAY)
+
+    asyncio.run(scenario())
+
+
+def test_stream_rejects_bad_ranges(client):
+    assert client.get("/api/calendar/stream?vet_id=1&from=03/03/2025").status_code == 400
+    assert client.get(f"/api/calendar/stream?vet_id=1&from={MONDAY}&to=2025-03-01").status_code == 400
+    assert client.get(f"/api/calendar/stream?vet_id=1&from={MONDAY}&to=2025-06-01").status_code == 400
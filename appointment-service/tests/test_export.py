@@ -0,0 +1,61 @@
+import io
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import main
+
+APPOINTMENTS = [
+    {"petId": 1, "vetId": 1, "date": "2025-03-03", "time": "09:00", "appointmentType": "CHECKUP", "petName": "Max"},
+    {"petId": 2, "vetId": 2, "date": "2025-03-04", "time": "10:00", "appointmentType": "DENTAL", "notes": "✓"},
+    {"petId": 3, "vetId": 1, "date": "2025-03-05", "time": "11:00", "appointmentType": "SURGERY"},
+]
+
+
+@pytest.fixture
+def created(client):
+    return [client.post("/api/appointments", json=appointment).json() for appointment in APPOINTMENTS]
+
+
+def read_arrow(response):
+    return pa.ipc.open_stream(io.BytesIO(response.content)).read_all()
+
+
+def test_arrow_export_has_typed_columns_for_every_row(client, created):
+    response = client.get("/api/appointments/export")
+
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = read_arrow(response)
+    assert table.schema == main.export_schema(pa, list(main.APPOINTMENT_FIELDS))
+    rows = table.to_pylist()
+    for row, appointment in zip(rows, created):
+        assert row["createdAt"] == datetime.fromisoformat(appointment["createdAt"])
+        assert {**row, "createdAt": appointment["createdAt"]} == appointment
+    assert len(rows) == 3
+
+
+def test_parquet_export_selects_fields_and_dates(client, created):
+    response = client.get("/api/appointments/export?format=parquet&from=2025-03-04&to=2025-03-05&fields=id,notes")
+
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column_names == ["id", "notes"]
+    assert table.to_pylist() == [{"id": created[1]["id"], "notes": "✓"}, {"id": created[2]["id"], "notes": None}]
+
+
+def test_rows_are_streamed_in_batches(client, created, monkeypatch):
+    monkeypatch.setattr(main, "EXPORT_BATCH_ROWS", 2)
+
+    batches = list(pa.ipc.open_stream(io.BytesIO(client.get("/api/appointments/export?fields=id").content)))
+
+    assert [batch.num_rows for batch in batches] == [2, 1]
+
+
+def test_an_empty_export_is_a_valid_stream(client):
+    assert read_arrow(client.get("/api/appointments/export")).num_rows == 0
+
+
+@pytest.mark.parametrize("query", ["format=csv", "from=2025-3-x", "fields=id,price"])
+def test_bad_parameters_are_rejected(client, query):
+    assert client.get(f"/api/appointments/export?{query}").status_code == 400
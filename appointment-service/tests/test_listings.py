@@ -0,0 +1,45 @@
+import main
+
+APPOINTMENTS = [
+    {"petId": 1, "vetId": 1, "date": "2025-03-04", "time": "09:00", "appointmentType": "CHECKUP", "petName": "Max"},
+    {"petId": 2, "vetId": 1, "date": "2025-03-03", "time": "14:00", "appointmentType": "DENTAL",
+     "notes": "Ünïcode ✓", "ownerName": "Ann Lee"},
+    {"petId": 1, "vetId": 2, "date": "2025-03-03", "time": "10:00", "appointmentType": "SURGERY"},
+]
+
+
+def create_all(client):
+    return [client.post("/api/appointments", json=appointment).json() for appointment in APPOINTMENTS]
+
+
+def test_listings_match_the_response_model(client):
+    created = create_all(client)
+
+    listed = client.get("/api/appointments").json()
+
+    assert listed == created
+    assert list(listed[0]) == list(main.AppointmentResponse.model_fields)
+    assert client.get(f"/api/appointments/{created[1]['id']}").json() == created[1]
+
+
+def test_filtered_listings_keep_their_order(client):
+    created = create_all(client)
+
+    assert client.get("/api/appointments/vet/1").json() == [created[1], created[0]]
+    assert client.get("/api/appointments/pet/1").json() == [created[0], created[2]]
+    assert client.get("/api/appointments/date/2025-03-03").json() == [created[2], created[1]]
+
+
+def test_fields_selects_sparse_columns(client):
+    created = create_all(client)
+
+    listed = client.get("/api/appointments/vet/1?fields=id, time ,petName").json()
+
+    assert listed == [{"id": created[1]["id"], "time": "14:00", "petName": None},
+                      {"id": created[0]["id"], "time": "09:00", "petName": "Max"}]
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.get("/api/appointments?fields=id,price")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: price"
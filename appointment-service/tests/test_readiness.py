@@ -0,0 +1,84 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+class NoWait(threading.Event):
+    """Stop event whose retry delays are skipped."""
+
+    def wait(self, timeout=None):
+        return self.is_set()
+
+
+def test_health_is_up_before_the_service_is_ready(client, monkeypatch):
+    monkeypatch.setitem(main.readiness, "accepting", False)
+
+    assert client.get("/health").json() == {"status": "UP", "service": "appointment-service"}
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["reason"] == "not accepting traffic"
+
+
+def test_ready_once_started_without_waiting_for_kafka(monkeypatch):
+    monkeypatch.setattr(main, "connect_kafka", lambda: False)
+    for key, value in main.readiness.items():
+        monkeypatch.setitem(main.readiness, key, value)
+
+    with TestClient(main.app) as started:
+        response = started.get("/ready")
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": "READY", "service": "appointment-service",
+            "accepting": True, "kafka": "connecting", "sample_data": "disabled"
+        }
+    assert not main.readiness["accepting"]
+    assert main.background_stop.is_set()
+
+
+def test_ready_reports_an_unreachable_database(client, monkeypatch):
+    monkeypatch.setitem(main.readiness, "accepting", True)
+
+    def broken():
+        raise OSError("database is down")
+    monkeypatch.setattr(main.engine, "connect", broken)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["reason"] == "database: database is down"
+
+
+def test_background_tasks_retry_until_they_succeed(monkeypatch):
+    monkeypatch.setattr(main, "background_stop", NoWait())
+    attempts = []
+    done = threading.Event()
+
+    def flaky():
+        attempts.append(len(attempts))
+        if len(attempts) < 3:
+            return False
+        done.set()
+        return True
+
+    main.retry_in_background("flaky", flaky)
+    assert done.wait(5)
+    assert len(attempts) == 3
+
+
+def test_background_retries_stop_at_shutdown(monkeypatch):
+    stop = NoWait()
+    stop.set()
+    monkeypatch.setattr(main, "background_stop", stop)
+    attempted = threading.Event()
+
+    def failing():
+        attempted.set()
+        return False
+
+    main.retry_in_background("failing", failing)
+    assert attempted.wait(5)
+    threads = [thread for thread in threading.enumerate() if thread.name == "failing"]
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
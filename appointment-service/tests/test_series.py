@@ -0,0 +1,108 @@
+from datetime import date
+
+import pytest
+
+import main
+
+SERIES = {
+    "petId": 1, "vetId": 1, "startDate": "2025-03-03", "time": "10:00",
+    "rrule": "FREQ=WEEKLY;COUNT=4", "appointmentType": "CHECKUP", "petName": "Max"
+}
+
+
+def test_weekly_recurrence_expands_only_the_window():
+    recurrence = main.Recurrence("RRULE:FREQ=WEEKLY;INTERVAL=2;COUNT=5", date(2025, 3, 3))
+    assert recurrence.last == date(2025, 4, 28)
+    assert recurrence.between(date(2025, 3, 10), date(2025, 4, 1)) == [date(2025, 3, 17), date(2025, 3, 31)]
+    assert recurrence.occurs_on(date(2025, 3, 31))
+    assert not recurrence.occurs_on(date(2025, 3, 24))
+
+
+def test_until_and_monthly_recurrence():
+    recurrence = main.Recurrence("FREQ=MONTHLY;UNTIL=20250615", date(2025, 1, 15))
+    assert recurrence.count == 6
+    assert recurrence.between(date(2025, 11, 1), date(2026, 1, 31)) == []
+
+
+@pytest.mark.parametrize("rule", [
+    "FREQ=YEARLY;COUNT=2", "FREQ=DAILY", "FREQ=DAILY;COUNT=2;UNTIL=20250101", "FREQ=DAILY;BYDAY=MO;COUNT=2",
+    "FREQ=DAILY;COUNT=0", "FREQ=DAILY;UNTIL=20250302", f"FREQ=DAILY;COUNT={main.MAX_SERIES_OCCURRENCES + 1}", "FREQ=DAILY;INTERVAL=0;COUNT=2",
+])
+def test_unsupported_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        main.Recurrence(rule, date(2025, 3, 3))
+
+
+def test_monthly_series_must_start_by_the_28th():
+    with pytest.raises(ValueError):
+        main.Recurrence("FREQ=MONTHLY;COUNT=3", date(2025, 1, 31))
+
+
+def test_series_occurrences_default_to_the_series_dates(client):
+    series = client.post("/api/appointments/series", json=SERIES).json()
+    occurrences = client.get(f"/api/appointments/series/{series['id']}/occurrences").json()
+    assert [occurrence["date"] for occurrence in occurrences] == ["2025-03-03", "2025-03-10", "2025-03-17", "2025-03-24"]
+
+
+def test_occurrences_moved_past_the_series_dates_are_listed(client):
+    series = client.post("/api/appointments/series", json=SERIES).json()
+    moves = {"2025-03-24": "2025-04-07", "2025-03-03": "2025-02-24"}
+    for original, new in moves.items():
+        response = client.put(f"/api/appointments/series/{series['id']}/occurrences/{original}", json={"date": new})
+        assert response.status_code == 200
+    occurrences = client.get(f"/api/appointments/series/{series['id']}/occurrences").json()
+    assert [(occurrence["originalDate"], occurrence["date"]) for occurrence in occurrences] == [
+        ("2025-03-03", "2025-02-24"),
+        ("2025-03-10", "2025-03-10"),
+        ("2025-03-17", "2025-03-17"),
+        ("2025-03-24", "2025-04-07"),
+    ]
+    assert all(occurrence["moved"] for occurrence in (occurrences[0], occurrences[3]))
+
+
+def test_series_conflicts_with_a_booked_occurrence(client):
+    client.post("/api/appointments/series", json=SERIES)
+    response = client.post("/api/appointments/series", json={**SERIES, "startDate": "2025-03-17", "rrule": "FREQ=DAILY;COUNT=2"})
+    assert response.status_code == 409
+
+
+def booked(client, day):
+    calendar = client.get(f"/api/calendar/vet/1?start_date={day}&days=1").json()
+    return {slot["time"]: slot["seriesId"] for slot in calendar["days"][0]["slots"] if not slot["available"]}
+
+
+def test_calendar_books_occurrences_like_appointments(client):
+    series = client.post("/api/appointments/series", json=SERIES).json()
+    assert booked(client, "2025-03-10") == {"10:00": series["id"]}
+    assert booked(client, "2025-03-11") == {}
+
+    response = client.post("/api/appointments", json={
+        "petId": 2, "vetId": 1, "date": "2025-03-10", "time": "10:00", "appointmentType": "DENTAL"
+    })
+    assert response.status_code == 409
+
+
+def test_skipped_and_moved_occurrences_free_and_book_slots(client):
+    series_id = client.post("/api/appointments/series", json=SERIES).json()["id"]
+    client.delete(f"/api/appointments/series/{series_id}/occurrences/2025-03-10")
+    client.put(f"/api/appointments/series/{series_id}/occurrences/2025-03-17", json={"date": "2025-03-18", "time": "14:00"})
+
+    assert booked(client, "2025-03-10") == {}
+    assert booked(client, "2025-03-17") == {}
+    assert booked(client, "2025-03-18") == {"14:00": series_id}
+    slots = client.get("/api/calendar/available-slots?vet_id=1&date=2025-03-18").json()["availableSlots"]
+    assert "14:00" not in [slot["time"] for slot in slots]
+
+    # Moving it back where the series puts it drops the exception
+    client.put(f"/api/appointments/series/{series_id}/occurrences/2025-03-17", json={"date": "2025-03-17", "time": "10:00"})
+    exceptions = client.get(f"/api/appointments/series/{series_id}").json()["exceptions"]
+    assert [exception["originalDate"] for exception in exceptions] == ["2025-03-10"]
+
+
+def test_deleting_a_series_frees_every_occurrence(client):
+    series_id = client.post("/api/appointments/series", json=SERIES).json()["id"]
+    client.put(f"/api/appointments/series/{series_id}/occurrences/2025-03-24", json={"date": "2025-04-07"})
+
+    assert client.delete(f"/api/appointments/series/{series_id}").status_code == 200
+    assert booked(client, "2025-03-03") == {} and booked(client, "2025-04-07") == {}
+    assert client.get(f"/api/appointments/series/{series_id}").status_code == 404
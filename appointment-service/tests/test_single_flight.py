@@ -0,0 +1,146 @@
+import asyncio
+import threading
+
+import pytest
+from prometheus_client import REGISTRY
+
+import main
+
+DAY = (1, "2025-03-03")
+
+
+class Computation:
+    """compute() for a flight: blocks until released, counting its calls."""
+
+    def __init__(self, result="result"):
+        self.result = result
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+async def started(computation):
+    assert await asyncio.to_thread(computation.started.wait, 5)
+
+
+def coalesced(endpoint, outcome):
+    return REGISTRY.get_sample_value(
+        "appointment_coalesced_requests_total", {"endpoint": endpoint, "outcome": outcome}
+    ) or 0
+
+
+def test_concurrent_identical_calls_share_one_computation():
+    async def scenario():
+        flights = main.SingleFlight()
+        computation = Computation()
+        joined = coalesced("test", "joined")
+        waiters = [asyncio.ensure_future(flights.do("test", ("k",), {DAY}, computation)) for _ in range(5)]
+        await started(computation)
+        computation.release.set()
+
+        assert await asyncio.gather(*waiters) == ["result"] * 5
+        assert computation.calls == 1
+        assert coalesced("test", "joined") == joined + 4
+        assert flights._flights == {}
+
+    asyncio.run(scenario())
+
+
+def test_different_keys_and_later_calls_compute_again():
+    async def scenario():
+        flights = main.SingleFlight()
+        computation = Computation()
+        computation.release.set()
+        await flights.do("test", ("a",), {DAY}, computation)
+        await asyncio.gather(flights.do("test", ("a",), {DAY}, computation), flights.do("test", ("b",), {DAY}, computation))
+        assert computation.calls == 3
+
+    asyncio.run(scenario())
+
+
+def test_forget_detaches_flights_that_read_a_changed_day():
+    async def scenario():
+        flights = main.SingleFlight()
+        before_write = Computation("before")
+        early = asyncio.ensure_future(flights.do("test", ("k",), {DAY}, before_write))
+        await started(before_write)
+
+        flights.forget({(2, DAY[1])})
+        assert ("k",) in flights._flights
+        flights.forget({DAY})
+
+        after_write = Computation("after")
+        after_write.release.set()
+        assert await flights.do("test", ("k",), {DAY}, after_write) == "after"
+        before_write.release.set()
+        assert await early == "before"
+        assert flights._flights == {}
+
+    asyncio.run(scenario())
+
+
+def test_a_cancelled_waiter_leaves_the_flight_running_for_the_others():
+    async def scenario():
+        flights = main.SingleFlight()
+        computation = Computation()
+        leaving = asyncio.ensure_future(flights.do("test", ("k",), {DAY}, computation))
+        staying = asyncio.ensure_future(flights.do("test", ("k",), {DAY}, computation))
+        await started(computation)
+        leaving.cancel()
+        computation.release.set()
+
+        assert await staying == "result"
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    async def scenario():
+        flights = main.SingleFlight()
+        computation = Computation(ValueError("boom"))
+        waiters = [asyncio.ensure_future(flights.do("test", ("k",), {DAY}, computation)) for _ in range(3)]
+        await started(computation)
+        computation.release.set()
+
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flights._flights == {}
+
+    asyncio.run(scenario())
+
+
+def test_a_booking_during_a_slots_read_is_seen_by_later_requests(client, monkeypatch):
+    build = main.build_available_slots
+    computation = Computation()
+
+    def slow_build(vet_id, day):
+        result = build(vet_id, day)
+        computation()
+        return result
+    monkeypatch.setattr(main, "build_available_slots", slow_build)
+    monkeypatch.setattr(main, "calendar_flights", main.SingleFlight())
+
+    async def scenario():
+        early = asyncio.ensure_future(main.get_available_slots(vet_id=1, date="2025-03-03"))
+        await started(computation)
+        await main.create_appointment(main.AppointmentCreate(
+            petId=1, vetId=1, date="2025-03-03", time="10:00", appointmentType="CHECKUP"
+        ))
+        computation.release.set()
+        later = await main.get_available_slots(vet_id=1, date="2025-03-03")
+        return await early, later
+
+    early, later = asyncio.run(scenario())
+    assert computation.calls == 2
+    assert "10:00" in [slot["time"] for slot in early["availableSlots"]]
+    assert "10:00" not in [slot["time"] for slot in later["availableSlots"]]
@@ -162,6 +162,66 @@ app.get('/api/appointments', async (req, res) => {
   }
 });
 
+app.post('/api/appointments/series', async (req, res) => {
+  try {
+    const response = await axios.post(`${APPOINTMENT_SERVICE_URL}/api/appointments/series`, req.body);
+    res.json(response.data);
+  } catch (error) {
+    console.error('Error creating appointment series:', error.message);
+    res.status(500).json({ error: 'Failed to create appointment series', details: error.message });
+  }
+});
+
+app.get('/api/appointments/series/:id', async (req, res) => {
+  try {
+    const response = await axios.get(`${APPOINTMENT_SERVICE_URL}/api/appointments/series/${req.params.id}`);
+    res.json(response.data);
+  } catch (error) {
+    console.error('Error fetching appointment series:', error.message);
+    res.status(500).json({ error: 'Failed to fetch appointment series', details: error.message });
+  }
+});
+
+app.get('/api/appointments/series/:id/occurrences', async (req, res) => {
+  try {
+    const response = await axios.get(`${APPOINTMENT_SERVICE_URL}/api/appointments/series/${req.params.id}/occurrences`, { params: req.query });
+    res.json(response.data);
+  } catch (error) {
+    console.error('Error fetching series occurrences:', error.message);
+    res.status(500).json({ error: 'Failed to fetch series occurrences', details: error.message });
+  }
+});
+
+app.put('/api/appointments/series/:id/occurrences/:date', async (req, res) => {
+  try {
+    const response = await axios.put(`${APPOINTMENT_SERVICE_URL}/api/appointments/series/${req.params.id}/occurrences/${req.params.date}`, req.body);
+    res.json(response.data);
+  } catch (error) {
+    console.error('Error moving series occurrence:', error.message);
+    res.status(500).json({ error: 'Failed to move series occurrence', details: error.message });
+  }
+});
+
+app.delete('/api/appointments/series/:id/occurrences/:date', async (req, res) => {
+  try {
+    const response = await axios.delete(`${APPOINTMENT_SERVICE_URL}/api/appointments/series/${req.params.id}/occurrences/${req.params.date}`);
+    res.json(response.data);
+  } catch (error) {
+    console.error('Error skipping series occurrence:', error.message);
+    res.status(500).json({ error: 'Failed to skip series occurrence', details: error.message });
+  }
+});
+
+app.delete('/api/appointments/series/:id', async (req, res) => {
+  try {
+    const response = await axios.delete(`${APPOINTMENT_SERVICE_URL}/api/appointments/series/${req.params.id}`);
+    res.json(response.data);
+  } catch (error) {
+    console.error('Error deleting appointment series:', error.message);
+    res.status(500).json({ error: 'Failed to delete appointment series', details: error.message });
+  }
+});
+
 app.get('/api/appointments/vet/:vetId', async (req, res) => {
   try {
     const response = await axios.get(`${APPOINTMENT_SERVICE_URL}/api/appointments/vet/${req.params.vetId}`);
@@ -231,6 +291,28 @@ app.get('/api/calendar/vet/:vetId', async (req, res) => {
   }
 });
 
+app.get('/api/calendar/stream', async (req, res) => {
+  const controller = new AbortController();
+  req.on('close', () => controller.abort());
+  try {
+    const response = await axios.get(`${APPOINTMENT_SERVICE_URL}/api/calendar/stream`, {
+      params: req.query,
+      responseType: 'stream',
+      signal: controller.signal
+    });
+    res.writeHead(200, {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      'Connection': 'keep-alive'
+    });
+    response.data.pipe(res);
+  } catch (error) {
+    if (controller.signal.aborted) return;
+    console.error('Error streaming calendar:', error.message);
+    res.status(500).json({ error: 'Failed to stream calendar', details: error.message });
+  }
+});
+
 app.get('/api/calendar/available-slots', async (req, res) => {
   try {
     const response = await axios.get(`${APPOINTMENT_SERVICE_URL}/api/calendar/available-slots`, { params: req.query });
@@ -255,6 +337,16 @@ app.get('/api/search', async (req, res) => {
   }
 });
 
+app.post('/api/search/batch', async (req, res) => {
+  try {
+    const response = await axios.post(`${SEARCH_SERVICE_URL}/api/search/batch`, req.body);
+    res.json(response.data);
+  } catch (error) {
+    console.error('Error running batch search:', error.message);
+    res.status(500).json({ error: 'Failed to run batch search', details: error.message });
+  }
+});
+
 app.post('/api/search/reindex', async (req, res) => {
   try {
     const response = await axios.post(`${SEARCH_SERVICE_URL}/api/search/reindex`);
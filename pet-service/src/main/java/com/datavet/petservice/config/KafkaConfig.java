@@ -1,6 +1,7 @@
 package com.datavet.petservice.config;
 
 import org.apache.kafka.clients.admin.NewTopic;
+import org.apache.kafka.common.config.TopicConfig;
 import org.springframework.context.annotation.Bean;
 import org.springframework.context.annotation.Configuration;
 import org.springframework.kafka.config.TopicBuilder;
@@ -24,6 +25,15 @@ public class KafkaConfig {
                 .build();
     }
 
+    @Bean
+    public NewTopic petStateTopic() {
+        return TopicBuilder.name("pet-state")
+                .partitions(3)
+                .replicas(1)
+                .config(TopicConfig.CLEANUP_POLICY_CONFIG, TopicConfig.CLEANUP_POLICY_COMPACT)
+                .build();
+    }
+
     @Bean
     public NewTopic notificationsTopic() {
         return TopicBuilder.name("notifications")
@@ -17,6 +17,8 @@ public class PetEventProducer {
 
     private static final Logger logger = LoggerFactory.getLogger(PetEventProducer.class);
     private static final String TOPIC = "pet-events";
+    // Compacted: latest full state per pet id, null once deleted
+    private static final String STATE_TOPIC = "pet-state";
 
     private final KafkaTemplate<String, Object> kafkaTemplate;
 
@@ -26,16 +28,19 @@ public class PetEventProducer {
     }
 
     public void sendPetCreatedEvent(Pet pet) {
+        sendState(pet.getId().toString(), createState(pet));
         Map<String, Object> event = createEvent("PET_CREATED", pet);
         sendEvent(event, pet.getId().toString());
     }
 
     public void sendPetUpdatedEvent(Pet pet) {
+        sendState(pet.getId().toString(), createState(pet));
         Map<String, Object> event = createEvent("PET_UPDATED", pet);
         sendEvent(event, pet.getId().toString());
     }
 
     public void sendPetDeletedEvent(Long petId) {
+        sendState(petId.toString(), null);
         Map<String, Object> event = new HashMap<>();
         event.put("eventType", "PET_DELETED");
         event.put("petId", petId);
@@ -54,6 +59,35 @@ public class PetEventProducer {
         return event;
     }
 
+    // Same shape as the REST representation of a pet
+    private Map<String, Object> createState(Pet pet) {
+        Map<String, Object> state = new HashMap<>();
+        state.put("id", pet.getId());
+        state.put("name", pet.getName());
+        state.put("species", pet.getSpecies().toString());
+        state.put("breed", pet.getBreed());
+        state.put("age", pet.getAge());
+        state.put("ownerName", pet.getOwnerName());
+        state.put("ownerEmail", pet.getOwnerEmail());
+        state.put("ownerPhone", pet.getOwnerPhone());
+        state.put("medicalNotes", pet.getMedicalNotes());
+        state.put("createdAt", pet.getCreatedAt() != null ? pet.getCreatedAt().toString() : null);
+        state.put("updatedAt", pet.getUpdatedAt() != null ? pet.getUpdatedAt().toString() : null);
+        return state;
+    }
+
+    private void sendState(String key, Map<String, Object> state) {
+        try {
+            kafkaTemplate.send(STATE_TOPIC, key, state).whenComplete((result, ex) -> {
+                if (ex != null) {
+                    logger.warn("Unable to publish state of pet {}: {}", key, ex.getMessage());
+                }
+            });
+        } catch (Exception e) {
+            logger.warn("Kafka not available, skipping state of pet {}", key);
+        }
+    }
+
     private void sendEvent(Map<String, Object> event, String key) {
         try {
             CompletableFuture<SendResult<String, Object>> future = 
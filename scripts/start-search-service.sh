@@ -7,4 +7,9 @@ if [ -d "venv" ]; then
     source venv/bin/activate 2>/dev/null || source venv/Scripts/activate 2>/dev/null
 fi
 
+# SEARCH_PREFORK=1 serves with several gunicorn workers sharing one mmap'd index
+if [ "${SEARCH_PREFORK:-0}" = "1" ]; then
+    exec gunicorn -c gunicorn.conf.py app:app
+fi
+
 python3 app.py
@@ -89,7 +89,7 @@ echo -e "${GREEN}✅ Appointment Service started (PID: $APPT_PID)${NC}"
 # Wait for Appointment Service to be ready
 echo "   Waiting for Appointment Service to be ready..."
 for i in {1..30}; do
-    if curl -s http://localhost:8081/health > /dev/null 2>&1; then
+    if curl -sf http://localhost:8081/ready > /dev/null 2>&1; then
         echo -e "   ${GREEN}Appointment Service is ready!${NC}"
         break
     fi
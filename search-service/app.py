@@ -6,14 +6,42 @@
 """
 
 import os
+import re
+import sys
+import bisect
+import codecs
+import functools
+import hmac
 import json
+import math
+import mmap
+import time
+import heapq
+import struct
+import resource
+import shutil
+import signal
 import logging
 import threading
-from datetime import datetime
+import weakref
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from itertools import chain, islice
+from datetime import datetime, timezone
 
-from flask import Flask, request, jsonify
+from flask import (
+    Flask, Response, copy_current_request_context, g, has_request_context, request, jsonify
+)
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Gauge, Histogram,
+    generate_latest, multiprocess
+)
 import requests
+from werkzeug.datastructures import MultiDict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,100 +52,2301 @@ SOLR_URL = os.getenv("SOLR_URL", "http://localhost:8983/solr")
 PET_SERVICE_URL = os.getenv("PET_SERVICE_URL", "http://localhost:8080")
 APPOINTMENT_SERVICE_URL = os.getenv("APPOINTMENT_SERVICE_URL", "http://localhost:8081")
 KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+SNAPSHOT_PATH = os.getenv("SEARCH_SNAPSHOT_PATH", "data/search-index.snapshot")
+SNAPSHOT_INTERVAL_SECONDS = int(os.getenv("SEARCH_SNAPSHOT_INTERVAL", "60"))
+
+SHARED_INDEX_DIR = os.getenv("SEARCH_SHARED_INDEX_DIR", "data/shared")
+SHARED_INDEX_POLL_SECONDS = float(os.getenv("SEARCH_SHARED_INDEX_POLL", "0.5"))
+
+EVENT_TOPICS = ("pet-events", "appointment-events")
+
+# Full syncs: "http" pulls every entity from the owning services; "kafka"
+# replays the compacted entity-state topics the services publish, falling
+# back to HTTP per entity type whose topic is empty. Entities saved before
+# the topics existed must be backfilled before switching to "kafka".
+SEARCH_BOOTSTRAP = os.getenv("SEARCH_BOOTSTRAP", "http")
+STATE_TOPICS = {"pets": "pet-state", "appointments": "appointment-state"}
+STATE_POLL_RECORDS = int(os.getenv("SEARCH_STATE_POLL_RECORDS", "10000"))
+
+# Full syncs stream the entity payload; Solr documents are flushed in
+# chunks of this many, and response bytes are read this many at a time.
+SYNC_CHUNK_SIZE = int(os.getenv("SEARCH_SYNC_CHUNK_SIZE", "5000"))
+SYNC_READ_BYTES = 64 * 1024
 
 # Flask app
 app = Flask(__name__)
 CORS(app)
 
-# Solr collections
-PETS_COLLECTION = "datavet_pets"
-APPOINTMENTS_COLLECTION = "datavet_appointments"
+# Solr collections
+PETS_COLLECTION = "datavet_pets"
+APPOINTMENTS_COLLECTION = "datavet_appointments"
+
+# Result paging defaults for every search endpoint
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 1000
+
+# Completions returned by /api/search/suggest
+DEFAULT_SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 25
+
+# Queries per /api/search/batch request
+MAX_BATCH_QUERIES = int(os.getenv("SEARCH_MAX_BATCH_QUERIES", "20"))
+
+# Query result cache capacity (entries)
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+
+# Changed documents kept in an index's delta segment before it is compacted
+SEARCH_DELTA_MAX = int(os.getenv("SEARCH_DELTA_MAX", "2048"))
+
+# Value bitmaps (filters, facets) cached per field and segment; each is segment-sized
+VALUE_BITMAP_CACHE = int(os.getenv("SEARCH_VALUE_BITMAP_CACHE", "64"))
+
+solr_available = False
+
+# Solr request timeouts and circuit breaker thresholds
+SOLR_QUERY_TIMEOUT = float(os.getenv("SOLR_QUERY_TIMEOUT", "5"))
+SOLR_UPDATE_TIMEOUT = float(os.getenv("SOLR_UPDATE_TIMEOUT", "60"))
+SOLR_BREAKER_WINDOW = int(os.getenv("SOLR_BREAKER_WINDOW", "20"))
+SOLR_BREAKER_MIN_CALLS = int(os.getenv("SOLR_BREAKER_MIN_CALLS", "5"))
+SOLR_BREAKER_ERROR_RATE = float(os.getenv("SOLR_BREAKER_ERROR_RATE", "0.5"))
+SOLR_BREAKER_SLOW_SECONDS = float(os.getenv("SOLR_BREAKER_SLOW_SECONDS", "1.0"))
+SOLR_BREAKER_PROBE_SECONDS = float(os.getenv("SOLR_BREAKER_PROBE_SECONDS", "10"))
+
+# Concurrent Solr queries (and pooled connections) per process for batch searches
+SOLR_POOL_SIZE = int(os.getenv("SOLR_POOL_SIZE", "8"))
+
+# Stored Solr fields -> API response keys. Search results are hydrated
+# straight from these, so the Solr path never touches the in-memory index.
+PET_SOLR_FIELDS = (
+    ("entity_id", "id"),
+    ("name", "name"),
+    ("species", "species"),
+    ("breed", "breed"),
+    ("age", "age"),
+    ("owner", "ownerName"),
+    ("owner_email", "ownerEmail"),
+    ("owner_phone", "ownerPhone"),
+    ("medical_notes", "medicalNotes"),
+    ("created_at", "createdAt"),
+    ("updated_at", "updatedAt"),
+)
+
+APPOINTMENT_SOLR_FIELDS = (
+    ("entity_id", "id"),
+    ("pet_id", "petId"),
+    ("vet_id", "vetId"),
+    ("date", "date"),
+    ("time", "time"),
+    ("end_time", "endTime"),
+    ("appointment_type", "appointmentType"),
+    ("status", "status"),
+    ("notes", "notes"),
+    ("pet_name", "petName"),
+    ("owner_name", "ownerName"),
+    ("created_at", "createdAt"),
+)
+
+# Managed schema applied by create_solr_collection(). Free-text fields are
+# edge n-gram analyzed for prefix matches and searchable_text is n-gram
+# analyzed for infix matches, so queries never need leading wildcards.
+SOLR_FIELD_TYPES = [
+    {
+        "name": "text_edge",
+        "class": "solr.TextField",
+        "positionIncrementGap": "100",
+        "indexAnalyzer": {
+            "tokenizer": {"class": "solr.StandardTokenizerFactory"},
+            "filters": [
+                {"class": "solr.LowerCaseFilterFactory"},
+                {"class": "solr.ASCIIFoldingFilterFactory"},
+                {"class": "solr.EdgeNGramFilterFactory", "minGramSize": "1", "maxGramSize": "20"}
+            ]
+        },
+        "queryAnalyzer": {
+            "tokenizer": {"class": "solr.StandardTokenizerFactory"},
+            "filters": [
+                {"class": "solr.LowerCaseFilterFactory"},
+                {"class": "solr.ASCIIFoldingFilterFactory"}
+            ]
+        }
+    },
+    {
+        "name": "text_ngram",
+        "class": "solr.TextField",
+        "positionIncrementGap": "100",
+        "indexAnalyzer": {
+            "tokenizer": {"class": "solr.StandardTokenizerFactory"},
+            "filters": [
+                {"class": "solr.LowerCaseFilterFactory"},
+                {"class": "solr.ASCIIFoldingFilterFactory"},
+                {"class": "solr.NGramFilterFactory", "minGramSize": "2", "maxGramSize": "20"}
+            ]
+        },
+        "queryAnalyzer": {
+            "tokenizer": {"class": "solr.StandardTokenizerFactory"},
+            "filters": [
+                {"class": "solr.LowerCaseFilterFactory"},
+                {"class": "solr.ASCIIFoldingFilterFactory"}
+            ]
+        }
+    },
+]
+
+SOLR_SCHEMA_FIELDS = {
+    PETS_COLLECTION: [
+        {"name": "type", "type": "string", "stored": True},
+        {"name": "entity_id", "type": "plong", "stored": True},
+        {"name": "name", "type": "text_edge", "stored": True},
+        {"name": "species", "type": "string", "stored": True, "docValues": True},
+        {"name": "breed", "type": "text_edge", "stored": True},
+        {"name": "breed_facet", "type": "string", "stored": False, "docValues": True},
+        {"name": "age", "type": "pint", "stored": True},
+        {"name": "owner", "type": "text_edge", "stored": True},
+        {"name": "owner_email", "type": "string", "stored": True},
+        {"name": "owner_phone", "type": "string", "stored": True},
+        {"name": "medical_notes", "type": "text_general", "stored": True},
+        {"name": "created_at", "type": "string", "stored": True},
+        {"name": "updated_at", "type": "string", "stored": True},
+        {"name": "searchable_text", "type": "text_ngram", "stored": False},
+    ],
+    APPOINTMENTS_COLLECTION: [
+        {"name": "type", "type": "string", "stored": True},
+        {"name": "entity_id", "type": "plong", "stored": True},
+        {"name": "pet_id", "type": "plong", "stored": True},
+        {"name": "vet_id", "type": "plong", "stored": True, "docValues": True},
+        {"name": "date", "type": "string", "stored": True, "docValues": True},
+        {"name": "time", "type": "string", "stored": True},
+        {"name": "end_time", "type": "string", "stored": True},
+        {"name": "appointment_type", "type": "string", "stored": True, "docValues": True},
+        {"name": "status", "type": "string", "stored": True, "docValues": True},
+        {"name": "notes", "type": "text_edge", "stored": True},
+        {"name": "pet_name", "type": "text_edge", "stored": True},
+        {"name": "owner_name", "type": "text_edge", "stored": True},
+        {"name": "created_at", "type": "string", "stored": True},
+        {"name": "searchable_text", "type": "text_ngram", "stored": False},
+    ],
+}
+
+# edismax query fields and boosts per collection
+PETS_QUERY_FIELDS = "name^4 owner^3 breed^2 searchable_text"
+APPOINTMENTS_QUERY_FIELDS = "pet_name^3 owner_name^2 notes^2 searchable_text"
+
+# Filter query params -> (entity field, Solr field); facet counts are kept for these
+FACET_FIELDS = {
+    "pets": (("species", "species", "species"), ("breed", "breed", "breed_facet")),
+    "appointments": (
+        ("status", "status", "status"),
+        ("appointment_type", "appointmentType", "appointment_type"),
+    ),
+}
+
+# Range filters: <param>_from / <param>_to -> (entity field, Solr field)
+RANGE_FIELDS = {
+    "pets": (),
+    "appointments": (("date", "date", "date"),),
+}
+
+# In-memory BM25 fields and weights, mirroring the Solr boosts above
+PET_SEARCH_FIELDS = (("name", 4.0), ("ownerName", 3.0), ("breed", 2.0), ("species", 1.0))
+APPOINTMENT_SEARCH_FIELDS = (
+    ("petName", 3.0),
+    ("ownerName", 2.0),
+    ("notes", 2.0),
+    ("appointmentType", 1.0),
+    ("date", 1.0),
+)
+
+
+# ═══════════════════════════════════════════════════════════════
+# IN-MEMORY SEARCH ENGINE (fallback when Solr is not available)
+# ═══════════════════════════════════════════════════════════════
+
+# Dates and times stay single tokens so "2024-01" still matches "2024-01-15"
+_TOKEN_RE = re.compile(r"\w+(?:[-:.]\w+)*")
+
+
+def tokenize(text):
+    """Split text into lowercase search terms."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+# Name fields: matched approximately in fuzzy mode (front-desk misspellings)
+# and completed by /api/search/suggest
+FUZZY_FIELDS = frozenset(("name", "ownerName", "petName"))
+
+
+def trigrams(term):
+    """Padded character trigrams: "max" -> {"$ma", "max", "ax$"}."""
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bigrams(term):
+    """Padded character bigrams: "max" -> {"$m", "ma", "ax", "x$"}."""
+    padded = f"${term}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def fuzzy_max_distance(token):
+    """Edits tolerated for a query token; short tokens must match exactly."""
+    if len(token) <= 2:
+        return 0
+    return 1 if len(token) <= 5 else 2
+
+
+def edit_distance(a, b, limit):
+    """
+    Optimal string alignment distance (a swap of neighbours is one edit),
+    or limit + 1 as soon as it is certain to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            value = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1])
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before_previous[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class FuzzyVocabulary:
+    """
+    Trigram index over a segment's name terms. One edit changes at most
+    four trigrams (a swap of neighbours touches four), so a term within d
+    edits of a token shares all but 4d of its trigrams; only those
+    candidates get an edit-distance check. Tokens too short for that bound
+    use bigrams, of which one edit changes at most three.
+    """
+
+    def __init__(self, terms, postings):
+        self.terms = terms
+        self.postings = postings
+        self.grams = {}
+        self.short_grams = {}
+        self.lengths = {}
+        for term_id, term in enumerate(terms):
+            for gram in trigrams(term):
+                self.grams.setdefault(gram, []).append(term_id)
+            for gram in bigrams(term):
+                self.short_grams.setdefault(gram, []).append(term_id)
+            self.lengths.setdefault(len(term), []).append(term_id)
+
+    def candidates(self, token, max_distance):
+        """Ids of the terms that may be within max_distance edits of token."""
+        token_grams, grams = trigrams(token), self.grams
+        needed = len(token_grams) - 4 * max_distance
+        if needed <= 0:
+            token_grams, grams = bigrams(token), self.short_grams
+            needed = len(token_grams) - 3 * max_distance
+        if needed <= 0:
+            # Only tokens repeating one letter get here
+            return [
+                term_id
+                for length in range(len(token) - max_distance, len(token) + max_distance + 1)
+                for term_id in self.lengths.get(length, ())
+            ]
+        shared = {}
+        for gram in token_grams:
+            for term_id in grams.get(gram, ()):
+                shared[term_id] = shared.get(term_id, 0) + 1
+        return [term_id for term_id, count in shared.items() if count >= needed]
+
+    def matches(self, token, max_distance):
+        """{position: edit distance} for documents with a name term near token."""
+        distances = {}
+        for term_id in self.candidates(token, max_distance):
+            distance = edit_distance(token, self.terms[term_id], max_distance)
+            if distance > max_distance:
+                continue
+            for position in self.postings[term_id]:
+                if distance < distances.get(position, max_distance + 1):
+                    distances[position] = distance
+        return distances
+
+
+class PrefixVocabulary:
+    """
+    Sorted name terms with their document frequencies. A prefix is a
+    contiguous range found by bisect; the most frequent terms of wide ranges
+    (the first keystrokes) are computed once and cached.
+    """
+
+    WIDE_RANGE = 256
+
+    def __init__(self, terms, freqs):
+        self.terms = terms
+        self.freqs = freqs
+        self._top = {}
+
+    def frequency(self, term):
+        i = bisect.bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return self.freqs[i]
+        return 0
+
+    def top(self, prefix):
+        """
+        (terms starting with prefix as [(freq, term)] most frequent first,
+        complete) - wide ranges only keep their MAX_SUGGEST_LIMIT * 2 best.
+        """
+        cached = self._top.get(prefix)
+        if cached is not None:
+            return cached
+        lo = bisect.bisect_left(self.terms, prefix)
+        hi = bisect.bisect_left(self.terms, prefix[:-1] + chr(ord(prefix[-1]) + 1), lo)
+        hits = ((self.freqs[i], self.terms[i]) for i in range(lo, hi))
+        if hi - lo <= self.WIDE_RANGE:
+            return sorted(hits, key=lambda hit: (-hit[0], hit[1])), True
+        top = heapq.nsmallest(MAX_SUGGEST_LIMIT * 2, hits, key=lambda hit: (-hit[0], hit[1]))
+        self._top[prefix] = top, False
+        return top, False
+
+    def scan(self, prefix):
+        """Every (freq, term) starting with prefix."""
+        lo = bisect.bisect_left(self.terms, prefix)
+        hi = bisect.bisect_left(self.terms, prefix[:-1] + chr(ord(prefix[-1]) + 1), lo)
+        return [(self.freqs[i], self.terms[i]) for i in range(lo, hi)]
+
+
+# Fields with a value index, for exact filters, facet counts and date ranges
+FILTER_FIELDS = frozenset(("species", "breed", "status", "appointmentType", "date"))
+
+
+if hasattr(int, "bit_count"):
+    def popcount(bitmap):
+        return bitmap.bit_count()
+else:  # Python < 3.10
+    def popcount(bitmap):
+        return bin(bitmap).count("1")
+
+
+def positions_bitmap(positions, size):
+    """Bitmap (an int, bit n set for position n) of positions below size."""
+    data = bytearray((size + 7) // 8)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, "little")
+
+
+def iter_bits(bitmap):
+    """Set positions of a bitmap, ascending."""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for i, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield i * 8 + low.bit_length() - 1
+            byte ^= low
+
+
+class ValueIndex:
+    """
+    Positions of a segment grouped by one field's value, values sorted. An
+    exact filter is one group's bitmap; a range is a bisected run of groups.
+    Facets popcount each group's bitmap ANDed with the matched bitmap, but
+    probe the matched bits of groups too small to be worth a segment-wide
+    AND. Bitmaps are cached, the VALUE_BITMAP_CACHE most recently used.
+    """
+
+    # Groups up to size >> PROBE_SHIFT positions are probed, not ANDed
+    PROBE_SHIFT = 12
+
+    def __init__(self, values, starts, positions, size):
+        self.values = values
+        self.starts = starts
+        self.positions = positions
+        self.size = size
+        self._bitmaps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bitmap(self, value):
+        i = bisect.bisect_left(self.values, value)
+        if i == len(self.values) or self.values[i] != value:
+            return 0
+        return self._group_bitmap(i)
+
+    def _group_bitmap(self, i):
+        value = self.values[i]
+        with self._lock:
+            bitmap = self._bitmaps.get(value)
+            if bitmap is not None:
+                self._bitmaps.move_to_end(value)
+                return bitmap
+        bitmap = positions_bitmap(self.positions[self.starts[i]:self.starts[i + 1]], self.size)
+        if VALUE_BITMAP_CACHE > 0:
+            with self._lock:
+                self._bitmaps[value] = bitmap
+                while len(self._bitmaps) > VALUE_BITMAP_CACHE:
+                    self._bitmaps.popitem(last=False)
+        return bitmap
+
+    def counts(self, matched):
+        """[(value, count)] of the values with positions set in matched."""
+        probe_max = self.size >> self.PROBE_SHIFT
+        data = None
+        counts = []
+        for i, value in enumerate(self.values):
+            start, end = self.starts[i], self.starts[i + 1]
+            if end - start > probe_max:
+                count = popcount(self._group_bitmap(i) & matched)
+            else:
+                if data is None:
+                    data = matched.to_bytes((matched.bit_length() + 7) // 8, "little")
+                    limit = len(data) << 3
+                count = 0
+                for position in self.positions[start:end]:
+                    if position < limit and data[position >> 3] >> (position & 7) & 1:
+                        count += 1
+            if count:
+                counts.append((value, count))
+        return counts
+
+    def range_bitmap(self, low, high):
+        """Bitmap of values between low and high inclusive; None leaves an end open."""
+        lo = 0 if low is None else bisect.bisect_left(self.values, low)
+        hi = len(self.values) if high is None else bisect.bisect_right(self.values, high)
+        if lo >= hi:
+            return 0
+        return positions_bitmap(self.positions[self.starts[lo]:self.starts[hi]], self.size)
+
+
+def group_positions(groups):
+    """{value: [positions]} -> (sorted values, group starts, grouped positions)."""
+    values = sorted(groups)
+    starts = [0]
+    positions = []
+    for value in values:
+        positions.extend(groups[value])
+        starts.append(len(positions))
+    return values, starts, positions
+
+
+class CompactDocuments:
+    """
+    Append-only document sequence stored as tuples instead of dicts: each
+    row is (keys, *values) with the key tuple shared by every document of
+    the same shape, and FILTER_FIELDS strings interned. Documents are
+    rebuilt as dicts when read, as SnapshotDocuments decodes them.
+    """
+
+    __slots__ = ("_rows", "_shapes")
+
+    def __init__(self, documents=()):
+        self._rows = []
+        self._shapes = {}
+        for document in documents:
+            self.append(document)
+
+    def append(self, document):
+        keys = tuple(document)
+        shape = self._shapes.get(keys)
+        if shape is None:
+            interned = [i for i, key in enumerate(keys, 1) if key in FILTER_FIELDS]
+            shape = self._shapes[keys] = (keys, interned)
+        keys, interned = shape
+        row = [keys, *document.values()]
+        for i in interned:
+            if isinstance(row[i], str):
+                row[i] = sys.intern(row[i])
+        self._rows.append(tuple(row))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, position):
+        row = self._rows[position]
+        return dict(zip(row[0], islice(row, 1, None)))
+
+    def __iter__(self):
+        for row in self._rows:
+            yield dict(zip(row[0], islice(row, 1, None)))
+
+
+class IndexSegment:
+    """
+    Immutable inverted index over a fixed set of documents.
+
+    Each document's term frequencies are weighted per field, so a match in
+    a pet's name outranks the same match in its breed. Terms of FUZZY_FIELDS
+    also get their own postings for fuzzy matching, and FILTER_FIELDS
+    values are grouped for filters and facets. documents may be any
+    iterable; it is consumed once and kept as CompactDocuments.
+    """
+
+    def __init__(self, documents=(), fields=()):
+        self.documents = CompactDocuments()
+        self.by_id = {}
+        self.postings = {}
+        self.doc_lengths = []
+        fuzzy_postings = {}
+        value_groups = {}
+        for position, document in enumerate(documents):
+            self.documents.append(document)
+            self.by_id[document.get("id")] = position
+            for field in FILTER_FIELDS:
+                value = document.get(field)
+                if value is not None:
+                    value_groups.setdefault(field, {}).setdefault(str(value), []).append(position)
+            term_freqs = {}
+            length = 0.0
+            for field, weight in fields:
+                value = document.get(field)
+                if value is None:
+                    continue
+                for term in tokenize(str(value)):
+                    term_freqs[term] = term_freqs.get(term, 0.0) + weight
+                    length += weight
+                    if field in FUZZY_FIELDS:
+                        fuzzy_postings.setdefault(term, set()).add(position)
+            self.doc_lengths.append(length)
+            for term, freq in term_freqs.items():
+                self.postings.setdefault(term, {})[position] = freq
+        self.total_length = sum(self.doc_lengths)
+        self.fuzzy_terms = sorted(fuzzy_postings)
+        self.fuzzy_postings = [sorted(fuzzy_postings[term]) for term in self.fuzzy_terms]
+        self.value_groups = {field: group_positions(groups) for field, groups in value_groups.items()}
+        self._fuzzy = None
+        self._prefixes = None
+        self._value_indexes = {}
+
+    def value_index(self, field):
+        """ValueIndex of a FILTER_FIELDS field, or None if no document has it."""
+        index = self._value_indexes.get(field)
+        if index is None and field in self.value_groups:
+            index = self._value_indexes[field] = ValueIndex(*self.value_groups[field], len(self))
+        return index
+
+    @property
+    def fuzzy(self):
+        """Trigram index over the name terms, built on first use."""
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyVocabulary(self.fuzzy_terms, self.fuzzy_postings)
+        return self._fuzzy
+
+    @property
+    def prefixes(self):
+        """Name terms with document frequencies, for completions."""
+        if self._prefixes is None:
+            self._prefixes = PrefixVocabulary(self.fuzzy_terms, [len(p) for p in self.fuzzy_postings])
+        return self._prefixes
+
+    def __len__(self):
+        return len(self.documents)
+
+    def position_of(self, entity_id):
+        return self.by_id.get(entity_id)
+
+    def term_freqs(self, term):
+        """
+        {position: frequency} for documents with an indexed term containing
+        term; partial matches ("max" in "maxine") count for less.
+        """
+        freqs = {}
+        for indexed in self.postings:
+            if term not in indexed:
+                continue
+            discount = len(term) / len(indexed)
+            for position, freq in self.postings[indexed].items():
+                freq *= discount
+                if freq > freqs.get(position, 0.0):
+                    freqs[position] = freq
+        return freqs
+
+
+class SearchIndex:
+    """
+    Immutable BM25 index over one entity type.
+
+    A large base segment is shared between versions; recent changes live in
+    a small delta segment, and base documents they replace are tombstoned.
+    with_changes() therefore costs O(delta) and only folds everything back
+    into a new base once the delta outgrows SEARCH_DELTA_MAX. Query terms
+    match any indexed term containing them, like the old substring scan, and
+    every query term must match.
+
+    Name term frequencies for completions are the base segment's, corrected
+    by _name_counts ({term: live count - base count}), which with_changes()
+    carries forward per changed document.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, documents=(), fields=(), _base=None, _delta=None, _tombstones=frozenset(),
+                 _name_counts=None):
+        self.fields = fields
+        self.base = _base if _base is not None else IndexSegment(documents, fields)
+        self.delta = _delta if _delta is not None else IndexSegment((), fields)
+        self.tombstones = _tombstones
+        self._name_counts = _name_counts
+        self._dead_mask = None
+        # Base positions of tombstoned ids, so filtering never decodes documents
+        self._dead = frozenset(
+            position for position in map(self.base.position_of, self.tombstones)
+            if position is not None
+        )
+        self._size = len(self.base) - len(self._dead) + len(self.delta)
+        indexed = len(self.base) + len(self.delta)
+        total_length = self.base.total_length + self.delta.total_length
+        self.avg_length = total_length / indexed if total_length else 1.0
+
+    def __len__(self):
+        return self._size
+
+    def get(self, entity_id):
+        """The live document with this id, or None."""
+        position = self.delta.position_of(entity_id)
+        if position is not None:
+            return self.delta.documents[position]
+        if entity_id in self.tombstones:
+            return None
+        position = self.base.position_of(entity_id)
+        return self.base.documents[position] if position is not None else None
+
+    def documents(self):
+        """Iterate over every live document."""
+        for position in range(len(self.base)):
+            if position not in self._dead:
+                yield self.base.documents[position]
+        yield from self.delta.documents
+
+    def _document_at(self, position):
+        base_size = len(self.base)
+        if position < base_size:
+            return self.base.documents[position]
+        return self.delta.documents[position - base_size]
+
+    def _doc_length_at(self, position):
+        base_size = len(self.base)
+        if position < base_size:
+            return self.base.doc_lengths[position]
+        return self.delta.doc_lengths[position - base_size]
+
+    def _name_terms(self, document):
+        """Distinct name terms of a document, as IndexSegment indexes them."""
+        terms = set()
+        for field, _ in self.fields:
+            value = document.get(field)
+            if field in FUZZY_FIELDS and value is not None:
+                terms.update(tokenize(str(value)))
+        return terms
+
+    def name_counts(self):
+        """{term: live count - base count}; rebuilt from the delta if not carried over."""
+        if self._name_counts is None:
+            counts = {}
+            removed = [self.base.documents[position] for position in self._dead]
+            for sign, documents in ((1, self.delta.documents), (-1, removed)):
+                for document in documents:
+                    for term in self._name_terms(document):
+                        counts[term] = counts.get(term, 0) + sign
+            self._name_counts = counts
+        return self._name_counts
+
+    def with_changes(self, changes):
+        """New index with {id: document or None (delete)} applied."""
+        delta_documents = {document.get("id"): document for document in self.delta.documents}
+        name_counts = dict(self.name_counts())
+        for entity_id, document in changes.items():
+            previous = self.get(entity_id)
+            if previous is not None:
+                for term in self._name_terms(previous):
+                    name_counts[term] = name_counts.get(term, 0) - 1
+            if document is not None:
+                for term in self._name_terms(document):
+                    name_counts[term] = name_counts.get(term, 0) + 1
+            if document is None:
+                delta_documents.pop(entity_id, None)
+            else:
+                delta_documents[entity_id] = document
+        tombstones = self.tombstones | {
+            entity_id for entity_id in changes if self.base.position_of(entity_id) is not None
+        }
+        if len(delta_documents) + len(tombstones) > SEARCH_DELTA_MAX:
+            # Compact: fold the delta into a fresh base segment
+            documents = [
+                document for document in self.documents()
+                if document.get("id") not in delta_documents and document.get("id") not in changes
+            ]
+            documents.extend(delta_documents.values())
+            return SearchIndex(documents, self.fields)
+        return SearchIndex(
+            fields=self.fields,
+            _base=self.base,
+            _delta=IndexSegment(delta_documents.values(), self.fields),
+            _tombstones=frozenset(tombstones),
+            _name_counts={term: count for term, count in name_counts.items() if count}
+        )
+
+    def _term_freqs(self, term):
+        """{position: frequency} across both segments, minus tombstones."""
+        freqs = self.base.term_freqs(term)
+        if self._dead:
+            freqs = {
+                position: freq for position, freq in freqs.items()
+                if position not in self._dead
+            }
+        base_size = len(self.base)
+        for position, freq in self.delta.term_freqs(term).items():
+            freqs[base_size + position] = freq
+        return freqs
+
+    def _idf(self, doc_freq):
+        n = self._size
+        return math.log(1 + (n - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def match(self, query):
+        """Return {document position: BM25 score} for documents matching every term."""
+        scores = None
+        for term in set(tokenize(query)):
+            term_freqs = self._term_freqs(term)
+            if not term_freqs:
+                return {}
+            idf = self._idf(len(term_freqs))
+            term_scores = {}
+            for position, freq in term_freqs.items():
+                norm = self.K1 * (1 - self.B + self.B * self._doc_length_at(position) / self.avg_length)
+                term_scores[position] = idf * freq * (self.K1 + 1) / (freq + norm)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    position: score + term_scores[position]
+                    for position, score in scores.items()
+                    if position in term_scores
+                }
+            if not scores:
+                return {}
+        return scores or {}
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT, offset=0):
+        """Return (total hits, best-first page of documents)."""
+        total, page, _ = self.query(query, limit, offset)
+        return total, page
+
+    def suggest(self, prefix, limit=DEFAULT_SUGGEST_LIMIT):
+        """[(term, live document count)] for name terms starting with prefix, most common first."""
+        base = self.base.prefixes
+        ranked = lambda hit: (-hit[0], hit[1])
+        # Terms whose count changed since the base segment was built
+        changed = {
+            term: base.frequency(term) + count
+            for term, count in self.name_counts().items()
+            if term.startswith(prefix)
+        }
+        top, complete = base.top(prefix)
+        pool = [(count, term) for term, count in changed.items() if count > 0]
+        pool.extend(hit for hit in top if hit[1] not in changed)
+        best = heapq.nsmallest(limit, pool, key=ranked)
+        # Unchanged base terms beyond the cached top can't outrank its last entry
+        if not complete and top and (len(best) < limit or best[-1][0] <= top[-1][0]):
+            pool = [(count, term) for term, count in changed.items() if count > 0]
+            pool.extend(hit for hit in base.scan(prefix) if hit[1] not in changed)
+            best = heapq.nsmallest(limit, pool, key=ranked)
+        return [(term, count) for count, term in best]
+
+    def fuzzy_match(self, query):
+        """
+        {document position: total edit distance} for documents with a name
+        term near every query term.
+        """
+        distances = None
+        base_size = len(self.base)
+        for token in set(tokenize(query)):
+            max_distance = fuzzy_max_distance(token)
+            token_distances = self.base.fuzzy.matches(token, max_distance)
+            if self._dead:
+                token_distances = {
+                    position: distance for position, distance in token_distances.items()
+                    if position not in self._dead
+                }
+            for position, distance in self.delta.fuzzy.matches(token, max_distance).items():
+                token_distances[base_size + position] = distance
+            if distances is None:
+                distances = token_distances
+            else:
+                distances = {
+                    position: distance + token_distances[position]
+                    for position, distance in distances.items()
+                    if position in token_distances
+                }
+            if not distances:
+                return {}
+        return distances or {}
+
+    def fuzzy_search(self, query, limit=DEFAULT_SEARCH_LIMIT, offset=0):
+        """Return (total hits, page of documents, closest spelling first)."""
+        total, page, _ = self.query(query, limit, offset, fuzzy=True)
+        return total, page
+
+    def _dead_bitmap(self):
+        if self._dead_mask is None:
+            self._dead_mask = positions_bitmap(self._dead, len(self.base))
+        return self._dead_mask
+
+    def live_bitmap(self):
+        """Bitmap of every live document position."""
+        base_size = len(self.base)
+        live_base = ((1 << base_size) - 1) & ~self._dead_bitmap()
+        return live_base | (((1 << len(self.delta)) - 1) << base_size)
+
+    def _field_bitmap(self, field, bitmap_of):
+        """Combine a per-segment bitmap (bitmap_of(ValueIndex)) into index positions."""
+        base_index = self.base.value_index(field)
+        delta_index = self.delta.value_index(field)
+        base_bitmap = bitmap_of(base_index) & ~self._dead_bitmap() if base_index else 0
+        delta_bitmap = bitmap_of(delta_index) if delta_index else 0
+        return base_bitmap | (delta_bitmap << len(self.base))
+
+    def filter_bitmap(self, filters):
+        """
+        Bitmap of live documents passing every filter, or None without
+        filters. filters maps a field to a list of values (any may match)
+        or to an inclusive (low, high) range with None for an open end.
+        """
+        bitmap = None
+        for field, wanted in filters.items():
+            if isinstance(wanted, tuple):
+                low, high = wanted
+                field_bitmap = self._field_bitmap(field, lambda index: index.range_bitmap(low, high))
+            else:
+                field_bitmap = 0
+                for value in wanted:
+                    field_bitmap |= self._field_bitmap(field, lambda index: index.bitmap(value))
+            bitmap = field_bitmap if bitmap is None else bitmap & field_bitmap
+        return bitmap
+
+    def facet_counts(self, fields, matched):
+        """{field: [(value, count)]} over the documents of the matched bitmap, most common first."""
+        base_size = len(self.base)
+        # matched only holds live positions, so tombstones need no masking here
+        matched_delta = matched >> base_size
+        counts = {}
+        for field in fields:
+            field_counts = {}
+            for segment, segment_matched in ((self.base, matched), (self.delta, matched_delta)):
+                index = segment.value_index(field)
+                if index is None or not segment_matched:
+                    continue
+                for value, count in index.counts(segment_matched):
+                    field_counts[value] = field_counts.get(value, 0) + count
+            counts[field] = sorted(field_counts.items(), key=lambda item: (-item[1], item[0]))
+        return counts
+
+    def query(self, text, limit=DEFAULT_SEARCH_LIMIT, offset=0, fuzzy=False, filters=None, facets=()):
+        """
+        Return (total hits, page of documents, facet counts for the facets
+        fields). Text hits are ranked by BM25, or by edit distance if fuzzy;
+        without text every live document passing the filters matches, in
+        index order.
+        """
+        within = self.filter_bitmap(filters or {})
+        if text:
+            hits = self.fuzzy_match(text) if fuzzy else self.match(text)
+            if within is not None:
+                data = within.to_bytes((within.bit_length() + 7) // 8, "little")
+                hits = {
+                    position: value for position, value in hits.items()
+                    if position >> 3 < len(data) and data[position >> 3] >> (position & 7) & 1
+                }
+            # Heap selection keeps only offset + limit hits; ties keep index order
+            if fuzzy:
+                top = heapq.nsmallest(offset + limit, hits.items(), key=lambda hit: (hit[1], hit[0]))
+            else:
+                top = heapq.nsmallest(offset + limit, hits.items(), key=lambda hit: (-hit[1], hit[0]))
+            total = len(hits)
+            page = [self._document_at(position) for position, _ in top[offset:]]
+            matched = positions_bitmap(hits, len(self.base) + len(self.delta)) if facets else 0
+        else:
+            matched = within if within is not None else self.live_bitmap()
+            total = popcount(matched)
+            page = [self._document_at(position) for position in islice(iter_bits(matched), offset, offset + limit)]
+        return total, page, self.facet_counts(facets, matched) if facets else {}
+
+
+# Every snapshot still alive, for the stats endpoint
+_live_snapshots = weakref.WeakSet()
+
+
+class IndexSnapshot:
+    """
+    Immutable, consistent view of the whole in-memory index: both entity
+    indexes, the generation number and the Kafka offsets they reflect.
+
+    Writers build a new snapshot off to the side and publish it by
+    rebinding current_snapshot, a single atomic reference swap. Readers take
+    one reference per request and never lock or see partial state. Nothing
+    refers back to a snapshot, so its memory is freed by reference counting
+    as soon as the last request using it finishes.
+    """
+
+    def __init__(self, generation, pets, appointments, kafka_offsets=None):
+        self.generation = generation
+        self.pets = pets
+        self.appointments = appointments
+        # (topic, partition) -> next offset to consume; never mutated
+        self.kafka_offsets = dict(kafka_offsets or {})
+        _live_snapshots.add(self)
+
+    def index(self, kind):
+        return self.pets if kind == "pets" else self.appointments
+
+    def evolve(self, pets=None, appointments=None, kafka_offsets=None):
+        """Next-generation snapshot with the given parts replaced."""
+        offsets = self.kafka_offsets
+        if kafka_offsets:
+            offsets = {**offsets, **kafka_offsets}
+        return IndexSnapshot(
+            self.generation + 1,
+            pets if pets is not None else self.pets,
+            appointments if appointments is not None else self.appointments,
+            offsets
+        )
+
+
+current_snapshot = IndexSnapshot(
+    0,
+    SearchIndex(fields=PET_SEARCH_FIELDS),
+    SearchIndex(fields=APPOINTMENT_SEARCH_FIELDS)
+)
+
+
+def publish_snapshot(**changes):
+    """Swap in a new snapshot. Callers must hold index_write_lock."""
+    global current_snapshot
+    current_snapshot = current_snapshot.evolve(**changes)
+    observe_snapshot(current_snapshot)
+    return current_snapshot
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of normalized query -> results (ids for in-memory
+    hits, whole pages for Solr).
+
+    Entries are tagged with the generation of the snapshot they were
+    computed against, and only match lookups from that same generation.
+    Publishing a snapshot therefore invalidates every entry at once; stale
+    entries are dropped when next looked up or evicted.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None and entry[0] < generation:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, generation, value):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            # Never replace a result from a newer snapshot with an older one
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > generation:
+                return
+            self._entries[key] = (generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+query_cache = QueryCache(SEARCH_CACHE_SIZE)
+
+
+# ═══════════════════════════════════════════════════════════════
+# METRICS (Prometheus, served on /metrics)
+# ═══════════════════════════════════════════════════════════════
+#
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR is set and every process
+# (workers and the indexer) writes its samples there; /metrics aggregates.
+
+_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_SIZE_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "search_http_request_duration_seconds", "HTTP request latency by route",
+    ["route", "method", "status"], buckets=_LATENCY_BUCKETS
+)
+SEARCH_QUERY_SECONDS = Histogram(
+    "search_query_duration_seconds", "Search execution latency by route and backend",
+    ["route", "backend"], buckets=_LATENCY_BUCKETS
+)
+SEARCH_RESULTS = Histogram(
+    "search_query_results", "Documents returned per search",
+    ["route", "backend", "entity"], buckets=_SIZE_BUCKETS
+)
+SOLR_REQUEST_SECONDS = Histogram(
+    "search_solr_request_duration_seconds", "Solr request latency",
+    ["operation", "outcome"], buckets=_LATENCY_BUCKETS
+)
+SYNC_SECONDS = Histogram(
+    "search_index_sync_duration_seconds", "Full sync duration",
+    ["kind"], buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+SYNC_PAYLOAD_BYTES = Histogram(
+    "search_index_sync_payload_bytes", "Full sync response payload size",
+    ["kind"], buckets=tuple(1024 * 4 ** i for i in range(12))
+)
+EVENT_LAG_SECONDS = Histogram(
+    "search_index_event_lag_seconds", "Delay between an event's timestamp and it becoming searchable",
+    ["topic"], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+)
+INDEX_FRESHNESS_SECONDS = Gauge(
+    "search_index_freshness_seconds", "Event lag of the most recently applied event",
+    ["topic"], multiprocess_mode="livemostrecent"
+)
+INDEX_DOCUMENTS = Gauge(
+    "search_index_documents", "Documents in the in-memory index",
+    ["kind"], multiprocess_mode="livemostrecent"
+)
+SOLR_BREAKER_STATE = Gauge(
+    "search_solr_breaker_state", "Solr circuit breaker state (0 closed, 1 half open, 2 open)",
+    multiprocess_mode="livemax"
+)
+INDEX_GENERATION = Gauge(
+    "search_index_generation", "Published index generation",
+    multiprocess_mode="livemax"
+)
+SYNC_PEAK_RSS_BYTES = Gauge(
+    "search_index_sync_peak_rss_bytes", "Peak resident set size during the last full sync",
+    multiprocess_mode="livemax"
+)
+
+
+def _route_label():
+    if has_request_context() and request.url_rule is not None:
+        return request.url_rule.rule
+    return "internal"
+
+
+def observe_solr_request(operation, started, status):
+    """Time a finished Solr call (status None on a transport error) and feed the breaker."""
+    elapsed = time.perf_counter() - started
+    SOLR_REQUEST_SECONDS.labels(operation, "ok" if status == 200 else "error").observe(elapsed)
+    solr_breaker.record(operation, status, elapsed)
+    record_span("solr", elapsed)
+
+
+def observe_search(backend, started, results):
+    route = _route_label()
+    elapsed = time.perf_counter() - started
+    SEARCH_QUERY_SECONDS.labels(route, backend).observe(elapsed)
+    record_span("search", elapsed)
+    SEARCH_RESULTS.labels(route, backend, "pets").observe(len(results["pets"]))
+    SEARCH_RESULTS.labels(route, backend, "appointments").observe(len(results["appointments"]))
+
+
+def observe_snapshot(snapshot):
+    INDEX_GENERATION.set(snapshot.generation)
+    INDEX_DOCUMENTS.labels("pets").set(len(snapshot.pets))
+    INDEX_DOCUMENTS.labels("appointments").set(len(snapshot.appointments))
+
+
+def reset_peak_rss():
+    """Restart peak RSS tracking, where the kernel allows it (Linux)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_bytes():
+    """Peak resident set size since reset_peak_rss(), or since process start."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def event_timestamp(event):
+    """Event time in epoch seconds: pet events send epoch millis, appointments ISO UTC."""
+    value = event.get("timestamp")
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return None
+
+
+def observe_event_lag(records):
+    """Record freshness for events that just became searchable."""
+    now = time.time()
+    for topic, _, _, event in records:
+        timestamp = event_timestamp(event)
+        if timestamp is None:
+            continue
+        lag = max(0.0, now - timestamp)
+        EVENT_LAG_SECONDS.labels(topic).observe(lag)
+        INDEX_FRESHNESS_SECONDS.labels(topic).set(lag)
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+    if serving_mode == "worker":
+        # This hook runs first; follow the span switch before checking it
+        refresh_span_flag()
+    if request_spans_enabled:
+        request.environ[SPANS_ENVIRON_KEY] = []
+
+
+@app.after_request
+def _observe_request(response):
+    started = g.get("request_started")
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        HTTP_REQUEST_SECONDS.labels(_route_label(), request.method, str(response.status_code)).observe(elapsed)
+        spans = request.environ.get(SPANS_ENVIRON_KEY)
+        if spans is not None:
+            timing = server_timing(spans, elapsed)
+            response.headers["Server-Timing"] = timing
+            logger.info(f"⏱️ {request.method} {request.path} {response.status_code} {timing}")
+    return response
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics endpoint."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROFILING AND REQUEST SPANS (admin, opt-in)
+# ═══════════════════════════════════════════════════════════════
+#
+# /admin/* needs SEARCH_ADMIN_TOKEN (sent as "Authorization: Bearer
+# <token>") and answers 404 while it is unset. /admin/profile samples this
+# process's thread stacks for N seconds and returns collapsed stacks
+# (flamegraph.pl or speedscope input); under gunicorn that is the worker
+# that took the request. /admin/spans switches per-request phase timings
+# (solr, search, kafka, serialize) on or off in every process; they are
+# reported in a Server-Timing header and a log line. Switched off, each
+# hook is one check.
+
+ADMIN_TOKEN = os.getenv("SEARCH_ADMIN_TOKEN", "")
+MAX_PROFILE_SECONDS = 60
+MAX_PROFILE_HZ = 1000
+SPANS_ENVIRON_KEY = "search.spans"
+profile_lock = threading.Lock()
+
+request_spans_enabled = os.getenv("SEARCH_REQUEST_SPANS", "0") == "1"
+_span_flag_checked = 0.0
+
+
+def admin_only(view):
+    """Gate an /admin view on SEARCH_ADMIN_TOKEN."""
+    @functools.wraps(view)
+    def gated(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({"error": "Not found"}), 404
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {ADMIN_TOKEN}".encode()):
+            return jsonify({"error": "Unauthorized"}), 401
+        return view(*args, **kwargs)
+    return gated
+
+
+def sample_stacks(seconds, hz):
+    """
+    Wall-clock samples of every other thread's Python stack, as collapsed
+    stacks: "thread;outer;...;inner count" per line.
+    """
+    me = threading.get_ident()
+    counts = {}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            key = ";".join(reversed(stack))
+            counts[key] = counts.get(key, 0) + 1
+        time.sleep(1.0 / hz)
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
+
+def record_span(phase, seconds):
+    """
+    Add a timed phase to the current request's spans, if they are on.
+    Batch queries on the Solr pool share their request, so they count too.
+    """
+    if request_spans_enabled and has_request_context():
+        spans = request.environ.get(SPANS_ENVIRON_KEY)
+        if spans is not None:
+            spans.append((phase, seconds))
+
+
+def server_timing(spans, total):
+    """Server-Timing value: milliseconds and call count per phase, then the total."""
+    phases = {}
+    for phase, seconds in spans:
+        spent, calls = phases.get(phase, (0.0, 0))
+        phases[phase] = (spent + seconds, calls + 1)
+    parts = [f'{phase};dur={spent * 1000:.2f};desc="{calls}x"' for phase, (spent, calls) in phases.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def _span_flag_path():
+    return os.path.join(SHARED_INDEX_DIR, "request-spans")
+
+
+def set_request_spans(enabled):
+    """Switch request spans; prefork workers follow through a flag file next to the shared index."""
+    global request_spans_enabled
+    request_spans_enabled = enabled
+    if serving_mode == "worker":
+        if enabled:
+            open(_span_flag_path(), "w").close()
+        else:
+            try:
+                os.remove(_span_flag_path())
+            except FileNotFoundError:
+                pass
+
+
+def refresh_span_flag():
+    """Worker side: follow the span switch, at the shared index poll rate."""
+    global request_spans_enabled, _span_flag_checked
+    now = time.monotonic()
+    if now - _span_flag_checked >= SHARED_INDEX_POLL_SECONDS:
+        _span_flag_checked = now
+        request_spans_enabled = os.path.exists(_span_flag_path())
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """jsonify() with its encoding recorded as the serialize span."""
+    
+    def response(self, *args, **kwargs):
+        if not request_spans_enabled:
+            return super().response(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().response(*args, **kwargs)
+        finally:
+            record_span("serialize", time.perf_counter() - started)
+
+
+app.json = TimedJSONProvider(app)
+
+
+@app.route('/admin/profile')
+@admin_only
+def admin_profile():
+    """
+    Sample this process's stacks and return them collapsed, for a flamegraph.
+    Query params: seconds (default 10, max 60), hz (default 100, max 1000).
+    """
+    try:
+        seconds = float(request.args.get("seconds", 10))
+        hz = int(request.args.get("hz", 100))
+    except ValueError:
+        return jsonify({"error": "seconds and hz must be numbers"}), 400
+    if not (0 < seconds <= MAX_PROFILE_SECONDS and 1 <= hz <= MAX_PROFILE_HZ):
+        return jsonify({"error": f"seconds must be in (0, {MAX_PROFILE_SECONDS}] and hz in [1, {MAX_PROFILE_HZ}]"}), 400
+    if not profile_lock.acquire(blocking=False):
+        return jsonify({"error": "A profile is already running"}), 409
+    try:
+        stacks = sample_stacks(seconds, hz)
+    finally:
+        profile_lock.release()
+    return Response(stacks, mimetype="text/plain", headers={
+        "Content-Disposition": f'attachment; filename="search-service-{os.getpid()}.collapsed"'
+    })
+
+
+@app.route('/admin/spans', methods=['GET', 'POST'])
+@admin_only
+def admin_spans():
+    """GET: whether per-request spans are on. POST {"enabled": true|false}: switch them."""
+    if request.method == 'POST':
+        enabled = (request.get_json(silent=True) or {}).get("enabled")
+        if not isinstance(enabled, bool):
+            return jsonify({"error": 'Body must be {"enabled": true|false}'}), 400
+        set_request_spans(enabled)
+        logger.info(f"Request spans {'enabled' if enabled else 'disabled'}")
+    return jsonify({"enabled": request_spans_enabled})
+
+
+# ═══════════════════════════════════════════════════════════════
+# SOLR INTEGRATION
+# ═══════════════════════════════════════════════════════════════
+
+class SolrCircuitBreaker:
+    """
+    Guards every Solr request.
+
+    closed     requests flow; outcomes over the last SOLR_BREAKER_WINDOW calls
+               are tracked and the breaker opens once too many failed or
+               (for queries) ran slower than SOLR_BREAKER_SLOW_SECONDS
+    open       nothing is sent to Solr; searches use the in-memory index and
+               a background probe pings Solr every SOLR_BREAKER_PROBE_SECONDS
+    half_open  the probe got through and Solr is being re-indexed; writes
+               are allowed, reads stay in memory until the re-index is done
+    """
+
+    STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+    def __init__(self, window, error_rate, slow_seconds, min_calls):
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.min_calls = min_calls
+        self.state = "closed"
+        self.opened_at = None
+        self.last_error = None
+        self.trips = 0
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def allows_reads(self):
+        return self.state == "closed"
+
+    def allows_writes(self):
+        return self.state != "open"
+
+    def record(self, operation, status, elapsed):
+        """Record one Solr call; status is the HTTP status or None on a transport error."""
+        if status is None or status >= 500:
+            failure = f"{operation} failed" + (f" with HTTP {status}" if status else "")
+        elif operation == "select" and elapsed > self.slow_seconds:
+            failure = f"{operation} took {elapsed:.2f}s"
+        else:
+            failure = None
+        with self._lock:
+            if self.state == "open":
+                return
+            self._outcomes.append(failure is not None)
+            if failure is None:
+                return
+            self.last_error = failure
+            if self.state == "half_open":
+                self._open(f"{failure} while recovering")
+            elif (len(self._outcomes) >= self.min_calls
+                  and sum(self._outcomes) / len(self._outcomes) >= self.error_rate):
+                self._open(f"{sum(self._outcomes)}/{len(self._outcomes)} recent calls failed, last: {failure}")
+
+    def trip(self, reason):
+        with self._lock:
+            if self.state != "open":
+                self._open(reason)
+
+    def half_open(self):
+        with self._lock:
+            self._set_state("half_open")
+            self._outcomes.clear()
+
+    def close(self):
+        with self._lock:
+            recovered = self.state != "closed"
+            self._set_state("closed")
+            self.opened_at = None
+            if recovered:
+                self._outcomes.clear()
+        if recovered:
+            logger.info("✅ Solr circuit closed, searches go to Solr again")
+
+    def _open(self, reason):
+        self._set_state("open")
+        self._outcomes.clear()
+        self.opened_at = time.time()
+        self.trips += 1
+        self.last_error = reason
+        logger.warning(f"⚠️ Solr circuit opened, falling back to in-memory search: {reason}")
+
+    def _set_state(self, state):
+        global solr_available
+        self.state = state
+        solr_available = state == "closed"
+        SOLR_BREAKER_STATE.set(self.STATE_VALUES[state])
+        if serving_mode == "indexer":
+            publish_breaker_state(state)
+
+    def status(self):
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return {
+            "state": self.state,
+            "recent_calls": len(outcomes),
+            "recent_error_rate": round(sum(outcomes) / len(outcomes), 3) if outcomes else 0.0,
+            "trips": self.trips,
+            "opened_at": datetime.fromtimestamp(self.opened_at).isoformat() if self.opened_at else None,
+            "last_error": self.last_error
+        }
+
+
+solr_breaker = SolrCircuitBreaker(
+    SOLR_BREAKER_WINDOW, SOLR_BREAKER_ERROR_RATE, SOLR_BREAKER_SLOW_SECONDS, SOLR_BREAKER_MIN_CALLS
+)
+
+
+def ping_solr():
+    """True if Solr answers its admin endpoint."""
+    try:
+        return requests.get(f"{SOLR_URL}/admin/cores", timeout=5).status_code == 200
+    except Exception:
+        return False
+
+
+def _breaker_state_path():
+    return os.path.join(SHARED_INDEX_DIR, "solr-breaker")
+
+
+def publish_breaker_state(state):
+    """Indexer side: share the breaker state with the workers."""
+    try:
+        os.makedirs(SHARED_INDEX_DIR, exist_ok=True)
+        tmp_path = f"{_breaker_state_path()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(state)
+        os.replace(tmp_path, _breaker_state_path())
+    except OSError as e:
+        logger.warning(f"⚠️ Failed to publish Solr breaker state: {e}")
+
+
+def indexer_breaker_state():
+    """Worker side: the indexer's breaker state, or None until it has published one."""
+    try:
+        with open(_breaker_state_path()) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def follow_indexer_breaker():
+    """
+    Worker side: the indexer owns Solr writes and re-indexes Solr after an
+    outage, so a worker reads from Solr only while the indexer's breaker is
+    closed, i.e. once that re-index has finished.
+    """
+    state = indexer_breaker_state()
+    if state is None:
+        return
+    if state != "closed":
+        if solr_breaker.state == "closed":
+            solr_breaker.trip(f"indexer breaker is {state}")
+    elif solr_breaker.state != "closed" and ping_solr():
+        solr_breaker.close()
+
+
+def solr_breaker_loop():
+    """Probe Solr while the breaker is open; re-index it before closing."""
+    while True:
+        time.sleep(SOLR_BREAKER_PROBE_SECONDS)
+        if serving_mode == "worker":
+            follow_indexer_breaker()
+            continue
+        if solr_breaker.state != "open" or not ping_solr():
+            continue
+        logger.info("Solr answered the breaker probe, recovering")
+        solr_breaker.half_open()
+        try:
+            resync_solr()
+        except Exception as e:
+            solr_breaker.trip(f"re-index after recovery failed: {e}")
+            continue
+        if solr_breaker.state == "half_open":
+            solr_breaker.close()
+
+
+def check_solr_connection():
+    """Check if Solr is available; if not, the breaker probe keeps trying."""
+    if ping_solr():
+        solr_breaker.close()
+        logger.info(f"✅ Solr connected at {SOLR_URL}")
+        return True
+    solr_breaker.trip(f"Solr not reachable at {SOLR_URL}")
+    return False
+
+
+def create_solr_collection(collection_name):
+    """Create a Solr collection if it doesn't exist."""
+    try:
+        # Check if collection exists
+        response = requests.get(f"{SOLR_URL}/admin/collections?action=LIST")
+        if response.status_code == 200:
+            collections = response.json().get("collections", [])
+            if collection_name not in collections:
+                # Create collection
+                requests.get(
+                    f"{SOLR_URL}/admin/collections",
+                    params={
+                        "action": "CREATE",
+                        "name": collection_name,
+                        "numShards": 1,
+                        "replicationFactor": 1
+                    }
+                )
+                logger.info(f"Created Solr collection: {collection_name}")
+        apply_solr_schema(collection_name)
+    except Exception as e:
+        logger.warning(f"Could not create Solr collection {collection_name}: {e}")
+
+
+def apply_solr_schema(collection_name):
+    """Add any missing field types and fields through the Schema API."""
+    response = requests.get(f"{SOLR_URL}/{collection_name}/schema", params={"wt": "json"}, timeout=10)
+    if response.status_code != 200:
+        logger.warning(f"Could not read Solr schema for {collection_name}")
+        return False
+    schema = response.json().get("schema", {})
+    existing_types = {t["name"] for t in schema.get("fieldTypes", [])}
+    existing_fields = {f["name"]: f.get("type") for f in schema.get("fields", [])}
+
+    commands = {}
+    missing_types = [t for t in SOLR_FIELD_TYPES if t["name"] not in existing_types]
+    if missing_types:
+        commands["add-field-type"] = missing_types
+    wanted_fields = SOLR_SCHEMA_FIELDS.get(collection_name, [])
+    missing_fields = [f for f in wanted_fields if f["name"] not in existing_fields]
+    if missing_fields:
+        commands["add-field"] = missing_fields
+    # Fields guessed by schemaless mode are retyped; a reindex refills them.
+    retyped_fields = [
+        f for f in wanted_fields
+        if f["name"] in existing_fields and existing_fields[f["name"]] != f["type"]
+    ]
+    if retyped_fields:
+        commands["replace-field"] = retyped_fields
+    if not commands:
+        return True
+
+    response = requests.post(f"{SOLR_URL}/{collection_name}/schema", json=commands, timeout=10)
+    if response.status_code != 200:
+        logger.warning(f"Solr schema update failed for {collection_name}: {response.text}")
+        return False
+    logger.info(
+        f"Applied Solr schema to {collection_name}: "
+        f"{len(missing_types)} field types, {len(missing_fields)} new fields, "
+        f"{len(retyped_fields)} retyped fields"
+    )
+    return True
+
+
+def index_to_solr(collection, documents, commit=True):
+    """Index documents to Solr."""
+    if not solr_breaker.allows_writes():
+        return False
+    started = time.perf_counter()
+    status = None
+    try:
+        response = requests.post(
+            f"{SOLR_URL}/{collection}/update/json/docs?commit={'true' if commit else 'false'}",
+            json=documents,
+            headers={"Content-Type": "application/json"},
+            timeout=SOLR_UPDATE_TIMEOUT
+        )
+        status = response.status_code
+        return status == 200
+    except Exception as e:
+        logger.warning(f"Solr indexing failed: {e}")
+        return False
+    finally:
+        observe_solr_request("update", started, status)
+
+
+def delete_from_solr(collection, doc_ids):
+    """Delete documents from Solr by id."""
+    if not solr_breaker.allows_writes():
+        return False
+    started = time.perf_counter()
+    status = None
+    try:
+        response = requests.post(
+            f"{SOLR_URL}/{collection}/update?commit=true",
+            json={"delete": list(doc_ids)},
+            headers={"Content-Type": "application/json"},
+            timeout=SOLR_UPDATE_TIMEOUT
+        )
+        status = response.status_code
+        return status == 200
+    except Exception as e:
+        logger.warning(f"Solr delete failed: {e}")
+        return False
+    finally:
+        observe_solr_request("delete", started, status)
+
+
+_solr_sessions = {}
+_solr_pools = {}
+
+
+def solr_session():
+    """
+    Keep-alive session for Solr queries with SOLR_POOL_SIZE pooled
+    connections, shared by all threads. One per process: pooled sockets
+    must not cross a fork.
+    """
+    session = _solr_sessions.get(os.getpid())
+    if session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=SOLR_POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _solr_sessions.clear()
+        _solr_sessions[os.getpid()] = session
+    return session
+
+
+def solr_query_pool():
+    """Threads for running Solr queries concurrently, one pool per process."""
+    pool = _solr_pools.get(os.getpid())
+    if pool is None:
+        pool = ThreadPoolExecutor(max_workers=SOLR_POOL_SIZE, thread_name_prefix="solr-query")
+        _solr_pools.clear()
+        _solr_pools[os.getpid()] = pool
+    return pool
+
+
+def search_solr(collection, query, rows=DEFAULT_SEARCH_LIMIT, fields=None, params=None, start=0):
+    """
+    Search Solr collection, optionally restricting the returned fields.
+    Returns the response body ({"numFound": ..., "docs": [...]}) or None;
+    facet counts, if requested, are under "facet_fields".
+    """
+    if not solr_available:
+        return None
+    params = {
+        **(params or {}),
+        "q": query,
+        "rows": rows,
+        "start": start,
+        "wt": "json"
+    }
+    if fields:
+        params["fl"] = ",".join(fields)
+    started = time.perf_counter()
+    status = None
+    try:
+        response = solr_session().get(
+            f"{SOLR_URL}/{collection}/select",
+            params=params,
+            timeout=SOLR_QUERY_TIMEOUT
+        )
+        status = response.status_code
+        if status == 200:
+            body = response.json()
+            result = body.get("response", {})
+            if "facet_counts" in body:
+                result["facet_fields"] = body["facet_counts"].get("facet_fields", {})
+            return result
+    except Exception as e:
+        logger.warning(f"Solr search failed: {e}")
+    finally:
+        observe_solr_request("select", started, status)
+    return None
+
+
+_SOLR_SPECIAL_CHARS = re.compile(r'([+\-!(){}\[\]^"~*?:\\/&|])')
+
+
+def escape_solr_query(query):
+    """Escape Lucene syntax so user input is always matched literally."""
+    # Lowercasing also neutralises AND/OR/NOT; every analyzer lowercases anyway.
+    return _SOLR_SPECIAL_CHARS.sub(r"\\\1", query.strip().lower())
+
+
+def solr_phrase(value):
+    """Quote a value for an exact match on a string field."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def solr_filter_queries(kind, filters):
+    """fq clauses for {param: [values] or (low, high)} filters of one entity type."""
+    solr_fields = {param: solr_field for param, _, solr_field in FACET_FIELDS[kind] + RANGE_FIELDS[kind]}
+    filter_queries = []
+    for param, wanted in filters.items():
+        if isinstance(wanted, tuple):
+            low, high = (solr_phrase(v) if v is not None else "*" for v in wanted)
+            filter_queries.append(f"{solr_fields[param]}:[{low} TO {high}]")
+        else:
+            filter_queries.append(f"{solr_fields[param]}:(" + " OR ".join(map(solr_phrase, wanted)) + ")")
+    return filter_queries
+
+
+def build_edismax_params(query_fields):
+    """Solr params for a relevance-ranked edismax query over query_fields."""
+    return {
+        "defType": "edismax",
+        "qf": query_fields,
+        "pf": query_fields,
+        "mm": "100%",
+    }
+
+
+def _solr_value(value):
+    """Unwrap single-valued fields that schemaless Solr returns as arrays."""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def to_solr_doc(doc_id, doc_type, entity, field_map, searchable_text):
+    """Build a Solr document carrying every display field of an entity."""
+    solr_doc = {"id": doc_id, "type": doc_type, "searchable_text": searchable_text}
+    for solr_field, key in field_map:
+        value = entity.get(key)
+        if value is not None:
+            solr_doc[solr_field] = value
+    return solr_doc
+
+
+def hydrate_solr_docs(solr_docs, field_map):
+    """Rebuild API-shaped entities from the stored fields of Solr hits."""
+    return [
+        {key: _solr_value(doc.get(solr_field)) for solr_field, key in field_map}
+        for doc in solr_docs
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════
+# INDEX SNAPSHOTS (warm start)
+# ═══════════════════════════════════════════════════════════════
+#
+# A snapshot is a JSON manifest at SNAPSHOT_PATH (generation, Kafka
+# offsets, and per entity type the delta documents and tombstones) next to
+# one file per entity type holding the base segment in the shared index
+# segment format. Loading maps those files and searches them in place, as
+# prefork workers do, so nothing proportional to the corpus is decoded or
+# copied; an unchanged base segment is not rewritten by the next snapshot.
+
+SNAPSHOT_VERSION = 2
+_SNAPSHOT_PREAMBLE = struct.Struct("<8sQQ")
+_snapshot_bases = {}   # kind -> (base segment, file name) last written or loaded
+_snapshot_lock = threading.Lock()
+
+
+class SnapshotDocuments:
+    """Read-only sequence of the documents in an mmap'd segment file."""
+
+    def __init__(self, buffer, data_at, offsets_at, count):
+        self._buffer = buffer
+        self._data_at = data_at
+        self._count = count
+        self._offsets = buffer[offsets_at:offsets_at + 8 * (count + 1)].cast("Q")
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, position):
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        start = self._data_at + self._offsets[position]
+        end = self._data_at + self._offsets[position + 1]
+        return json.loads(self._buffer[start:end].tobytes())
+
+    def __iter__(self):
+        for position in range(self._count):
+            yield self[position]
+
+
+def save_index_snapshot(path=SNAPSHOT_PATH):
+    """Persist the current index together with the Kafka offsets it reflects."""
+    snapshot = current_snapshot
+    generation = snapshot.generation
+    directory = os.path.dirname(path) or "."
+    prefix = f"{os.path.basename(path)}."
+    kafka_offsets = {}
+    for (topic, partition), offset in snapshot.kafka_offsets.items():
+        kafka_offsets.setdefault(topic, {})[str(partition)] = offset
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "generation": generation,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "kafka_offsets": kafka_offsets,
+        "bases": {},
+        "delta": {},
+        "tombstones": {}
+    }
+    try:
+        with _snapshot_lock:
+            os.makedirs(directory, exist_ok=True)
+            for kind in INDEX_FIELDS:
+                index = snapshot.index(kind)
+                saved = _snapshot_bases.get(kind)
+                if saved is None or saved[0] is not index.base:
+                    file_name = f"{prefix}{kind}-{generation}.seg"
+                    write_segment_file(os.path.join(directory, file_name), index.base)
+                    saved = _snapshot_bases[kind] = (index.base, file_name)
+                manifest["bases"][kind] = saved[1]
+                manifest["delta"][kind] = list(index.delta.documents)
+                manifest["tombstones"][kind] = sorted(index.tombstones)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            # Superseded base files; a mapping of one stays valid after unlink
+            for name in os.listdir(directory):
+                if name.startswith(prefix) and name.endswith(".seg") and name not in manifest["bases"].values():
+                    os.unlink(os.path.join(directory, name))
+        logger.info(f"Wrote index snapshot {path} at generation {generation}")
+        return generation
+    except Exception as e:
+        logger.warning(f"Failed to write index snapshot {path}: {e}")
+        return None
+
+
+def load_index_snapshot(path=SNAPSHOT_PATH):
+    """
+    Install the index and Kafka offsets from a snapshot, if one exists. The
+    base segments stay memory-mapped and are searched in place.
+    """
+    if not os.path.exists(path):
+        return False
+    directory = os.path.dirname(path) or "."
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {manifest.get('version')}")
+        bases = {}
+        indexes = {}
+        for kind, fields in INDEX_FIELDS.items():
+            file_name = manifest["bases"][kind]
+            base = MappedSegment(os.path.join(directory, file_name))
+            bases[kind] = (base, file_name)
+            indexes[kind] = SearchIndex(
+                fields=fields,
+                _base=base,
+                _delta=IndexSegment(manifest["delta"][kind], fields),
+                _tombstones=frozenset(manifest["tombstones"][kind])
+            )
+        offsets = {
+            (topic, int(partition)): offset
+            for topic, partitions in manifest.get("kafka_offsets", {}).items()
+            for partition, offset in partitions.items()
+        }
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable index snapshot {path}: {e}")
+        return False
+    with _snapshot_lock:
+        _snapshot_bases.update(bases)
+    with index_write_lock:
+        publish_snapshot(kafka_offsets=offsets, **indexes)
+    logger.info(
+        f"Loaded index snapshot from {manifest.get('created_at')}: {len(indexes['pets'])} pets, "
+        f"{len(indexes['appointments'])} appointments"
+    )
+    return True
+
+
+def snapshot_loop():
+    """Periodically snapshot the index whenever it has changed."""
+    written_generation = None
+    while True:
+        time.sleep(SNAPSHOT_INTERVAL_SECONDS)
+        if current_snapshot.generation != written_generation:
+            saved_generation = save_index_snapshot()
+            if saved_generation is not None:
+                written_generation = saved_generation
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INDEX (multi-process serving)
+# ═══════════════════════════════════════════════════════════════
+#
+# In prefork mode (gunicorn.conf.py) a single indexer process owns the Kafka
+# consumer, the syncs and Solr writes. It exports every generation to
+# SHARED_INDEX_DIR: one segment file per entity type holding the base
+# segment (documents, lengths, id table, term dictionary and postings), plus
+# a small manifest.json with the delta documents and tombstones. Workers
+# mmap the segment files and search them in place, so the corpus lives once
+# in the page cache and a worker only holds the bounded delta in memory.
+
+SEGMENT_MAGIC = b"DVSEG003"
+
+serving_mode = "standalone"   # "standalone", "indexer" or "worker"
+
+
+def _write_array(f, values, typecode):
+    """Write an array 8-byte aligned; returns (offset, item count)."""
+    f.write(b"\0" * (-f.tell() % 8))
+    offset = f.tell()
+    data = array(typecode, values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    data.tofile(f)
+    return offset, len(data)
+
+
+def write_segment_file(path, segment):
+    """Atomically write an IndexSegment in the mmap-able segment format."""
+    tmp_path = f"{path}.tmp"
+    if isinstance(segment, MappedSegment):
+        # Already in this format (a base loaded from a snapshot)
+        shutil.copyfile(segment.path, tmp_path)
+        os.replace(tmp_path, path)
+        return
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * _SNAPSHOT_PREAMBLE.size)
+        layout = {}
+
+        data_at = f.tell()
+        doc_offsets = [0]
+        for document in segment.documents:
+            f.write(json.dumps(document, separators=(",", ":")).encode("utf-8"))
+            doc_offsets.append(f.tell() - data_at)
+        layout["data_at"] = data_at
+        layout["doc_offsets"] = _write_array(f, doc_offsets, "Q")
+        layout["doc_lengths"] = _write_array(f, segment.doc_lengths, "d")
+
+        id_positions = sorted(
+            (int(document["id"]), position) for position, document in enumerate(segment.documents)
+        )
+        layout["ids"] = _write_array(f, (entity_id for entity_id, _ in id_positions), "q")
+        layout["id_positions"] = _write_array(f, (position for _, position in id_positions), "I")
+
+        # Terms joined by newlines, so infix lookups are one bytes.find() scan
+        terms = sorted(segment.postings)
+        terms_at = f.tell()
+        term_offsets = [0]
+        for term in terms:
+            f.write(term.encode("utf-8") + b"\n")
+            term_offsets.append(f.tell() - terms_at)
+        layout["terms_at"] = terms_at
+        layout["term_offsets"] = _write_array(f, term_offsets, "Q")
+
+        postings_starts = [0]
+        for term in terms:
+            postings_starts.append(postings_starts[-1] + len(segment.postings[term]))
+        layout["postings_starts"] = _write_array(f, postings_starts, "Q")
+        layout["postings_positions"] = _write_array(
+            f, (position for term in terms for position in segment.postings[term]), "I"
+        )
+        layout["postings_freqs"] = _write_array(
+            f, (freq for term in terms for freq in segment.postings[term].values()), "f"
+        )
+
+        fuzzy_terms_at = f.tell()
+        for term in segment.fuzzy_terms:
+            f.write(term.encode("utf-8") + b"\n")
+        layout["fuzzy_terms"] = [fuzzy_terms_at, f.tell() - fuzzy_terms_at]
+        fuzzy_starts = [0]
+        for positions in segment.fuzzy_postings:
+            fuzzy_starts.append(fuzzy_starts[-1] + len(positions))
+        layout["fuzzy_postings_starts"] = _write_array(f, fuzzy_starts, "Q")
+        layout["fuzzy_postings_positions"] = _write_array(
+            f, (position for positions in segment.fuzzy_postings for position in positions), "I"
+        )
+
+        layout["values"] = {}
+        for field, (values, starts, positions) in segment.value_groups.items():
+            layout["values"][field] = {
+                "values": values,
+                "starts": _write_array(f, starts, "Q"),
+                "positions": _write_array(f, positions, "I")
+            }
 
-# In-memory search index (fallback when Solr is not available)
-in_memory_index = {
-    "pets": [],
-    "appointments": []
-}
+        header_bytes = json.dumps({
+            "count": len(segment),
+            "total_length": segment.total_length,
+            "layout": layout
+        }).encode("utf-8")
+        header_at = f.tell()
+        f.write(header_bytes)
+        f.seek(0)
+        f.write(_SNAPSHOT_PREAMBLE.pack(SEGMENT_MAGIC, header_at, len(header_bytes)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
 
-solr_available = False
 
+class MappedSegment:
+    """
+    Read-only IndexSegment backed by a memory-mapped segment file. Nothing
+    proportional to the corpus is copied into the process; documents are
+    decoded only when a hit is returned. Unmapped when garbage collected.
+    """
 
-# ═══════════════════════════════════════════════════════════════
-# SOLR INTEGRATION
-# ═══════════════════════════════════════════════════════════════
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_at, header_len = _SNAPSHOT_PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"{path} is not an index segment file")
+        buffer = memoryview(self._mmap)
+        header = json.loads(buffer[header_at:header_at + header_len].tobytes())
+        layout = header["layout"]
+        self._count = header["count"]
+        self.total_length = header["total_length"]
 
-def check_solr_connection():
-    """Check if Solr is available."""
-    global solr_available
-    try:
-        response = requests.get(f"{SOLR_URL}/admin/cores", timeout=5)
-        solr_available = response.status_code == 200
-        if solr_available:
-            logger.info(f"✅ Solr connected at {SOLR_URL}")
-        return solr_available
-    except Exception as e:
-        logger.warning(f"⚠️ Solr not available: {e}")
-        solr_available = False
-        return False
+        def view(array_layout, typecode, size):
+            offset, count = array_layout
+            return buffer[offset:offset + size * count].cast(typecode)
 
+        self.documents = SnapshotDocuments(
+            buffer, layout["data_at"], layout["doc_offsets"][0], self._count
+        )
+        self.doc_lengths = view(layout["doc_lengths"], "d", 8)
+        self._ids = view(layout["ids"], "q", 8)
+        self._id_positions = view(layout["id_positions"], "I", 4)
+        self._term_offsets = view(layout["term_offsets"], "Q", 8)
+        self._terms_at = layout["terms_at"]
+        self._terms_end = self._terms_at + self._term_offsets[len(self._term_offsets) - 1]
+        self._postings_starts = view(layout["postings_starts"], "Q", 8)
+        self._postings_positions = view(layout["postings_positions"], "I", 4)
+        self._postings_freqs = view(layout["postings_freqs"], "f", 4)
+        self._fuzzy_terms_range = layout["fuzzy_terms"]
+        self._fuzzy_starts = view(layout["fuzzy_postings_starts"], "Q", 8)
+        self._fuzzy_positions = view(layout["fuzzy_postings_positions"], "I", 4)
+        self._fuzzy_terms = None
+        self._fuzzy = None
+        self._prefixes = None
 
-def create_solr_collection(collection_name):
-    """Create a Solr collection if it doesn't exist."""
-    try:
-        # Check if collection exists
-        response = requests.get(f"{SOLR_URL}/admin/collections?action=LIST")
-        if response.status_code == 200:
-            collections = response.json().get("collections", [])
-            if collection_name not in collections:
-                # Create collection
-                requests.get(
-                    f"{SOLR_URL}/admin/collections",
-                    params={
-                        "action": "CREATE",
-                        "name": collection_name,
-                        "numShards": 1,
-                        "replicationFactor": 1
-                    }
-                )
-                logger.info(f"Created Solr collection: {collection_name}")
-    except Exception as e:
-        logger.warning(f"Could not create Solr collection {collection_name}: {e}")
+        self.value_groups = {
+            field: (
+                groups["values"],
+                view(groups["starts"], "Q", 8),
+                view(groups["positions"], "I", 4)
+            )
+            for field, groups in layout["values"].items()
+        }
+        self._value_indexes = {}
 
+    def __len__(self):
+        return self._count
 
-def index_to_solr(collection, documents):
-    """Index documents to Solr."""
-    if not solr_available:
-        return False
-    try:
-        response = requests.post(
-            f"{SOLR_URL}/{collection}/update/json/docs?commit=true",
-            json=documents,
-            headers={"Content-Type": "application/json"}
-        )
-        return response.status_code == 200
-    except Exception as e:
-        logger.warning(f"Solr indexing failed: {e}")
-        return False
+    def value_index(self, field):
+        """ValueIndex of a FILTER_FIELDS field, or None if no document has it."""
+        index = self._value_indexes.get(field)
+        if index is None and field in self.value_groups:
+            index = self._value_indexes[field] = ValueIndex(*self.value_groups[field], len(self))
+        return index
 
+    @property
+    def fuzzy_terms(self):
+        """
+        Sorted name terms, decoded on first use. Sized by the name
+        vocabulary; their postings stay in the mapping.
+        """
+        if self._fuzzy_terms is None:
+            start, size = self._fuzzy_terms_range
+            self._fuzzy_terms = self._mmap[start:start + size].decode("utf-8").split("\n")[:-1]
+        return self._fuzzy_terms
 
-def search_solr(collection, query, rows=50):
-    """Search Solr collection."""
-    if not solr_available:
+    @property
+    def fuzzy(self):
+        """Trigram index over the name terms, built on first use."""
+        if self._fuzzy is None:
+            starts, positions = self._fuzzy_starts, self._fuzzy_positions
+            postings = [positions[starts[t]:starts[t + 1]] for t in range(len(self.fuzzy_terms))]
+            self._fuzzy = FuzzyVocabulary(self.fuzzy_terms, postings)
+        return self._fuzzy
+
+    @property
+    def prefixes(self):
+        """Name terms with document frequencies, for completions."""
+        if self._prefixes is None:
+            starts = self._fuzzy_starts
+            freqs = [starts[t + 1] - starts[t] for t in range(len(self.fuzzy_terms))]
+            self._prefixes = PrefixVocabulary(self.fuzzy_terms, freqs)
+        return self._prefixes
+
+    def position_of(self, entity_id):
+        try:
+            entity_id = int(entity_id)
+        except (TypeError, ValueError):
+            return None
+        i = bisect.bisect_left(self._ids, entity_id)
+        if i < len(self._ids) and self._ids[i] == entity_id:
+            return self._id_positions[i]
         return None
-    try:
-        response = requests.get(
-            f"{SOLR_URL}/{collection}/select",
-            params={
-                "q": query,
-                "rows": rows,
-                "wt": "json"
-            }
+
+    def term_freqs(self, term):
+        """Same contract as IndexSegment.term_freqs(), read from the mapping."""
+        needle = term.encode("utf-8")
+        freqs = {}
+        found = self._mmap.find(needle, self._terms_at, self._terms_end)
+        while found != -1:
+            t = bisect.bisect_right(self._term_offsets, found - self._terms_at) - 1
+            term_start = self._terms_at + self._term_offsets[t]
+            term_end = self._terms_at + self._term_offsets[t + 1] - 1   # drop the newline
+            indexed = self._mmap[term_start:term_end].decode("utf-8")
+            discount = len(term) / len(indexed)
+            for p in range(self._postings_starts[t], self._postings_starts[t + 1]):
+                position = self._postings_positions[p]
+                freq = self._postings_freqs[p] * discount
+                if freq > freqs.get(position, 0.0):
+                    freqs[position] = freq
+            # Continue after this term so each term is counted once
+            found = self._mmap.find(needle, term_end + 1, self._terms_end)
+        return freqs
+
+
+def _shared_manifest_path():
+    return os.path.join(SHARED_INDEX_DIR, "manifest.json")
+
+
+_exported_bases = {}   # kind -> (IndexSegment, file name)
+
+
+def export_shared_index(snapshot):
+    """Indexer side: publish a snapshot to the workers."""
+    os.makedirs(SHARED_INDEX_DIR, exist_ok=True)
+    manifest = {
+        "generation": snapshot.generation,
+        "indexer_pid": os.getpid(),
+        "bases": {},
+        "delta": {},
+        "tombstones": {}
+    }
+    for kind in INDEX_FIELDS:
+        index = snapshot.index(kind)
+        exported = _exported_bases.get(kind)
+        if exported is None or exported[0] is not index.base:
+            # Base segments only change on full syncs and compactions
+            file_name = f"{kind}-{snapshot.generation}.seg"
+            write_segment_file(os.path.join(SHARED_INDEX_DIR, file_name), index.base)
+            exported = _exported_bases[kind] = (index.base, file_name)
+        manifest["bases"][kind] = exported[1]
+        manifest["delta"][kind] = list(index.delta.documents)
+        manifest["tombstones"][kind] = sorted(index.tombstones)
+
+    tmp_path = f"{_shared_manifest_path()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp_path, _shared_manifest_path())
+
+    # Workers may still map superseded files; unlinking keeps their mappings
+    # valid, and the two newest per kind cover any in-flight manifest read.
+    for kind in INDEX_FIELDS:
+        files = sorted(
+            (name for name in os.listdir(SHARED_INDEX_DIR)
+             if name.startswith(f"{kind}-") and name.endswith(".seg")),
+            key=lambda name: int(name[len(kind) + 1:-4])
         )
-        if response.status_code == 200:
-            return response.json().get("response", {}).get("docs", [])
+        for name in files[:-2]:
+            os.unlink(os.path.join(SHARED_INDEX_DIR, name))
+
+
+def shared_index_export_loop():
+    """Indexer side: export every new generation."""
+    exported_generation = None
+    while True:
+        snapshot = current_snapshot
+        if snapshot.generation != exported_generation:
+            try:
+                export_shared_index(snapshot)
+                exported_generation = snapshot.generation
+            except Exception as e:
+                logger.warning(f"Failed to export shared index: {e}")
+        time.sleep(SHARED_INDEX_POLL_SECONDS)
+
+
+_mapped_bases = {}              # kind -> MappedSegment currently in use
+_shared_manifest_mtime = None
+_shared_manifest_checked = 0.0
+
+
+def refresh_shared_index():
+    """Worker side: adopt the indexer's latest generation, if it changed."""
+    global _shared_manifest_mtime, _shared_manifest_checked, current_snapshot
+    now = time.monotonic()
+    if now - _shared_manifest_checked < SHARED_INDEX_POLL_SECONDS:
+        return
+    if not index_write_lock.acquire(blocking=False):
+        return  # another request thread is already refreshing
+    try:
+        _shared_manifest_checked = now
+        try:
+            mtime = os.stat(_shared_manifest_path()).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == _shared_manifest_mtime:
+            return
+        with open(_shared_manifest_path()) as f:
+            manifest = json.load(f)
+        indexes = {}
+        for kind, fields in INDEX_FIELDS.items():
+            path = os.path.join(SHARED_INDEX_DIR, manifest["bases"][kind])
+            base = _mapped_bases.get(kind)
+            if base is None or base.path != path:
+                base = _mapped_bases[kind] = MappedSegment(path)
+            indexes[kind] = SearchIndex(
+                fields=fields,
+                _base=base,
+                _delta=IndexSegment(manifest["delta"][kind], fields),
+                _tombstones=frozenset(manifest["tombstones"][kind])
+            )
+        current_snapshot = IndexSnapshot(manifest["generation"], **indexes)
+        observe_snapshot(current_snapshot)
+        _shared_manifest_mtime = mtime
     except Exception as e:
-        logger.warning(f"Solr search failed: {e}")
-    return None
+        logger.warning(f"Failed to load shared index: {e}")
+    finally:
+        index_write_lock.release()
+
+
+@app.before_request
+def _refresh_worker_index():
+    if serving_mode == "worker":
+        refresh_shared_index()
+
+
+def request_indexer_reindex():
+    """Worker side: ask the indexer process to run a full sync."""
+    with open(_shared_manifest_path()) as f:
+        indexer_pid = json.load(f)["indexer_pid"]
+    os.kill(indexer_pid, signal.SIGUSR1)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -126,71 +2355,400 @@ def search_solr(collection, query, rows=50):
 
 kafka_consumer = None
 
+# Set once consumer positions are fixed, so a full sync never misses events
+kafka_positions_ready = threading.Event()
+
+
+def _assign_event_partitions(consumer):
+    """Assign every event partition, resuming from the applied offsets."""
+    from kafka import TopicPartition
+    partitions = [
+        TopicPartition(topic, partition)
+        for topic in EVENT_TOPICS
+        for partition in sorted(consumer.partitions_for_topic(topic) or ())
+    ]
+    consumer.assign(partitions)
+    known_offsets = current_snapshot.kafka_offsets
+    resolved_offsets = {}
+    for tp in partitions:
+        offset = known_offsets.get((tp.topic, tp.partition))
+        if offset is not None:
+            consumer.seek(tp, offset)
+        else:
+            # Resolve "latest" now; a full sync covers everything before it
+            consumer.seek_to_end(tp)
+            resolved_offsets[(tp.topic, tp.partition)] = consumer.position(tp)
+    if resolved_offsets:
+        with index_write_lock:
+            publish_snapshot(kafka_offsets=resolved_offsets)
+    return partitions
+
 
 def start_kafka_consumer():
     """Start Kafka consumer for index updates."""
     global kafka_consumer
     try:
         from kafka import KafkaConsumer
+        # No consumer group: every instance keeps its own full index, and
+        # positions come from the index snapshot rather than group commits.
         kafka_consumer = KafkaConsumer(
-            'pet-events', 'appointment-events',
             bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
-            group_id='search-service-group',
+            group_id=None,
+            enable_auto_commit=False,
             value_deserializer=lambda m: json.loads(m.decode('utf-8')),
             auto_offset_reset='latest'
         )
-        logger.info("✅ Kafka consumer started for search service")
+        partitions = _assign_event_partitions(kafka_consumer)
+        kafka_positions_ready.set()
+        logger.info(f"✅ Kafka consumer started for search service ({len(partitions)} partitions)")
         
         # Process messages in background
-        for message in kafka_consumer:
-            process_event(message.topic, message.value)
+        last_assigned = time.monotonic()
+        while True:
+            batch = kafka_consumer.poll(timeout_ms=1000, max_records=500)
+            records = [
+                (tp.topic, tp.partition, message.offset, message.value)
+                for tp, messages in batch.items()
+                for message in messages
+            ]
+            if records:
+                apply_events(records)
+            # Pick up event topics created after startup
+            if len(partitions) < len(EVENT_TOPICS) and time.monotonic() - last_assigned > 30:
+                partitions = _assign_event_partitions(kafka_consumer)
+                last_assigned = time.monotonic()
     except Exception as e:
         logger.warning(f"⚠️ Kafka consumer not available: {e}")
+    finally:
+        kafka_positions_ready.set()
+
+
+def state_topic_consumer():
+    """Consumer tuned for replaying the entity-state topics in bulk."""
+    from kafka import KafkaConsumer
+    return KafkaConsumer(
+        bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
+        group_id=None,
+        enable_auto_commit=False,
+        max_poll_records=STATE_POLL_RECORDS,
+        fetch_min_bytes=1024 * 1024,
+        fetch_max_wait_ms=100,
+        fetch_max_bytes=64 * 1024 * 1024,
+        max_partition_fetch_bytes=16 * 1024 * 1024
+    )
+
+
+def read_state_topics(consumer):
+    """
+    Replay the entity-state topics from the earliest offset up to the end
+    offsets seen on entry (later changes arrive as events). Returns
+    {kind: {key: raw JSON value}} with the latest state per key, null values
+    being deletes, or None if no state topic exists. Works with any consumer that
+    has the kafka-python assignment API.
+    """
+    from kafka import TopicPartition
+    kinds = {topic: kind for kind, topic in STATE_TOPICS.items()}
+    partitions = [
+        TopicPartition(topic, partition)
+        for topic in kinds
+        for partition in sorted(consumer.partitions_for_topic(topic) or ())
+    ]
+    if not partitions:
+        return None
+    consumer.assign(partitions)
+    consumer.seek_to_beginning(*partitions)
+    end_offsets = consumer.end_offsets(partitions)
+    
+    # Raw values per key; the caller decodes only the surviving states
+    latest = {kind: {} for kind in STATE_TOPICS}
+    pending = {tp for tp in partitions if consumer.position(tp) < end_offsets[tp]}
+    while pending:
+        batch = consumer.poll(timeout_ms=1000, max_records=STATE_POLL_RECORDS)
+        for tp, messages in batch.items():
+            states = latest[kinds[tp.topic]]
+            end = end_offsets[tp]
+            for message in messages:
+                if message.offset >= end:
+                    break
+                if message.value is None:
+                    states.pop(message.key, None)
+                elif message.key is not None:
+                    states[message.key] = message.value
+        done = {tp for tp in pending if consumer.position(tp) >= end_offsets[tp]}
+        if done:
+            consumer.pause(*done)
+            pending -= done
+    return latest
 
 
 def process_event(topic, event):
-    """Process Kafka events for index updates."""
-    try:
-        if 'pet' in topic.lower():
-            # Refresh pets index
-            sync_pets_index()
-        elif 'appointment' in topic.lower():
-            # Refresh appointments index
-            sync_appointments_index()
-    except Exception as e:
-        logger.error(f"Error processing event: {e}")
+    """Process a single Kafka event for index updates."""
+    apply_events([(topic, None, None, event)])
 
 
 # ═══════════════════════════════════════════════════════════════
 # INDEX SYNCHRONIZATION
 # ═══════════════════════════════════════════════════════════════
 
+# Serialises index writers (event application, syncs, snapshot loading).
+# Readers never take it; they only read current_snapshot.
+index_write_lock = threading.RLock()
+
+# Ids changed by events while a full sync is in flight, per running sync
+_active_syncs = {"pets": [], "appointments": []}
+
+INDEX_FIELDS = {"pets": PET_SEARCH_FIELDS, "appointments": APPOINTMENT_SEARCH_FIELDS}
+
+ENTITY_URLS = {
+    "pets": f"{PET_SERVICE_URL}/api/pets",
+    "appointments": f"{APPOINTMENT_SERVICE_URL}/api/appointments"
+}
+
+# Event payload keys -> entity keys, used when the entity cannot be fetched
+PET_EVENT_FIELDS = (("petName", "name"), ("species", "species"), ("ownerName", "ownerName"))
+APPOINTMENT_EVENT_FIELDS = (
+    ("petId", "petId"),
+    ("vetId", "vetId"),
+    ("date", "date"),
+    ("time", "time"),
+    ("type", "appointmentType"),
+    ("status", "status"),
+)
+
+
+def pet_solr_doc(pet):
+    solr_doc = to_solr_doc(
+        f"pet_{pet['id']}", "pet", pet, PET_SOLR_FIELDS,
+        f"{pet.get('name', '')} {pet.get('species', '')} {pet.get('breed', '')} {pet.get('ownerName', '')}"
+    )
+    if pet.get("breed") is not None:
+        # breed is analyzed for search; facets need the exact value
+        solr_doc["breed_facet"] = pet["breed"]
+    return solr_doc
+
+
+def appointment_solr_doc(appt):
+    return to_solr_doc(
+        f"appt_{appt['id']}", "appointment", appt, APPOINTMENT_SOLR_FIELDS,
+        f"{appt.get('appointmentType', '')} {appt.get('date', '')} {appt.get('notes', '')}"
+    )
+
+
+SOLR_TARGETS = {
+    "pets": (PETS_COLLECTION, pet_solr_doc, "pet_"),
+    "appointments": (APPOINTMENTS_COLLECTION, appointment_solr_doc, "appt_")
+}
+
+
+def push_changes_to_solr(kind, changes):
+    """Mirror {entity id: document or None (deleted)} into Solr."""
+    if not solr_breaker.allows_writes() or not changes:
+        return
+    collection, solr_doc, id_prefix = SOLR_TARGETS[kind]
+    upserts = [solr_doc(document) for document in changes.values() if document is not None]
+    deletes = [f"{id_prefix}{entity_id}" for entity_id, document in changes.items() if document is None]
+    if upserts:
+        index_to_solr(collection, upserts)
+    if deletes:
+        delete_from_solr(collection, deletes)
+
+
+def fetch_entity(kind, entity_id):
+    """Fetch one entity from its owning service; None if it no longer exists."""
+    response = requests.get(f"{ENTITY_URLS[kind]}/{entity_id}", timeout=5)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+def resolve_event(topic, event):
+    """Map an event to (kind, entity id, current document or None if deleted)."""
+    if 'pet' in topic.lower():
+        kind, entity_id, event_fields = "pets", event.get("petId"), PET_EVENT_FIELDS
+    elif 'appointment' in topic.lower():
+        kind, entity_id, event_fields = "appointments", event.get("appointmentId"), APPOINTMENT_EVENT_FIELDS
+    else:
+        return None
+    if entity_id is None:
+        return None
+    if str(event.get("eventType", "")).endswith("_DELETED"):
+        return kind, entity_id, None
+    try:
+        return kind, entity_id, fetch_entity(kind, entity_id)
+    except Exception as e:
+        # Owning service unreachable: apply what the event itself carries
+        logger.warning(f"Could not fetch {kind} {entity_id}, using event payload: {e}")
+        document = dict(current_snapshot.index(kind).get(entity_id) or {"id": entity_id})
+        for event_key, key in event_fields:
+            if event_key in event:
+                document[key] = event[event_key]
+        return kind, entity_id, document
+
+
+def apply_events(records):
+    """
+    Apply a batch of (topic, partition, offset, event) records to the index.
+    Each entity is fetched once; each index is rebuilt once per batch.
+    """
+    changes = {"pets": {}, "appointments": {}}
+    for topic, _, _, event in records:
+        try:
+            resolved = resolve_event(topic, event)
+        except Exception as e:
+            logger.error(f"Error processing event: {e}")
+            continue
+        if resolved:
+            kind, entity_id, document = resolved
+            changes[kind][entity_id] = document
+    
+    offsets = {
+        (topic, partition): offset + 1
+        for topic, partition, offset, _ in records
+        if partition is not None
+    }
+    with index_write_lock:
+        indexes = {}
+        for kind, kind_changes in changes.items():
+            if kind_changes:
+                # Solr first, so nothing cached for the new generation predates it
+                push_changes_to_solr(kind, kind_changes)
+                indexes[kind] = current_snapshot.index(kind).with_changes(kind_changes)
+                for touched in _active_syncs[kind]:
+                    touched.update(kind_changes)
+        publish_snapshot(kafka_offsets=offsets, **indexes)
+    observe_event_lag(records)
+
+
+@contextmanager
+def tracking_event_changes(kind):
+    """Collect the ids events change while a full reload of kind is in flight."""
+    touched = set()
+    with index_write_lock:
+        _active_syncs[kind].append(touched)
+    try:
+        yield touched
+    finally:
+        with index_write_lock:
+            _active_syncs[kind].remove(touched)
+
+
+def mirror_to_solr(kind, documents):
+    """Pass documents through, indexing them into Solr SYNC_CHUNK_SIZE at a time."""
+    collection, solr_doc, _ = SOLR_TARGETS[kind]
+    batch = []
+    for document in documents:
+        if len(batch) >= SYNC_CHUNK_SIZE:
+            index_to_solr(collection, batch, commit=False)
+            batch = []
+        batch.append(solr_doc(document))
+        yield document
+    if batch:
+        # Commits the earlier chunks too
+        index_to_solr(collection, batch)
+
+
+def install_documents(kind, documents, touched):
+    """
+    Replace one entity type's index and Solr documents with a full reload.
+    documents is consumed once, as a stream; returns how many there were.
+    """
+    if solr_breaker.allows_writes():
+        documents = mirror_to_solr(kind, documents)
+    index = SearchIndex(documents, INDEX_FIELDS[kind])
+    with index_write_lock:
+        # Events applied during the reload are newer than the reloaded copy
+        current = current_snapshot.index(kind)
+        newer = {entity_id: current.get(entity_id) for entity_id in touched}
+        push_changes_to_solr(kind, newer)
+        publish_snapshot(**{kind: index.with_changes(newer)})
+    return len(index)
+
+
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(chunks):
+    """
+    Yield the items of a top-level JSON array from an iterable of byte
+    chunks, holding no more than one chunk plus one item at a time.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer, position, expect = "", 0, "["
+    for chunk in chain(chunks, [None]):
+        final = chunk is None
+        buffer = buffer[position:] + utf8.decode(chunk or b"", final=final)
+        position = 0
+        while True:
+            position = _JSON_WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if expect == "[":
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                position, expect = position + 1, "first"
+            elif char == "]" and expect in ("first", ","):
+                return
+            elif expect == ",":
+                if char != ",":
+                    raise ValueError(f"Unexpected {char!r} in JSON array")
+                position, expect = position + 1, "item"
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                after = _JSON_WHITESPACE.match(buffer, end).end()
+                if not final and (after == len(buffer) or buffer[after] not in ",]"):
+                    # A number such as "12" may continue in the next chunk
+                    break
+                yield item
+                position, expect = end, ","
+    raise ValueError("Truncated JSON array")
+
+
+def _payload_chunks(kind, response):
+    size = 0
+    for chunk in response.iter_content(SYNC_READ_BYTES):
+        size += len(chunk)
+        yield chunk
+    SYNC_PAYLOAD_BYTES.labels(kind).observe(size)
+
+
+@contextmanager
+def streamed_entities(kind, session=requests):
+    """
+    Every entity of kind from its owning service, parsed as the response
+    streams in; None on an error response.
+    """
+    with session.get(ENTITY_URLS[kind], timeout=10, stream=True) as response:
+        if response.status_code != 200:
+            yield None
+        else:
+            yield iter_json_array(_payload_chunks(kind, response))
+
+
+def sync_index(kind, session=requests):
+    """Full pull of one entity type from its owning service."""
+    started = time.perf_counter()
+    with tracking_event_changes(kind) as touched, streamed_entities(kind, session) as documents:
+        if documents is None:
+            return None
+        count = install_documents(kind, documents, touched)
+    SYNC_SECONDS.labels(kind).observe(time.perf_counter() - started)
+    return count
+
+
 def sync_pets_index():
     """Synchronize pets index from Pet Service."""
     try:
-        response = requests.get(f"{PET_SERVICE_URL}/api/pets", timeout=10)
-        if response.status_code == 200:
-            pets = response.json()
-            in_memory_index["pets"] = pets
-            
-            # Index to Solr if available
-            if solr_available:
-                solr_docs = [
-                    {
-                        "id": f"pet_{pet['id']}",
-                        "type": "pet",
-                        "entity_id": pet['id'],
-                        "name": pet.get('name', ''),
-                        "species": pet.get('species', ''),
-                        "breed": pet.get('breed', ''),
-                        "owner": pet.get('ownerName', ''),
-                        "searchable_text": f"{pet.get('name', '')} {pet.get('species', '')} {pet.get('breed', '')} {pet.get('ownerName', '')}"
-                    }
-                    for pet in pets
-                ]
-                index_to_solr(PETS_COLLECTION, solr_docs)
-            
-            logger.info(f"Synced {len(pets)} pets to index")
+        count = sync_index("pets")
+        if count is not None:
+            logger.info(f"Synced {count} pets to index")
             return True
     except Exception as e:
         logger.warning(f"Failed to sync pets: {e}")
@@ -200,54 +2758,394 @@ def sync_pets_index():
 def sync_appointments_index():
     """Synchronize appointments index from Appointment Service."""
     try:
-        response = requests.get(f"{APPOINTMENT_SERVICE_URL}/api/appointments", timeout=10)
-        if response.status_code == 200:
-            appointments = response.json()
-            in_memory_index["appointments"] = appointments
-            
-            # Index to Solr if available
-            if solr_available:
-                solr_docs = [
-                    {
-                        "id": f"appt_{appt['id']}",
-                        "type": "appointment",
-                        "entity_id": appt['id'],
-                        "pet_id": appt.get('petId'),
-                        "date": appt.get('date', ''),
-                        "time": appt.get('time', ''),
-                        "appointment_type": appt.get('appointmentType', ''),
-                        "status": appt.get('status', ''),
-                        "notes": appt.get('notes', ''),
-                        "searchable_text": f"{appt.get('appointmentType', '')} {appt.get('date', '')} {appt.get('notes', '')}"
-                    }
-                    for appt in appointments
-                ]
-                index_to_solr(APPOINTMENTS_COLLECTION, solr_docs)
-            
-            logger.info(f"Synced {len(appointments)} appointments to index")
+        count = sync_index("appointments")
+        if count is not None:
+            logger.info(f"Synced {count} appointments to index")
             return True
     except Exception as e:
         logger.warning(f"Failed to sync appointments: {e}")
     return False
 
 
-def perform_in_memory_search(query, search_pets=True, search_appointments=True):
-    """Perform search on in-memory index."""
-    results = {"pets": [], "appointments": []}
-    query_lower = query.lower()
+def sync_from_state_topics(consumer=None):
+    """
+    Reload the indexes from the compacted entity-state topics. Returns the
+    entity types reloaded; those whose topic is empty are left to HTTP.
+    """
+    started = time.perf_counter()
+    synced = set()
+    own_consumer = consumer is None
+    try:
+        if own_consumer:
+            consumer = state_topic_consumer()
+        with ExitStack() as stack:
+            touched = {kind: stack.enter_context(tracking_event_changes(kind)) for kind in STATE_TOPICS}
+            read_started = time.perf_counter()
+            states = read_state_topics(consumer) or {}
+            record_span("kafka", time.perf_counter() - read_started)
+            for kind, values in states.items():
+                if values:
+                    count = install_documents(kind, map(json.loads, values.values()), touched[kind])
+                    synced.add(kind)
+                    logger.info(f"Bootstrapped {count} {kind} from {STATE_TOPICS[kind]}")
+    except Exception as e:
+        logger.warning(f"⚠️ Entity-state bootstrap failed: {e}")
+    finally:
+        if own_consumer and consumer is not None:
+            consumer.close()
+    if synced:
+        elapsed = time.perf_counter() - started
+        for kind in synced:
+            SYNC_SECONDS.labels(kind).observe(elapsed)
+    return synced
+
+
+def full_sync():
+    """Reload every index per SEARCH_BOOTSTRAP; True if anything was reloaded."""
+    started = time.perf_counter()
+    reset_peak_rss()
+    synced = sync_from_state_topics() if SEARCH_BOOTSTRAP == "kafka" else set()
+    if "pets" not in synced and sync_pets_index():
+        synced.add("pets")
+    if "appointments" not in synced and sync_appointments_index():
+        synced.add("appointments")
+    peak = peak_rss_bytes()
+    SYNC_PEAK_RSS_BYTES.set(peak)
+    logger.info(
+        f"Full sync of {', '.join(sorted(synced)) or 'nothing'} took "
+        f"{time.perf_counter() - started:.1f}s, peak RSS {peak / 2 ** 20:.0f} MiB"
+    )
+    return bool(synced)
+
+
+def _solr_entity_ids(collection):
+    """Every entity id stored in a Solr collection, paged with a cursor."""
+    entity_ids = []
+    cursor = "*"
+    while True:
+        response = requests.get(
+            f"{SOLR_URL}/{collection}/select",
+            params={"q": "*:*", "fl": "entity_id", "sort": "id asc", "rows": 1000,
+                    "cursorMark": cursor, "wt": "json"},
+            timeout=SOLR_QUERY_TIMEOUT
+        )
+        response.raise_for_status()
+        body = response.json()
+        entity_ids.extend(_solr_value(doc.get("entity_id")) for doc in body["response"]["docs"])
+        if body["nextCursorMark"] == cursor:
+            return entity_ids
+        cursor = body["nextCursorMark"]
+
+
+def resync_solr():
+    """
+    Rebuild Solr from the in-memory index after an outage: upsert every
+    live document, then delete what was removed while Solr was down.
+    """
+    for collection in (PETS_COLLECTION, APPOINTMENTS_COLLECTION):
+        create_solr_collection(collection)
+    for kind, (collection, solr_doc, id_prefix) in SOLR_TARGETS.items():
+        with tracking_event_changes(kind) as touched:
+            index = current_snapshot.index(kind)
+            batch = []
+            for document in index.documents():
+                batch.append(solr_doc(document))
+                if len(batch) >= SYNC_CHUNK_SIZE:
+                    if not index_to_solr(collection, batch):
+                        raise RuntimeError(f"Solr rejected {kind} documents")
+                    batch = []
+            if batch and not index_to_solr(collection, batch):
+                raise RuntimeError(f"Solr rejected {kind} documents")
+            
+            solr_ids = _solr_entity_ids(collection)
+            with index_write_lock:
+                # Events applied meanwhile already went to Solr and are newer
+                current = current_snapshot.index(kind)
+                push_changes_to_solr(kind, {entity_id: current.get(entity_id) for entity_id in touched})
+                stale = [f"{id_prefix}{entity_id}" for entity_id in solr_ids if current.get(entity_id) is None]
+                if stale:
+                    delete_from_solr(collection, stale)
+        logger.info(f"Re-indexed {len(index)} {kind} into Solr, removed {len(stale)} stale")
+
+
+def background_full_sync():
+    """Reconcile with the owning services after a warm start, then snapshot."""
+    # Wait until Kafka positions are fixed so no event falls between them and the pull
+    kafka_positions_ready.wait(timeout=30)
+    if full_sync():
+        save_index_snapshot()
+
+
+SEARCH_KINDS = (
+    ("pets", PETS_COLLECTION, PET_SOLR_FIELDS, PETS_QUERY_FIELDS),
+    ("appointments", APPOINTMENTS_COLLECTION, APPOINTMENT_SOLR_FIELDS, APPOINTMENTS_QUERY_FIELDS),
+)
+
+
+def facet_entries(counts):
+    return [{"value": value, "count": count} for value, count in counts]
+
+
+def perform_in_memory_search(query, search_pets=True, search_appointments=True,
+                             limit=DEFAULT_SEARCH_LIMIT, offset=0, snapshot=None, fuzzy=False,
+                             filters=None, facets=False):
+    """
+    Perform a ranked, paged search on an in-memory index snapshot. Fuzzy
+    searches match names within a few typos, closest spelling first.
+    filters is {kind: {param: [values] or (low, high)}}; with facets the
+    per-value counts of the matching documents are returned as well.
+    """
+    snapshot = snapshot or current_snapshot
+    filters = filters or {}
+    results = {"pets": [], "appointments": [], "total": {"pets": 0, "appointments": 0}}
+    if facets:
+        results["facets"] = {}
+    
+    for kind, wanted in (("pets", search_pets), ("appointments", search_appointments)):
+        if not wanted:
+            continue
+        fields = {param: field for param, field, _ in FACET_FIELDS[kind] + RANGE_FIELDS[kind]}
+        total, hits, counts = snapshot.index(kind).query(
+            query, limit, offset, fuzzy=fuzzy,
+            filters={fields[param]: values for param, values in filters.get(kind, {}).items()},
+            facets=[field for _, field, _ in FACET_FIELDS[kind]] if facets else ()
+        )
+        results[kind] = hits
+        results["total"][kind] = total
+        if facets:
+            results["facets"][kind] = {
+                param: facet_entries(counts[field]) for param, field, _ in FACET_FIELDS[kind]
+            }
+    
+    return results
+
+
+def perform_solr_search(query, search_pets=True, search_appointments=True,
+                        limit=DEFAULT_SEARCH_LIMIT, offset=0, filters=None, facets=False):
+    """Perform a ranked, paged edismax search on Solr. Returns None if Solr fails."""
+    filters = filters or {}
+    results = {"pets": [], "appointments": [], "total": {"pets": 0, "appointments": 0}}
+    if facets:
+        results["facets"] = {}
+    
+    for kind, collection, field_map, query_fields in SEARCH_KINDS:
+        if not (search_pets if kind == "pets" else search_appointments):
+            continue
+        if query:
+            solr_query, params = escape_solr_query(query), build_edismax_params(query_fields)
+        else:
+            solr_query, params = "*:*", {}
+        params["fq"] = solr_filter_queries(kind, filters.get(kind, {}))
+        if facets:
+            params.update({
+                "facet": "true",
+                "facet.field": [solr_field for _, _, solr_field in FACET_FIELDS[kind]],
+                "facet.limit": -1,
+                "facet.mincount": 1,
+                "facet.sort": "count"
+            })
+        solr_results = search_solr(
+            collection, solr_query, rows=limit, start=offset,
+            fields=[f for f, _ in field_map], params=params
+        )
+        if solr_results is None:
+            return None
+        results[kind] = hydrate_solr_docs(solr_results.get("docs", []), field_map)
+        results["total"][kind] = solr_results.get("numFound", 0)
+        if facets:
+            facet_fields = solr_results.get("facet_fields", {})
+            results["facets"][kind] = {}
+            for param, _, solr_field in FACET_FIELDS[kind]:
+                flat = facet_fields.get(solr_field, [])
+                results["facets"][kind][param] = facet_entries(zip(flat[::2], flat[1::2]))
+    
+    return results
+
+
+def normalize_query(query):
+    """Canonical form of a query for cache keys."""
+    return " ".join(query.lower().split())
+
+
+def _filters_key(filters):
+    return tuple(
+        (kind, param, tuple(wanted))
+        for kind in sorted(filters or {})
+        for param, wanted in sorted(filters[kind].items())
+    )
+
+
+def _cache_entry(backend, results):
+    """
+    What the query cache keeps for a result. In-memory hits are kept as ids
+    and re-read from the snapshot of the same generation; Solr pages are
+    kept whole, since Solr documents differ from the in-memory ones.
+    """
+    if backend == "solr":
+        cached = {
+            "docs": True,
+            "pets": list(results["pets"]),
+            "appointments": list(results["appointments"]),
+            "total": dict(results["total"])
+        }
+    else:
+        cached = {
+            "docs": False,
+            "pets": [pet.get("id") for pet in results["pets"]],
+            "appointments": [appt.get("id") for appt in results["appointments"]],
+            "total": dict(results["total"])
+        }
+    if "facets" in results:
+        cached["facets"] = results["facets"]
+    return cached
+
+
+def _cached_results(cached, snapshot):
+    """A fresh result dict from a cache entry, identical to the one that filled it."""
+    if cached["docs"]:
+        pets, appointments = list(cached["pets"]), list(cached["appointments"])
+    else:
+        pets = [pet for pet in map(snapshot.pets.get, cached["pets"]) if pet is not None]
+        appointments = [
+            appt for appt in map(snapshot.appointments.get, cached["appointments"]) if appt is not None
+        ]
+    results = {"pets": pets, "appointments": appointments, "total": dict(cached["total"])}
+    if "facets" in cached:
+        results["facets"] = cached["facets"]
+    return results
+
+
+def run_search(query, search_pets=True, search_appointments=True,
+               limit=DEFAULT_SEARCH_LIMIT, offset=0, snapshot=None, fuzzy=False,
+               filters=None, facets=False):
+    """
+    Search Solr first, falling back to the in-memory index. Fuzzy searches
+    always run in memory. Results are cached.
+    """
+    started = time.perf_counter()
+    snapshot = snapshot or current_snapshot
+    if fuzzy:
+        backend = "fuzzy"
+    else:
+        backend = "solr" if solr_available else "memory"
+    key = (
+        backend, normalize_query(query), search_pets, search_appointments, limit, offset,
+        _filters_key(filters), facets
+    )
+    cached = query_cache.get(key, snapshot.generation)
+    if cached is not None:
+        results = _cached_results(cached, snapshot)
+        observe_search("cache", started, results)
+        return results
     
-    if search_pets:
-        for pet in in_memory_index["pets"]:
-            searchable = f"{pet.get('name', '')} {pet.get('species', '')} {pet.get('breed', '')} {pet.get('ownerName', '')}".lower()
-            if query_lower in searchable:
-                results["pets"].append(pet)
+    results = None
+    if backend == "fuzzy":
+        results = perform_in_memory_search(
+            query, search_pets, search_appointments, limit, offset, snapshot,
+            fuzzy=True, filters=filters, facets=facets
+        )
+    elif backend == "solr":
+        results = perform_solr_search(
+            query, search_pets, search_appointments, limit, offset, filters=filters, facets=facets
+        )
+    if results is None:
+        backend = "memory"
+        results = perform_in_memory_search(
+            query, search_pets, search_appointments, limit, offset, snapshot,
+            filters=filters, facets=facets
+        )
+        key = (backend,) + key[1:]
     
-    if search_appointments:
-        for appt in in_memory_index["appointments"]:
-            searchable = f"{appt.get('appointmentType', '')} {appt.get('date', '')} {appt.get('notes', '')}".lower()
-            if query_lower in searchable:
-                results["appointments"].append(appt)
+    query_cache.put(key, snapshot.generation, _cache_entry(backend, results))
+    observe_search(backend, started, results)
+    return results
+
+
+def get_pagination(args=None):
+    """Read limit/offset query params, clamped to sane bounds."""
+    args = request.args if args is None else args
+    limit = args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    offset = args.get('offset', 0, type=int)
+    return max(1, min(limit, MAX_SEARCH_LIMIT)), max(0, offset)
+
+
+def get_fuzzy(args=None):
+    """Read the fuzzy=1 query param."""
+    args = request.args if args is None else args
+    return args.get('fuzzy', '0').lower() in ('1', 'true')
+
+
+def get_filters(args=None):
+    """
+    Read filter query params into {kind: {param: [values] or (low, high)}}.
+    Values may be repeated or comma separated; ranges use <param>_from/_to.
+    """
+    args = request.args if args is None else args
+    filters = {}
+    for kind in FACET_FIELDS:
+        kind_filters = {}
+        for param, _, _ in FACET_FIELDS[kind]:
+            values = [value for arg in args.getlist(param) for value in arg.split(',') if value]
+            if values:
+                kind_filters[param] = values
+        for param, _, _ in RANGE_FIELDS[kind]:
+            low = args.get(f'{param}_from') or None
+            high = args.get(f'{param}_to') or None
+            if low or high:
+                kind_filters[param] = (low, high)
+        if kind_filters:
+            filters[kind] = kind_filters
+    return filters
+
+
+def get_search_params(args=None):
+    """
+    Read the /api/search query params into run_search() keyword arguments,
+    or None if there is nothing to search for.
+    """
+    args = request.args if args is None else args
+    query = args.get('q', '')
+    search_pets = args.get('pets', 'true').lower() == 'true'
+    search_appointments = args.get('appointments', 'true').lower() == 'true'
+    limit, offset = get_pagination(args)
+    filters = get_filters(args)
+    facets = args.get('facets', '0').lower() in ('1', 'true')
     
+    if not query and not filters and not facets:
+        return None
+    if not query and filters:
+        # Browsing by filters: only the entity types being filtered
+        search_pets = search_pets and "pets" in filters
+        search_appointments = search_appointments and "appointments" in filters
+    return {
+        "query": query,
+        "search_pets": search_pets,
+        "search_appointments": search_appointments,
+        "limit": limit,
+        "offset": offset,
+        "fuzzy": get_fuzzy(args),
+        "filters": filters,
+        "facets": facets
+    }
+
+
+def batch_query_args(entry):
+    """One /api/search/batch query as request args, so it reads like an /api/search URL."""
+    args = MultiDict()
+    for key, value in entry.items():
+        for item in value if isinstance(value, list) else [value]:
+            if item is not None:
+                args.add(key, str(item).lower() if isinstance(item, bool) else str(item))
+    return args
+
+
+def search_response(params, snapshot=None):
+    """Body of an /api/search response for get_search_params() output."""
+    if params is None:
+        return {"pets": [], "appointments": [], "message": "No search query provided"}
+    results = run_search(snapshot=snapshot, **params)
+    results["limit"] = params["limit"]
+    results["offset"] = params["offset"]
     return results
 
 
@@ -258,12 +3156,15 @@ def perform_in_memory_search(query, search_pets=True, search_appointments=True):
 @app.route('/health')
 def health():
     """Health check endpoint."""
+    snapshot = current_snapshot
     return jsonify({
         "status": "UP",
         "service": "search-service",
         "solr": "connected" if solr_available else "disconnected",
-        "indexed_pets": len(in_memory_index["pets"]),
-        "indexed_appointments": len(in_memory_index["appointments"])
+        "solr_breaker": solr_breaker.status(),
+        "indexed_pets": len(snapshot.pets),
+        "indexed_appointments": len(snapshot.appointments),
+        "index_generation": snapshot.generation
     })
 
 
@@ -275,82 +3176,125 @@ def search():
         - q: search query string
         - pets: search pets (true/false)
         - appointments: search appointments (true/false)
+        - limit: page size per entity type (default 50, max 1000)
+        - offset: number of ranked hits to skip
+        - fuzzy: 1 to match misspelled pet and owner names
+        - species, breed: pet filters (repeat or comma-separate for any of several)
+        - status, appointment_type, date_from, date_to: appointment filters
+        - facets: 1 to add per-value counts of the matching documents
+    Without q, everything passing the filters is returned.
     """
-    query = request.args.get('q', '')
-    search_pets = request.args.get('pets', 'true').lower() == 'true'
-    search_appointments = request.args.get('appointments', 'true').lower() == 'true'
-    
-    if not query:
-        return jsonify({"pets": [], "appointments": [], "message": "No search query provided"})
-    
-    # Try Solr first
-    if solr_available:
-        results = {"pets": [], "appointments": []}
-        
-        if search_pets:
-            solr_results = search_solr(PETS_COLLECTION, f"searchable_text:*{query}*")
-            if solr_results:
-                # Map back to pet objects (Solr returns arrays, get first element)
-                pet_ids = set()
-                for r in solr_results:
-                    eid = r.get('entity_id')
-                    if isinstance(eid, list):
-                        pet_ids.add(eid[0] if eid else None)
-                    else:
-                        pet_ids.add(eid)
-                results["pets"] = [p for p in in_memory_index["pets"] if p.get('id') in pet_ids]
-        
-        if search_appointments:
-            solr_results = search_solr(APPOINTMENTS_COLLECTION, f"searchable_text:*{query}*")
-            if solr_results:
-                appt_ids = set()
-                for r in solr_results:
-                    eid = r.get('entity_id')
-                    if isinstance(eid, list):
-                        appt_ids.add(eid[0] if eid else None)
-                    else:
-                        appt_ids.add(eid)
-                results["appointments"] = [a for a in in_memory_index["appointments"] if a.get('id') in appt_ids]
-        
-        return jsonify(results)
+    return jsonify(search_response(get_search_params()))
+
+
+@app.route('/api/search/batch', methods=['POST'])
+def search_batch():
+    """
+    Run several searches in one request, all against the same index snapshot.
+    Body: {"queries": [{"id": "today", "q": "...", "status": ["SCHEDULED"], ...}]}
+    where each query takes the /api/search params (lists for repeated ones).
+    Returns {"results": [...]} in query order, each an /api/search response
+    carrying the query's id. While Solr is up the queries run concurrently
+    over pooled connections.
+    """
+    queries = (request.get_json(silent=True) or {}).get("queries")
+    if not isinstance(queries, list) or not all(isinstance(entry, dict) for entry in queries):
+        return jsonify({"error": "Expected a JSON body {\"queries\": [{...}, ...]}"}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({"error": f"At most {MAX_BATCH_QUERIES} queries per batch"}), 400
     
-    # Fallback to in-memory search
-    results = perform_in_memory_search(query, search_pets, search_appointments)
-    return jsonify(results)
+    snapshot = current_snapshot
+    params = [get_search_params(batch_query_args(entry)) for entry in queries]
+    if solr_available and len(queries) > 1:
+        pool = solr_query_pool()
+        futures = [
+            pool.submit(copy_current_request_context(search_response), p, snapshot)
+            for p in params
+        ]
+        results = [future.result() for future in futures]
+    else:
+        results = [search_response(p, snapshot) for p in params]
+    for entry, result in zip(queries, results):
+        if "id" in entry:
+            result["id"] = entry["id"]
+    return jsonify({"results": results, "generation": snapshot.generation})
 
 
 @app.route('/api/search/pets')
 def search_pets():
-    """Search pets only."""
+    """Search pets only, with the /api/search pet filters. The total hit count is sent in X-Total-Count."""
     query = request.args.get('q', '')
-    if not query:
+    filters = get_filters()
+    if not query and not filters:
         return jsonify([])
     
-    results = perform_in_memory_search(query, search_pets=True, search_appointments=False)
-    return jsonify(results["pets"])
+    limit, offset = get_pagination()
+    results = run_search(
+        query, search_pets=True, search_appointments=False, limit=limit, offset=offset,
+        fuzzy=get_fuzzy(), filters=filters
+    )
+    response = jsonify(results["pets"])
+    response.headers["X-Total-Count"] = str(results["total"]["pets"])
+    return response
 
 
 @app.route('/api/search/appointments')
 def search_appointments():
-    """Search appointments only."""
+    """Search appointments only, with the /api/search appointment filters. The total hit count is sent in X-Total-Count."""
     query = request.args.get('q', '')
-    if not query:
+    filters = get_filters()
+    if not query and not filters:
         return jsonify([])
     
-    results = perform_in_memory_search(query, search_pets=False, search_appointments=True)
-    return jsonify(results["appointments"])
+    limit, offset = get_pagination()
+    results = run_search(
+        query, search_pets=False, search_appointments=True, limit=limit, offset=offset,
+        fuzzy=get_fuzzy(), filters=filters
+    )
+    response = jsonify(results["appointments"])
+    response.headers["X-Total-Count"] = str(results["total"]["appointments"])
+    return response
+
+
+@app.route('/api/search/suggest')
+def suggest():
+    """
+    Complete the last word of a search box prefix from pet and owner names.
+    Query params:
+        - prefix: text typed so far
+        - limit: number of suggestions (default 10, max 25)
+    """
+    tokens = tokenize(request.args.get('prefix', ''))
+    limit = max(1, min(request.args.get('limit', DEFAULT_SUGGEST_LIMIT, type=int), MAX_SUGGEST_LIMIT))
+    if not tokens:
+        return jsonify({"prefix": "", "suggestions": []})
+    
+    suggestions = current_snapshot.pets.suggest(tokens[-1], limit)
+    return jsonify({
+        "prefix": tokens[-1],
+        "suggestions": [{"term": term, "count": count} for term, count in suggestions]
+    })
 
 
 @app.route('/api/search/reindex', methods=['POST'])
 def reindex():
     """Trigger reindexing of all data."""
-    pets_synced = sync_pets_index()
-    appointments_synced = sync_appointments_index()
+    if serving_mode == "worker":
+        # Only the indexer process writes the index; it syncs in the background
+        try:
+            request_indexer_reindex()
+        except Exception as e:
+            return jsonify({"success": False, "message": f"Indexer not reachable: {e}"}), 503
+        return jsonify({"success": True, "message": "Reindex scheduled"}), 202
     
+    synced = full_sync()
+    
+    snapshot = current_snapshot
     return jsonify({
-        "success": pets_synced or appointments_synced,
-        "pets_indexed": len(in_memory_index["pets"]),
-        "appointments_indexed": len(in_memory_index["appointments"]),
+        "success": synced,
+        "pets_indexed": len(snapshot.pets),
+        "appointments_indexed": len(snapshot.appointments),
+        "peak_rss_mb": round(peak_rss_bytes() / 2 ** 20, 1),
         "solr_available": solr_available
     })
 
@@ -358,13 +3302,18 @@ def reindex():
 @app.route('/api/search/stats')
 def stats():
     """Get search index statistics."""
+    snapshot = current_snapshot
     return jsonify({
         "solr_url": SOLR_URL,
         "solr_available": solr_available,
         "in_memory_index": {
-            "pets": len(in_memory_index["pets"]),
-            "appointments": len(in_memory_index["appointments"])
-        }
+            "pets": len(snapshot.pets),
+            "appointments": len(snapshot.appointments),
+            "generation": snapshot.generation,
+            "pending_delta": len(snapshot.pets.delta) + len(snapshot.appointments.delta),
+            "live_snapshots": len(_live_snapshots)
+        },
+        "query_cache": query_cache.stats()
     })
 
 
@@ -390,24 +3339,57 @@ def initialize():
         create_solr_collection(PETS_COLLECTION)
         create_solr_collection(APPOINTMENTS_COLLECTION)
     
-    # Initial sync
-    sync_pets_index()
-    sync_appointments_index()
+    # Warm start from the last snapshot; Kafka replays what came after it
+    load_index_snapshot()
     
     # Start Kafka consumer in background thread
     kafka_thread = threading.Thread(target=start_kafka_consumer, daemon=True)
     kafka_thread.start()
     
+    # Full sync and periodic snapshots run in the background
+    threading.Thread(target=background_full_sync, daemon=True).start()
+    threading.Thread(target=snapshot_loop, daemon=True).start()
+    threading.Thread(target=solr_breaker_loop, daemon=True).start()
+    
+    snapshot = current_snapshot
     print(f"""
 ╔════════════════════════════════════════════════════════════════╗
 ║   🎮 SEARCH SERVICE ONLINE - PORT 8082                         ║
 ║   Solr:     {("CONNECTED" if solr_available else "DISCONNECTED"):12}                              ║
-║   Pets:     {len(in_memory_index["pets"]):4} indexed                                   ║
-║   Appts:    {len(in_memory_index["appointments"]):4} indexed                                   ║
+║   Pets:     {len(snapshot.pets):4} indexed                                   ║
+║   Appts:    {len(snapshot.appointments):4} indexed                                   ║
 ╚════════════════════════════════════════════════════════════════╝
     """)
 
 
-if __name__ == '__main__':
+def init_worker():
+    """Prefork worker: serve the indexer's shared index read-only."""
+    global serving_mode
+    serving_mode = "worker"
+    check_solr_connection()
+    follow_indexer_breaker()
+    threading.Thread(target=solr_breaker_loop, daemon=True).start()
+    refresh_shared_index()
+    logger.info(f"Search worker {os.getpid()} serving shared index generation {current_snapshot.generation}")
+
+
+def run_indexer():
+    """Prefork indexer: own Kafka, syncs and Solr writes; export to the workers."""
+    global serving_mode
+    serving_mode = "indexer"
     initialize()
-    app.run(host='0.0.0.0', port=8082, debug=False)
+    signal.signal(signal.SIGUSR1, lambda *_: threading.Thread(target=background_full_sync, daemon=True).start())
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    threading.Thread(target=shared_index_export_loop, daemon=True).start()
+    parent_pid = os.getppid()
+    while os.getppid() == parent_pid:
+        time.sleep(1)
+    logger.info("Serving master exited, stopping indexer")
+
+
+if __name__ == '__main__':
+    if "--indexer" in sys.argv:
+        run_indexer()
+    else:
+        initialize()
+        app.run(host='0.0.0.0', port=8082, debug=False)
@@ -0,0 +1,439 @@
+"""
+Benchmark suite: full sync, event updates, query latency and memory.
+
+Generates a synthetic corpus of pets and appointments, serves it from local
+stand-ins for the pet service, the appointment service and Solr (run in a
+separate process so they do not compete with the code being measured), and
+drives app.py against them:
+
+    sync     full sync time and peak RSS per entity type
+    events   apply_events() cost, one event at a time and in poll-sized batches
+    queries  perform_in_memory_search() and perform_solr_search() latency
+             percentiles per query class
+    memory   resident memory of the loaded index
+
+The Solr stand-in answers instantly with synthetic hits, so the Solr numbers
+are the service's own overhead (request building, HTTP, hydration); pass
+--solr-url to measure a real Solr instead, and see solr_query_bench.py for
+Solr-side query cost. Results are printed as JSON (or written to --output);
+with --baseline the run exits non-zero if any time or memory figure regressed
+by more than --tolerance.
+
+    python benchmarks/search_bench.py --pets 100000 --appointments 200000 --output bench.json
+    python benchmarks/search_bench.py --pets 100000 --appointments 200000 --baseline bench.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import app  # noqa: E402
+
+NAMES = ["Max", "Whiskers", "Buddy", "Tweety", "Snowball", "Nemo", "Rocky", "Luna", "Bella", "Charlie",
+         "Daisy", "Milo", "Coco", "Oreo", "Pepper", "Simba"]
+SPECIES = ["DOG", "CAT", "BIRD", "RABBIT", "FISH", "REPTILE", "HAMSTER"]
+BREEDS = ["Labrador", "Siamese", "Parakeet", "Holland Lop", "Goldfish", "Iguana", "Syrian", "Beagle",
+          "Persian", "Poodle", "Bulldog", "Maine Coon"]
+FIRST_NAMES = ["John", "Jane", "Bob", "Alice", "Charlie", "Eva", "Grace", "Henry", "Ivy", "Oscar"]
+LAST_NAMES = ["Smith", "Doe", "Wilson", "Brown", "Davis", "Martinez", "Lee", "Garcia", "Nguyen", "Kowalski"]
+STATUSES = ["SCHEDULED", "CONFIRMED", "COMPLETED", "CANCELLED", "NO_SHOW"]
+APPOINTMENT_TYPES = ["CHECKUP", "VACCINATION", "SURGERY", "EMERGENCY", "DENTAL", "GROOMING"]
+NOTE_WORDS = ["annual", "booster", "limping", "follow-up", "allergy", "skin", "diet", "weight", "ear",
+              "infection", "vomiting", "stitches", "x-ray", "bloodwork", "senior", "puppy", "nails"]
+FIRST_DATE = date(2024, 1, 1)
+
+# Query classes: each entry is perform_*_search() keyword arguments
+QUERY_MIX = {
+    "term": [{"query": "max"}, {"query": "labrador"}, {"query": "smith"}, {"query": "vaccination"}],
+    "partial": [{"query": "whisk"}, {"query": "holl"}, {"query": "mart"}, {"query": "infect"}],
+    "multi_term": [{"query": "luna garcia"}, {"query": "beagle nguyen"}, {"query": "annual checkup"}],
+    "fuzzy": [{"query": "whiskrs", "fuzzy": True}, {"query": "charly", "fuzzy": True},
+              {"query": "kowalsky", "fuzzy": True}],
+    "filtered": [
+        {"query": "max", "filters": {"pets": {"species": ["DOG"]}}},
+        {"query": "checkup", "filters": {"appointments": {"status": ["SCHEDULED", "CONFIRMED"]}}},
+        {"query": "", "search_pets": False,
+         "filters": {"appointments": {"date": ("2024-03-01", "2024-03-31")}}},
+    ],
+    "facets": [
+        {"query": "", "search_appointments": False, "facets": True},
+        {"query": "smith", "facets": True},
+    ],
+}
+
+
+# ═══════════════════════════════════════════════════════════════
+# SYNTHETIC CORPUS
+# ═══════════════════════════════════════════════════════════════
+#
+# Every entity is a pure function of its id, so the stand-ins can serve
+# any of millions of them without holding the corpus in memory.
+
+def _mix(i, salt):
+    """Deterministic 64-bit hash of (i, salt) (splitmix64 finaliser)."""
+    x = (i * 0x9E3779B97F4A7C15 + salt * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return x ^ (x >> 31)
+
+
+def _pick(options, i, salt):
+    return options[_mix(i, salt) % len(options)]
+
+
+def synthetic_pet(i):
+    first, last = _pick(FIRST_NAMES, i, 5), _pick(LAST_NAMES, i, 6)
+    created = FIRST_DATE + timedelta(days=_mix(i, 7) % 365)
+    return {
+        "id": i,
+        "name": f"{_pick(NAMES, i, 1)}{_mix(i, 2) % 1000}",
+        "species": _pick(SPECIES, i, 3),
+        "breed": _pick(BREEDS, i, 4),
+        "age": _mix(i, 8) % 20,
+        "ownerName": f"{first} {last}",
+        "ownerEmail": f"{first.lower()}.{last.lower()}{i}@example.com",
+        "ownerPhone": f"555-{_mix(i, 9) % 10000:04d}",
+        "medicalNotes": " ".join(_pick(NOTE_WORDS, i, 10 + k) for k in range(_mix(i, 11) % 4)) or None,
+        "createdAt": f"{created.isoformat()}T09:00:00",
+        "updatedAt": f"{created.isoformat()}T09:00:00",
+    }
+
+
+def synthetic_appointment(i, pets):
+    pet = synthetic_pet(1 + _mix(i, 1) % pets)
+    hour, quarter = 8 + _mix(i, 4) % 10, _mix(i, 5) % 4
+    return {
+        "id": i,
+        "petId": pet["id"],
+        "vetId": 1 + _mix(i, 2) % 50,
+        "date": (FIRST_DATE + timedelta(days=_mix(i, 3) % 730)).isoformat(),
+        "time": f"{hour:02d}:{quarter * 15:02d}",
+        "endTime": f"{hour:02d}:{quarter * 15 + 14:02d}",
+        "appointmentType": _pick(APPOINTMENT_TYPES, i, 6),
+        "status": _pick(STATUSES, i, 7),
+        "notes": " ".join(_pick(NOTE_WORDS, i, 10 + k) for k in range(1 + _mix(i, 8) % 6)),
+        "petName": pet["name"],
+        "ownerName": pet["ownerName"],
+        "createdAt": "2024-01-01T09:00:00",
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# STAND-INS (pet service, appointment service, Solr)
+# ═══════════════════════════════════════════════════════════════
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+    pets = 0
+    appointments = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _entity(self, kind, i):
+        if kind == "pets":
+            return synthetic_pet(i) if 1 <= i <= self.pets else None
+        return synthetic_appointment(i, self.pets) if 1 <= i <= self.appointments else None
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream_all(self, kind):
+        """The whole collection as one chunked JSON array, generated on the fly."""
+        count = self.pets if kind == "pets" else self.appointments
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for start in range(1, count + 1, 1000):
+            items = ",".join(json.dumps(self._entity(kind, i)) for i in range(start, min(start + 1000, count + 1)))
+            chunk = (("[" if start == 1 else ",") + items).encode("utf-8")
+            self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+        tail = b"]" if count else b"[]"
+        self.wfile.write(f"{len(tail):x}\r\n".encode() + tail + b"\r\n0\r\n\r\n")
+
+    def _solr_select(self, collection, params):
+        kind = "pets" if collection == app.PETS_COLLECTION else "appointments"
+        count = self.pets if kind == "pets" else self.appointments
+        rows = int(params.get("rows", ["10"])[0])
+        start = int(params.get("start", ["0"])[0])
+        seed = sum(map(ord, params.get("q", [""])[0]))
+        found = min(count, 1 + _mix(seed, 1) % 5000)
+        solr_doc = app.pet_solr_doc if kind == "pets" else app.appointment_solr_doc
+        docs = []
+        for n in range(start, min(found, start + rows)):
+            docs.append(solr_doc(self._entity(kind, 1 + _mix(seed, n) % count)))
+        body = {"response": {"numFound": found, "start": start, "docs": docs}}
+        if params.get("facet") == ["true"]:
+            values = {"species": SPECIES, "breed_facet": BREEDS, "status": STATUSES,
+                      "appointment_type": APPOINTMENT_TYPES}
+            body["facet_counts"] = {"facet_fields": {
+                field: [x for k, value in enumerate(values.get(field, ())) for x in (value, found // (k + 2))]
+                for field in params.get("facet.field", [])
+            }}
+        self._send_json(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts[0] == "api" and len(parts) in (2, 3) and parts[1] in ("pets", "appointments"):
+            if len(parts) == 2:
+                return self._stream_all(parts[1])
+            entity = self._entity(parts[1], int(parts[2]))
+            return self._send_json(entity or {"detail": "Not found"}, 200 if entity else 404)
+        if parts[0] == "solr" and parts[-1] == "select":
+            return self._solr_select(parts[1], parse_qs(url.query))
+        if parts[0] == "solr":
+            return self._send_json({"responseHeader": {"status": 0}})
+        self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        # Solr updates: read and drop
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send_json({"responseHeader": {"status": 0}})
+
+
+def _serve_standins(pets, appointments, ready):
+    StandInHandler.pets = pets
+    StandInHandler.appointments = appointments
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+def start_standins(pets, appointments):
+    """Run the stand-ins in a child process; returns (process, base URL)."""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_serve_standins, args=(pets, appointments, ready), daemon=True
+    )
+    process.start()
+    return process, f"http://127.0.0.1:{ready.get(timeout=30)}"
+
+
+# ═══════════════════════════════════════════════════════════════
+# MEASUREMENTS
+# ═══════════════════════════════════════════════════════════════
+
+def rss_bytes():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def mib(size):
+    return round(size / 2 ** 20, 1)
+
+
+def percentiles(latencies):
+    """Latency summary in milliseconds of a list of seconds."""
+    latencies = sorted(latencies)
+    at = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))]  # noqa: E731
+    return {
+        "count": len(latencies),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(at(0.95) * 1000, 3),
+        "p99_ms": round(at(0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+def bench_sync(kind):
+    app.reset_peak_rss()
+    before = rss_bytes()
+    started = time.perf_counter()
+    count = app.sync_index(kind)
+    elapsed = time.perf_counter() - started
+    if count is None:
+        raise RuntimeError(f"Stand-in refused the {kind} sync")
+    return {
+        "documents": count,
+        "seconds": round(elapsed, 3),
+        "documents_per_second": round(count / elapsed),
+        "peak_rss_mb": mib(app.peak_rss_bytes()),
+        "rss_growth_mb": mib(rss_bytes() - before),
+    }
+
+
+def synthetic_events(count, pets, appointments):
+    now_ms = int(time.time() * 1000)
+    for n in range(count):
+        if n % 2 == 0:
+            yield "pet-events", {"eventType": "PET_UPDATED", "petId": 1 + _mix(n, 21) % pets, "timestamp": now_ms}
+        else:
+            yield "appointment-events", {
+                "eventType": "APPOINTMENT_UPDATED", "appointmentId": 1 + _mix(n, 22) % appointments
+            }
+
+
+def bench_events(count, batch_size, pets, appointments):
+    single = []
+    for topic, event in synthetic_events(count, pets, appointments):
+        started = time.perf_counter()
+        app.apply_events([(topic, None, None, event)])
+        single.append(time.perf_counter() - started)
+
+    records = [(topic, None, None, event) for topic, event in synthetic_events(count, pets, appointments)]
+    batches = []
+    for start in range(0, len(records), batch_size):
+        started = time.perf_counter()
+        app.apply_events(records[start:start + batch_size])
+        batches.append(time.perf_counter() - started)
+    batched_seconds = sum(batches)
+    return {
+        "single": percentiles(single),
+        "batched": {
+            "batch_size": batch_size,
+            **percentiles(batches),
+            "per_event_ms": round(batched_seconds / len(records) * 1000, 3),
+        },
+    }
+
+
+def bench_queries(search, rounds, snapshot=None, skip=()):
+    report = {}
+    for name, queries in QUERY_MIX.items():
+        if name in skip:
+            continue
+        if snapshot is not None:
+            queries = [{"snapshot": snapshot, **kwargs} for kwargs in queries]
+        latencies = []
+        # The first pass builds lazy structures (fuzzy and value indexes) and is not counted
+        for n in range(rounds + 1):
+            for kwargs in queries:
+                started = time.perf_counter()
+                if search(**kwargs) is None:
+                    raise RuntimeError(f"{search.__name__} failed for {kwargs}")
+                if n:
+                    latencies.append(time.perf_counter() - started)
+        report[name] = percentiles(latencies)
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════
+# REGRESSION CHECK
+# ═══════════════════════════════════════════════════════════════
+
+# Metrics checked against a baseline; lower is better for all of them. Tail
+# latencies (p99, max) are reported but too noisy over a few hundred samples.
+_COST_SUFFIXES = ("p50_ms", "p95_ms", "per_event_ms", "seconds", "_mb")
+
+
+def _cost_metrics(report, prefix=""):
+    for key, value in report.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _cost_metrics(value, f"{path}.")
+        elif isinstance(value, (int, float)) and key.endswith(_COST_SUFFIXES):
+            yield path, value
+
+
+def regressions(results, baseline, tolerance):
+    """(metric, baseline, current) for every cost that grew by more than tolerance."""
+    before = dict(_cost_metrics(baseline))
+    return [
+        (path, before[path], value)
+        for path, value in _cost_metrics(results)
+        # Ignore sub-millisecond noise on tiny figures
+        if path in before and value > before[path] * (1 + tolerance) and value - before[path] > 0.05
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pets", type=int, default=10000)
+    parser.add_argument("--appointments", type=int, default=20000)
+    parser.add_argument("--events", type=int, default=2000, help="events per event benchmark")
+    parser.add_argument("--batch-size", type=int, default=500, help="events per apply_events() batch")
+    parser.add_argument("--rounds", type=int, default=20, help="passes over the query mix")
+    parser.add_argument("--solr-url", help="measure this Solr instead of the stand-in")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    process, base_url = start_standins(args.pets, args.appointments)
+    try:
+        app.ENTITY_URLS["pets"] = f"{base_url}/api/pets"
+        app.ENTITY_URLS["appointments"] = f"{base_url}/api/appointments"
+        app.SOLR_URL = args.solr_url or f"{base_url}/solr"
+        if args.solr_url:
+            for collection in (app.PETS_COLLECTION, app.APPOINTMENTS_COLLECTION):
+                app.create_solr_collection(collection)
+        app.solr_breaker.close()
+
+        baseline_rss = rss_bytes()
+        results = {
+            "sync": {kind: bench_sync(kind) for kind in ("pets", "appointments")},
+        }
+        snapshot = app.current_snapshot
+        results["memory"] = {
+            "rss_mb": mib(rss_bytes()),
+            "index_rss_mb": mib(rss_bytes() - baseline_rss),
+            "bytes_per_document": round(
+                (rss_bytes() - baseline_rss) / max(1, len(snapshot.pets) + len(snapshot.appointments))
+            ),
+        }
+        results["queries"] = {
+            "memory": bench_queries(app.perform_in_memory_search, args.rounds, snapshot=snapshot),
+            "solr": bench_queries(app.perform_solr_search, args.rounds, skip=("fuzzy",)),
+        }
+        results["events"] = bench_events(args.events, args.batch_size, args.pets, args.appointments)
+    finally:
+        process.terminate()
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "solr": "real" if args.solr_url else "stand-in",
+            "pets": args.pets,
+            "appointments": args.appointments,
+            "events": args.events,
+            "rounds": args.rounds,
+            "delta_max": app.SEARCH_DELTA_MAX,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("pets") != args.pets or baseline["meta"].get("appointments") != args.appointments:
+            print("Baseline was recorded with a different corpus size", file=sys.stderr)
+        regressed = regressions(results, baseline["results"], args.tolerance)
+        for path, before, after in regressed:
+            print(f"REGRESSION {path}: {before} -> {after}", file=sys.stderr)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
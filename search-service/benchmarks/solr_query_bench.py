@@ -0,0 +1,123 @@
+"""
+Benchmark: leading-wildcard queries vs. edismax over the n-gram schema.
+
+Indexes the same synthetic pets into two throwaway collections on a local
+Solr - one left schemaless and queried with searchable_text:*q*, one set up
+by create_solr_collection() and queried through build_edismax_params() - and
+prints per-query latency percentiles as JSON.
+
+    python benchmarks/solr_query_bench.py --pets 100000 --rounds 200
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import requests  # noqa: E402
+
+import app  # noqa: E402
+
+NAMES = ["Max", "Whiskers", "Buddy", "Tweety", "Snowball", "Nemo", "Rocky", "Luna", "Bella", "Charlie"]
+SPECIES = ["DOG", "CAT", "BIRD", "RABBIT", "FISH", "REPTILE", "HAMSTER"]
+BREEDS = ["Labrador", "Siamese", "Parakeet", "Holland Lop", "Goldfish", "Iguana", "Syrian", "Beagle"]
+OWNERS = ["John Smith", "Jane Doe", "Bob Wilson", "Alice Brown", "Charlie Davis", "Eva Martinez", "Grace Lee"]
+QUERIES = ["max", "whisk", "labrador", "smith", "cat", "lee", "snow", "holland", "doe", "rock"]
+
+
+def synthetic_pets(count, seed=7):
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "name": f"{rng.choice(NAMES)}{rng.randint(0, 999)}",
+            "species": rng.choice(SPECIES),
+            "breed": rng.choice(BREEDS),
+            "age": rng.randint(0, 20),
+            "ownerName": rng.choice(OWNERS),
+        }
+
+
+def index_pets(collection, pets, batch_size=5000):
+    batch = []
+    for pet in pets:
+        batch.append(app.to_solr_doc(
+            f"pet_{pet['id']}", "pet", pet, app.PET_SOLR_FIELDS,
+            f"{pet['name']} {pet['species']} {pet['breed']} {pet['ownerName']}"
+        ))
+        if len(batch) >= batch_size:
+            app.index_to_solr(collection, batch)
+            batch = []
+    if batch:
+        app.index_to_solr(collection, batch)
+
+
+def time_queries(collection, rounds, build_request):
+    latencies = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            q, params = build_request(query)
+            started = time.perf_counter()
+            app.search_solr(collection, q, rows=50, fields=["entity_id"], params=params)
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "queries": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 3),
+        "max_ms": round(latencies[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pets", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark collections")
+    args = parser.parse_args()
+
+    if not app.check_solr_connection():
+        sys.exit(f"Solr is not reachable at {app.SOLR_URL}")
+
+    wildcard_collection = "bench_pets_wildcard"
+    edismax_collection = "bench_pets_edismax"
+    app.SOLR_SCHEMA_FIELDS[edismax_collection] = app.SOLR_SCHEMA_FIELDS[app.PETS_COLLECTION]
+
+    for collection in (wildcard_collection, edismax_collection):
+        requests.get(f"{app.SOLR_URL}/admin/collections", params={"action": "DELETE", "name": collection})
+    requests.get(
+        f"{app.SOLR_URL}/admin/collections",
+        params={"action": "CREATE", "name": wildcard_collection, "numShards": 1, "replicationFactor": 1}
+    )
+    app.create_solr_collection(edismax_collection)
+
+    index_pets(wildcard_collection, synthetic_pets(args.pets))
+    index_pets(edismax_collection, synthetic_pets(args.pets))
+
+    edismax_params = app.build_edismax_params(app.PETS_QUERY_FIELDS)
+    report = {
+        "pets": args.pets,
+        "wildcard": time_queries(
+            wildcard_collection, args.rounds,
+            lambda q: (f"searchable_text:*{q}*", None)
+        ),
+        "edismax": time_queries(
+            edismax_collection, args.rounds,
+            lambda q: (app.escape_solr_query(q), edismax_params)
+        ),
+    }
+    print(json.dumps(report, indent=2))
+
+    if not args.keep:
+        for collection in (wildcard_collection, edismax_collection):
+            requests.get(f"{app.SOLR_URL}/admin/collections", params={"action": "DELETE", "name": collection})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Prefork serving for the search service:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The master spawns one indexer process (app.py --indexer) that owns the
+Kafka consumer and publishes index generations to SEARCH_SHARED_INDEX_DIR;
+the workers mmap those files and serve queries read-only.
+
+Every process records Prometheus samples under PROMETHEUS_MULTIPROC_DIR,
+which /metrics on any worker aggregates.
+"""
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(SERVICE_DIR, "data", "prometheus"))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8082')}"
+workers = int(os.getenv("SEARCH_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.getenv("SEARCH_THREADS", "4"))
+timeout = 60
+
+_indexer = None
+
+
+def on_starting(server):
+    global _indexer
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+    # Seed the request span switch once; afterwards only /admin/spans flips it
+    shared_dir = os.path.join(SERVICE_DIR, os.getenv("SEARCH_SHARED_INDEX_DIR", "data/shared"))
+    os.makedirs(shared_dir, exist_ok=True)
+    span_flag = os.path.join(shared_dir, "request-spans")
+    if os.getenv("SEARCH_REQUEST_SPANS", "0") == "1":
+        open(span_flag, "w").close()
+    elif os.path.exists(span_flag):
+        os.remove(span_flag)
+    _indexer = subprocess.Popen([sys.executable, "app.py", "--indexer"], cwd=SERVICE_DIR)
+    server.log.info(f"Started search indexer process {_indexer.pid}")
+
+
+def post_worker_init(worker):
+    import app
+    app.init_worker()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if _indexer and _indexer.poll() is None:
+        _indexer.terminate()
+        try:
+            _indexer.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _indexer.kill()
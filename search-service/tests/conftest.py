@@ -0,0 +1,51 @@
+import os
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest  # noqa: E402
+
+import app  # noqa: E402
+
+
+@pytest.fixture
+def offline_index(monkeypatch):
+    """Empty indexes and an open Solr breaker, so syncs stay in memory."""
+    monkeypatch.setattr(app, "current_snapshot", app.IndexSnapshot(
+        0, app.SearchIndex(fields=app.PET_SEARCH_FIELDS), app.SearchIndex(fields=app.APPOINTMENT_SEARCH_FIELDS)
+    ))
+    monkeypatch.setattr(app.solr_breaker, "state", "open")
+
+
+class FakeSolrResponse:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+
+    def json(self):
+        return self.body
+
+
+class FakeSolrSession:
+    """Stand-in for the pooled Solr session: records selects, answers from bodies[collection]."""
+
+    def __init__(self):
+        self.bodies = {}
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+        collection = url.rsplit("/", 2)[-2]
+        self.requests.append((collection, params))
+        return FakeSolrResponse(self.bodies.get(collection, {"response": {"numFound": 0, "docs": []}}))
+
+
+@pytest.fixture
+def fake_solr(monkeypatch):
+    session = FakeSolrSession()
+    monkeypatch.setattr(app, "solr_session", lambda: session)
+    monkeypatch.setattr(app, "solr_available", True)
+    # Outcomes recorded here must not trip the breaker for later tests
+    monkeypatch.setattr(app.solr_breaker, "_outcomes", deque(maxlen=app.SOLR_BREAKER_WINDOW))
+    monkeypatch.setattr(app.solr_breaker, "state", app.solr_breaker.state)
+    return session
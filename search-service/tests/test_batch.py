@@ -0,0 +1,72 @@
+import pytest
+
+import app
+
+PETS = [
+    {"id": 1, "name": "Rex", "breed": "Beagle", "species": "DOG", "ownerName": "Ann Lee"},
+    {"id": 2, "name": "Luna", "breed": "Siamese", "species": "CAT", "ownerName": "Bob Stone"},
+    {"id": 3, "name": "Milo", "breed": "Beagle", "species": "DOG", "ownerName": "Cy Moss"},
+]
+APPOINTMENTS = [
+    {"id": 10, "petName": "Rex", "status": "SCHEDULED", "appointmentType": "CHECKUP", "date": "2025-03-01"},
+    {"id": 11, "petName": "Luna", "status": "EMERGENCY", "appointmentType": "SURGERY", "date": "2025-03-02"},
+]
+
+
+@pytest.fixture
+def client(offline_index, monkeypatch):
+    monkeypatch.setattr(app, "current_snapshot", app.current_snapshot.evolve(
+        pets=app.SearchIndex(PETS, app.PET_SEARCH_FIELDS),
+        appointments=app.SearchIndex(APPOINTMENTS, app.APPOINTMENT_SEARCH_FIELDS),
+    ))
+    return app.app.test_client()
+
+
+def test_each_result_matches_the_equivalent_search(client):
+    queries = [
+        {"id": "beagles", "q": "beagle", "appointments": False, "limit": 1},
+        {"id": "emergencies", "status": ["EMERGENCY"]},
+        {"q": "rex", "facets": True},
+    ]
+    urls = [
+        "/api/search?q=beagle&appointments=false&limit=1",
+        "/api/search?status=EMERGENCY",
+        "/api/search?q=rex&facets=1",
+    ]
+
+    body = client.post("/api/search/batch", json={"queries": queries}).get_json()
+
+    assert body["generation"] == app.current_snapshot.generation
+    assert [result.get("id") for result in body["results"]] == ["beagles", "emergencies", None]
+    for result, url in zip(body["results"], urls):
+        result.pop("id", None)
+        assert result == client.get(url).get_json()
+
+
+def test_queries_without_criteria_get_the_search_message(client):
+    body = client.post("/api/search/batch", json={"queries": [{"id": "blank"}]}).get_json()
+    assert body["results"] == [{"id": "blank", "pets": [], "appointments": [], "message": "No search query provided"}]
+
+
+@pytest.mark.parametrize("payload", [None, {}, {"queries": "rex"}, {"queries": ["rex"]}])
+def test_malformed_bodies_are_rejected(client, payload):
+    response = client.post("/api/search/batch", json=payload)
+    assert response.status_code == 400
+
+
+def test_too_many_queries_are_rejected(client, monkeypatch):
+    monkeypatch.setattr(app, "MAX_BATCH_QUERIES", 2)
+    response = client.post("/api/search/batch", json={"queries": [{"q": "a"}, {"q": "b"}, {"q": "c"}]})
+    assert response.status_code == 400
+
+
+def test_solr_queries_run_over_the_pool_in_query_order(fake_solr, offline_index):
+    stored = {key: [value] if isinstance(value, str) else value for key, value in app.pet_solr_doc(PETS[0]).items()}
+    fake_solr.bodies[app.PETS_COLLECTION] = {"response": {"numFound": 1, "docs": [stored]}}
+    queries = [{"id": n, "q": f"batch pool {n}", "appointments": False} for n in range(6)]
+
+    body = app.app.test_client().post("/api/search/batch", json={"queries": queries}).get_json()
+
+    assert [result["id"] for result in body["results"]] == list(range(6))
+    assert all([pet["id"] for pet in result["pets"]] == [1] for result in body["results"])
+    assert len([collection for collection, _ in fake_solr.requests if collection == app.PETS_COLLECTION]) == 6
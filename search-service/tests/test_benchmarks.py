@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks")
+sys.path.insert(0, BENCHMARKS)
+
+import search_bench  # noqa: E402
+
+TINY = ["--pets", "200", "--appointments", "300", "--events", "50", "--batch-size", "10", "--rounds", "1"]
+
+
+def run_bench(*args):
+    return subprocess.run(
+        [sys.executable, os.path.join(BENCHMARKS, "search_bench.py"), *TINY, *args],
+        capture_output=True, text=True, timeout=120
+    )
+
+
+def test_synthetic_appointments_belong_to_synthetic_pets():
+    for i in range(1, 200):
+        appointment = search_bench.synthetic_appointment(i, 50)
+        pet = search_bench.synthetic_pet(appointment["petId"])
+        assert 1 <= pet["id"] <= 50
+        assert (appointment["petName"], appointment["ownerName"]) == (pet["name"], pet["ownerName"])
+
+
+def test_percentiles_in_milliseconds():
+    summary = search_bench.percentiles([i / 1000 for i in range(1, 101)])
+    assert summary == {"count": 100, "p50_ms": 50.5, "p95_ms": 96.0, "p99_ms": 100.0, "max_ms": 100.0}
+
+
+def test_only_costs_beyond_the_tolerance_regress():
+    baseline = {"sync": {"pets": {"seconds": 1.0, "documents": 100}}, "queries": {"term": {"p50_ms": 0.01}}}
+    current = {"sync": {"pets": {"seconds": 1.5, "documents": 900}}, "queries": {"term": {"p50_ms": 0.05}}}
+    assert search_bench.regressions(current, baseline, 0.2) == [("sync.pets.seconds", 1.0, 1.5)]
+    assert search_bench.regressions(current, baseline, 0.6) == []
+
+
+def test_report_is_json_and_a_regressed_baseline_fails_the_run(tmp_path):
+    report_path = tmp_path / "bench.json"
+    finished = run_bench("--output", str(report_path))
+    assert finished.returncode == 0, finished.stderr
+    report = json.loads(report_path.read_text())
+    assert set(report["results"]) == {"sync", "memory", "queries", "events"}
+    assert report["results"]["sync"]["pets"]["documents"] == 200
+
+    # Generous enough for timing noise, but nothing beats a zero baseline
+    report["results"]["memory"]["rss_mb"] = 0.0
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(report))
+    again_path = tmp_path / "again.json"
+    finished = run_bench("--output", str(again_path), "--baseline", str(baseline_path), "--tolerance", "100")
+    assert finished.returncode == 1
+    rss_mb = json.loads(again_path.read_text())["results"]["memory"]["rss_mb"]
+    assert finished.stderr.splitlines() == [f"REGRESSION memory.rss_mb: 0.0 -> {rss_mb}"]
@@ -0,0 +1,179 @@
+import json
+import threading
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from kafka import TopicPartition
+
+import app
+
+Record = namedtuple("Record", "topic partition offset key value")
+
+
+class FakeConsumer:
+    """
+    In-process stand-in for a kafka-python consumer with manual partition
+    assignment, over {topic: [[(key, value), ...] per partition]}.
+    """
+
+    def __init__(self, topics, batch_size=2):
+        self.logs = {
+            TopicPartition(topic, partition): messages
+            for topic, partitions in topics.items()
+            for partition, messages in enumerate(partitions)
+        }
+        self.batch_size = batch_size
+        self.positions = {}
+        self.paused = set()
+        self.closed = False
+
+    def partitions_for_topic(self, topic):
+        return {tp.partition for tp in self.logs if tp.topic == topic} or None
+
+    def assign(self, partitions):
+        self.positions = {tp: 0 for tp in partitions}
+
+    def seek_to_beginning(self, *partitions):
+        for tp in partitions:
+            self.positions[tp] = 0
+
+    def end_offsets(self, partitions):
+        return {tp: len(self.logs[tp]) for tp in partitions}
+
+    def position(self, tp):
+        return self.positions[tp]
+
+    def pause(self, *partitions):
+        self.paused.update(partitions)
+
+    def poll(self, timeout_ms=0, max_records=None):
+        batch = {}
+        for tp, offset in self.positions.items():
+            messages = self.logs[tp][offset:offset + self.batch_size]
+            if tp in self.paused or not messages:
+                continue
+            batch[tp] = [
+                Record(tp.topic, tp.partition, offset + i, key, value)
+                for i, (key, value) in enumerate(messages)
+            ]
+            self.positions[tp] = offset + len(messages)
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def entity_server(monkeypatch):
+    """In-process stand-in for the pet and appointment services' list endpoints."""
+    payloads = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = payloads.get(self.path)
+            if body is None:
+                self.send_response(503)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(app, "ENTITY_URLS", {"pets": f"{base}/api/pets", "appointments": f"{base}/api/appointments"})
+    yield payloads
+    server.shutdown()
+    server.server_close()
+
+
+def state(entity):
+    return json.dumps(entity).encode()
+
+
+def pet(pet_id, name, species="DOG"):
+    return {"id": pet_id, "name": name, "species": species, "ownerName": "John Smith"}
+
+
+def appointment(appointment_id, pet_name):
+    return {"id": appointment_id, "petName": pet_name, "status": "SCHEDULED", "date": "2024-05-01"}
+
+
+def test_read_state_topics_keeps_the_latest_state_per_key():
+    consumer = FakeConsumer({
+        "pet-state": [
+            [(b"1", state(pet(1, "Max"))), (b"2", state(pet(2, "Luna"))), (b"1", state(pet(1, "Maxi")))],
+            [(b"3", state(pet(3, "Coco"))), (b"3", None), (None, state(pet(9, "Keyless")))],
+        ],
+        "appointment-state": [[]],
+    })
+    latest = app.read_state_topics(consumer)
+    assert {key: json.loads(value)["name"] for key, value in latest["pets"].items()} == {b"1": "Maxi", b"2": "Luna"}
+    assert latest["appointments"] == {}
+
+
+def test_read_state_topics_stops_at_the_end_offsets_seen_on_entry():
+    consumer = FakeConsumer({"pet-state": [[(b"1", state(pet(1, "Max")))]]})
+    consumer.end_offsets = lambda partitions: {tp: 0 for tp in partitions}
+    consumer.logs[TopicPartition("pet-state", 0)].append((b"2", state(pet(2, "Late"))))
+    assert app.read_state_topics(consumer) == {"pets": {}, "appointments": {}}
+
+
+def test_read_state_topics_without_topics_returns_none():
+    assert app.read_state_topics(FakeConsumer({})) is None
+
+
+def test_sync_from_state_topics_replays_states_and_tombstones_into_the_index(offline_index):
+    consumer = FakeConsumer({
+        "pet-state": [
+            [(b"1", state(pet(1, "Max"))), (b"2", state(pet(2, "Luna", "CAT")))],
+            [(b"3", state(pet(3, "Coco"))), (b"1", None), (b"2", state(pet(2, "Luna", "BIRD")))],
+        ],
+        "appointment-state": [[(b"7", state(appointment(7, "Coco")))], []],
+    })
+    assert app.sync_from_state_topics(consumer) == {"pets", "appointments"}
+    pets = app.current_snapshot.pets
+    assert pets.get(1) is None
+    assert pets.get(2)["species"] == "BIRD"
+    assert sorted(document["id"] for document in pets.documents()) == [2, 3]
+    assert app.current_snapshot.appointments.get(7)["petName"] == "Coco"
+    assert not consumer.closed
+
+
+def test_empty_state_topics_are_left_to_http(offline_index):
+    consumer = FakeConsumer({"pet-state": [[]], "appointment-state": [[(b"7", state(appointment(7, "Coco")))]]})
+    assert app.sync_from_state_topics(consumer) == {"appointments"}
+    assert len(app.current_snapshot.pets) == 0
+
+
+def test_events_during_the_replay_win_over_replayed_states(offline_index, monkeypatch):
+    consumer = FakeConsumer({"pet-state": [[(b"1", state(pet(1, "Old")))]]})
+    read = app.read_state_topics
+
+    def read_then_event(consumer):
+        latest = read(consumer)
+        app.apply_events([("pet-events", None, None, {"eventType": "PET_DELETED", "petId": 1})])
+        return latest
+
+    monkeypatch.setattr(app, "read_state_topics", read_then_event)
+    assert app.sync_from_state_topics(consumer) == {"pets"}
+    assert app.current_snapshot.pets.get(1) is None
+
+
+def test_sync_index_pulls_every_entity_over_http(offline_index, entity_server, monkeypatch):
+    monkeypatch.setattr(app, "SYNC_READ_BYTES", 16)
+    entity_server["/api/pets"] = json.dumps([pet(1, "Max"), pet(2, "Luna", "CAT")]).encode()
+    assert app.sync_index("pets") == 2
+    assert app.current_snapshot.pets.get(2)["name"] == "Luna"
+
+
+def test_sync_index_keeps_the_index_on_an_error_response(offline_index, entity_server):
+    assert app.sync_index("appointments") is None
+    assert len(app.current_snapshot.appointments) == 0
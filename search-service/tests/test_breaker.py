@@ -0,0 +1,106 @@
+import pytest
+
+import app
+from conftest import FakeSolrResponse
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    monkeypatch.setattr(app, "solr_available", True)
+    monkeypatch.setattr(app, "serving_mode", "standalone")
+    return app.SolrCircuitBreaker(window=10, error_rate=0.5, slow_seconds=1.0, min_calls=4)
+
+
+def test_opens_once_the_error_rate_is_reached_over_min_calls(breaker):
+    breaker.record("select", 200, 0.01)
+    breaker.record("select", 500, 0.01)
+    breaker.record("select", None, 0.01)
+    assert breaker.state == "closed"
+
+    breaker.record("select", 503, 0.01)
+
+    assert breaker.state == "open"
+    assert breaker.trips == 1
+    assert not app.solr_available
+    assert "3/4 recent calls failed" in breaker.last_error
+
+
+def test_slow_queries_count_as_failures_but_slow_writes_do_not(breaker):
+    for _ in range(4):
+        breaker.record("update", 200, 5.0)
+    assert breaker.state == "closed"
+
+    for _ in range(4):
+        breaker.record("select", 200, 5.0)
+
+    assert breaker.state == "open"
+    assert "took 5.00s" in breaker.last_error
+
+
+def test_a_failure_while_half_open_reopens_immediately(breaker):
+    breaker.trip("down")
+    breaker.half_open()
+    assert breaker.allows_writes() and not breaker.allows_reads()
+
+    breaker.record("update", 500, 0.01)
+
+    assert breaker.state == "open"
+    assert breaker.trips == 2
+    assert breaker.last_error.endswith("while recovering")
+
+
+def test_close_resumes_reads_and_clears_outcomes(breaker):
+    breaker.trip("down")
+    breaker.half_open()
+    breaker.close()
+
+    assert breaker.allows_reads() and app.solr_available
+    assert breaker.status()["recent_calls"] == 0
+    assert breaker.status()["opened_at"] is None
+
+
+def test_searches_fail_over_to_memory_when_solr_errors(fake_solr, monkeypatch):
+    monkeypatch.setattr(fake_solr, "get", lambda url, params=None, timeout=None: FakeSolrResponse({}, 500))
+    monkeypatch.setattr(app, "current_snapshot", app.current_snapshot.evolve(
+        pets=app.SearchIndex([{"id": 1, "name": "Rex", "species": "DOG"}], app.PET_SEARCH_FIELDS)
+    ))
+
+    for attempt in range(app.SOLR_BREAKER_MIN_CALLS):
+        results = app.run_search(f"rex failover {attempt}", search_appointments=False)
+        assert results["pets"] == []
+    results = app.run_search("rex", search_appointments=False)
+
+    assert app.solr_breaker.state == "open"
+    assert [pet["id"] for pet in results["pets"]] == [1]
+
+
+def test_the_indexer_publishes_its_state_for_workers(monkeypatch, tmp_path, breaker):
+    monkeypatch.setattr(app, "SHARED_INDEX_DIR", str(tmp_path))
+    assert app.indexer_breaker_state() is None
+
+    monkeypatch.setattr(app, "serving_mode", "indexer")
+    breaker.trip("down")
+    assert app.indexer_breaker_state() == "open"
+    breaker.half_open()
+    assert app.indexer_breaker_state() == "half_open"
+
+
+def test_workers_read_from_solr_only_while_the_indexer_breaker_is_closed(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "SHARED_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "serving_mode", "worker")
+    monkeypatch.setattr(app, "solr_available", True)
+    monkeypatch.setattr(app, "ping_solr", lambda: True)
+    monkeypatch.setattr(app, "solr_breaker", app.SolrCircuitBreaker(10, 0.5, 1.0, 4))
+
+    app.follow_indexer_breaker()
+    assert app.solr_breaker.state == "closed"
+
+    app.publish_breaker_state("half_open")
+    app.follow_indexer_breaker()
+    assert app.solr_breaker.state == "open"
+    assert not app.solr_available
+
+    app.publish_breaker_state("closed")
+    app.follow_indexer_breaker()
+    assert app.solr_breaker.state == "closed"
+    assert app.solr_available
@@ -0,0 +1,70 @@
+from collections import Counter
+
+import pytest
+
+import app
+
+SPECIES = ["DOG", "CAT", "BIRD"]
+BREEDS = ["Beagle", "Siamese", "Parakeet", "Poodle", "Persian"]
+
+
+def make_pets(count):
+    return [
+        {"id": i, "name": f"Pet{i}", "species": SPECIES[i % 3], "breed": BREEDS[i % 5],
+         "ownerName": "John Smith" if i % 4 == 0 else "Jane Doe"}
+        for i in range(1, count + 1)
+    ]
+
+
+def expected_counts(pets, field):
+    counts = Counter(pet[field] for pet in pets)
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+@pytest.fixture
+def index():
+    return app.SearchIndex(make_pets(200), app.PET_SEARCH_FIELDS)
+
+
+def test_facets_count_every_live_document(index):
+    pets = make_pets(200)
+    _, _, facets = index.query("", facets=("species", "breed"))
+    assert facets == {"species": expected_counts(pets, "species"), "breed": expected_counts(pets, "breed")}
+
+
+def test_facets_count_only_text_hits(index):
+    smiths = [pet for pet in make_pets(200) if pet["ownerName"] == "John Smith"]
+    total, _, facets = index.query("smith", facets=("species",))
+    assert total == len(smiths)
+    assert facets == {"species": expected_counts(smiths, "species")}
+
+
+def test_facets_follow_filters(index):
+    cats = [pet for pet in make_pets(200) if pet["species"] == "CAT"]
+    _, _, facets = index.query("", filters={"species": ["CAT"]}, facets=("breed",))
+    assert facets == {"breed": expected_counts(cats, "breed")}
+
+
+def test_facets_skip_tombstones_and_count_the_delta(index):
+    changed = index.with_changes({1: None, 2: {"id": 2, "name": "Rex", "species": "DOG", "breed": "Boxer"}})
+    pets = [pet for pet in make_pets(200) if pet["id"] not in (1, 2)]
+    pets.append({"id": 2, "species": "DOG", "breed": "Boxer"})
+    _, _, facets = changed.query("", facets=("species", "breed"))
+    assert facets == {"species": expected_counts(pets, "species"), "breed": expected_counts(pets, "breed")}
+
+
+def test_probed_and_bitmap_counts_agree(monkeypatch):
+    pets = make_pets(300)
+    for shift in (0, 30):
+        monkeypatch.setattr(app.ValueIndex, "PROBE_SHIFT", shift)
+        index = app.SearchIndex(pets, app.PET_SEARCH_FIELDS)
+        _, _, facets = index.query("", facets=("breed",))
+        assert facets == {"breed": expected_counts(pets, "breed")}
+
+
+def test_value_bitmap_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(app, "VALUE_BITMAP_CACHE", 2)
+    monkeypatch.setattr(app.ValueIndex, "PROBE_SHIFT", 30)
+    index = app.SearchIndex(make_pets(100), app.PET_SEARCH_FIELDS)
+    index.query("", facets=("breed",))
+    assert len(index.base.value_index("breed")._bitmaps) == 2
@@ -0,0 +1,60 @@
+import pytest
+
+import app
+
+PETS = [
+    {"id": 1, "name": "Max", "species": "DOG", "breed": "Beagle", "ownerName": "John Smith"},
+    {"id": 2, "name": "Bella", "species": "CAT", "breed": "Siamese", "ownerName": "Jane Doe"},
+    {"id": 3, "name": "Whiskers", "species": "CAT", "breed": "Persian", "ownerName": "Alice Brown"},
+]
+
+
+@pytest.fixture
+def index():
+    return app.SearchIndex(PETS, app.PET_SEARCH_FIELDS)
+
+
+def hit_ids(index, query):
+    _, page = index.fuzzy_search(query)
+    return [pet["id"] for pet in page]
+
+
+def test_edit_distance_counts_a_swap_of_neighbours_as_one_edit():
+    assert app.edit_distance("jhon", "john", 1) == 1
+    assert app.edit_distance("amx", "max", 1) == 1
+    assert app.edit_distance("bella", "bolt", 1) == 2
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("jhon", 1),
+    ("amx", 1),
+    ("smtih", 1),
+    ("blela", 2),
+    ("wihskers", 3),
+])
+def test_swapped_letter_typos_match(index, query, expected):
+    assert hit_ids(index, query) == [expected]
+
+
+def test_substitution_and_deletion_typos_match(index):
+    assert hit_ids(index, "bela") == [2]
+    assert hit_ids(index, "whiskars") == [3]
+
+
+def test_short_tokens_must_match_exactly(index):
+    assert hit_ids(index, "mx") == []
+
+
+def test_unrelated_names_do_not_match(index):
+    assert hit_ids(index, "rocky") == []
+
+
+def test_exact_matches_rank_before_typos():
+    index = app.SearchIndex(PETS + [{"id": 4, "name": "Bell", "species": "DOG"}], app.PET_SEARCH_FIELDS)
+    assert hit_ids(index, "bell") == [4, 2]
+
+
+def test_typos_match_in_the_delta_segment(index):
+    changed = index.with_changes({5: {"id": 5, "name": "Oscar", "species": "DOG"}, 2: None})
+    assert hit_ids(changed, "oscra") == [5]
+    assert hit_ids(changed, "blela") == []
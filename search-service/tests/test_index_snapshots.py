@@ -0,0 +1,67 @@
+import app
+
+PETS = [{"id": i, "name": f"Pet{i}", "species": "DOG", "ownerName": "John Smith"} for i in range(1, 11)]
+
+
+def make_index():
+    return app.SearchIndex(PETS, app.PET_SEARCH_FIELDS)
+
+
+def live_ids(index):
+    return sorted(document["id"] for document in index.documents())
+
+
+def test_changes_go_to_a_delta_and_tombstone_the_base():
+    index = make_index()
+    changed = index.with_changes({2: {"id": 2, "name": "Rex", "species": "CAT"}, 3: None, 11: {"id": 11, "name": "Luna"}})
+    assert changed.base is index.base
+    assert sorted(changed.tombstones) == [2, 3]
+    assert len(changed.delta) == 2
+    assert len(changed) == 10
+    assert live_ids(changed) == [1, 2, 4, 5, 6, 7, 8, 9, 10, 11]
+    assert changed.get(2)["name"] == "Rex"
+    assert changed.get(3) is None
+    assert changed.search("pet2")[0] == 0
+    assert [pet["id"] for pet in changed.search("rex")[1]] == [2]
+
+
+def test_older_versions_are_left_untouched():
+    index = make_index()
+    index.with_changes({1: None, 2: {"id": 2, "name": "Rex"}})
+    assert len(index) == 10
+    assert index.get(2)["name"] == "Pet2"
+    assert index.search("pet1")[0] == 2   # pet1 and pet10
+
+
+def test_a_deleted_document_can_come_back():
+    changed = make_index().with_changes({5: None}).with_changes({5: {"id": 5, "name": "Back"}})
+    assert changed.get(5)["name"] == "Back"
+    assert len(changed) == 10
+
+
+def test_delta_changes_replace_each_other():
+    changed = make_index().with_changes({11: {"id": 11, "name": "One"}}).with_changes({11: {"id": 11, "name": "Two"}})
+    assert len(changed.delta) == 1
+    assert changed.search("one")[0] == 0
+    assert changed.get(11)["name"] == "Two"
+    assert changed.with_changes({11: None}).get(11) is None
+
+
+def test_a_large_delta_is_compacted_into_a_new_base(monkeypatch):
+    monkeypatch.setattr(app, "SEARCH_DELTA_MAX", 3)
+    index = make_index().with_changes({1: None, 2: {"id": 2, "name": "Rex"}})
+    compacted = index.with_changes({3: None, 12: {"id": 12, "name": "Luna"}})
+    assert compacted.base is not index.base
+    assert len(compacted.delta) == 0 and not compacted.tombstones
+    assert live_ids(compacted) == [2, 4, 5, 6, 7, 8, 9, 10, 12]
+    assert compacted.get(2)["name"] == "Rex"
+
+
+def test_snapshots_advance_the_generation_and_merge_offsets():
+    snapshot = app.IndexSnapshot(4, make_index(), app.SearchIndex(fields=app.APPOINTMENT_SEARCH_FIELDS),
+                                 {("pet-events", 0): 10})
+    evolved = snapshot.evolve(pets=snapshot.pets.with_changes({1: None}), kafka_offsets={("pet-events", 1): 3})
+    assert evolved.generation == 5
+    assert evolved.appointments is snapshot.appointments
+    assert evolved.kafka_offsets == {("pet-events", 0): 10, ("pet-events", 1): 3}
+    assert len(snapshot.pets) == 10 and len(evolved.pets) == 9
@@ -0,0 +1,41 @@
+import app
+
+PETS = [
+    {"id": 1, "name": "Rex", "breed": "Beagle", "species": "DOG", "ownerName": "Ann Lee"},
+    {"id": 2, "name": "Luna", "breed": "Siamese", "species": "CAT", "ownerName": "Bob Stone"},
+]
+
+
+def sample(name, **labels):
+    return app.REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_memory_searches_are_timed_per_route_and_backend(offline_index, monkeypatch):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    with app.index_write_lock:
+        app.publish_snapshot(pets=app.SearchIndex(PETS, app.PET_SEARCH_FIELDS))
+    labels = {"route": "/api/search", "backend": "memory"}
+    before = sample("search_query_duration_seconds_count", **labels)
+    returned = sample("search_query_results_sum", entity="pets", **labels)
+    requests = sample("search_http_request_duration_seconds_count", route="/api/search", method="GET", status="200")
+
+    response = app.app.test_client().get("/api/search?q=rex")
+
+    assert response.status_code == 200
+    assert sample("search_query_duration_seconds_count", **labels) == before + 1
+    assert sample("search_query_results_sum", entity="pets", **labels) == returned + 1
+    assert sample("search_http_request_duration_seconds_count",
+                  route="/api/search", method="GET", status="200") == requests + 1
+
+
+def test_metrics_exposes_index_and_breaker_gauges(offline_index, monkeypatch):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    app.observe_snapshot(app.IndexSnapshot(
+        7, app.SearchIndex(PETS, app.PET_SEARCH_FIELDS), app.SearchIndex(fields=app.APPOINTMENT_SEARCH_FIELDS)
+    ))
+
+    body = app.app.test_client().get("/metrics").get_data(as_text=True)
+
+    assert "search_index_generation 7.0" in body
+    assert 'search_index_documents{kind="pets"} 2.0' in body
+    assert "search_solr_breaker_state" in body
@@ -0,0 +1,62 @@
+import pytest
+
+import app
+
+PETS = [{"id": i, "name": f"Max{i}", "species": "DOG", "ownerName": "John Smith"} for i in range(1, 6)]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = app.QueryCache(8)
+    monkeypatch.setattr(app, "query_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def indexed(offline_index):
+    with app.index_write_lock:
+        app.publish_snapshot(pets=app.SearchIndex(PETS, app.PET_SEARCH_FIELDS))
+
+
+def test_entries_only_match_their_generation():
+    cache = app.QueryCache(8)
+    cache.put("q", 2, "two")
+    cache.put("q", 1, "one")   # an older result never replaces a newer one
+    assert cache.get("q", 2) == "two"
+    assert cache.get("q", 1) is None
+    assert cache.get("q", 3) is None
+    assert cache.stats()["size"] == 0   # stale entries are dropped when looked up
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = app.QueryCache(2)
+    cache.put("a", 1, "a")
+    cache.put("b", 1, "b")
+    cache.get("a", 1)
+    cache.put("c", 1, "c")
+    assert cache.get("b", 1) is None
+    assert (cache.get("a", 1), cache.get("c", 1)) == ("a", "c")
+
+
+def test_in_memory_hits_equal_misses(indexed, cache):
+    first = app.run_search("smith", search_appointments=False, limit=3, facets=True)
+    second = app.run_search("SMITH ", search_appointments=False, limit=3, facets=True)
+    assert second == first
+    assert second["pets"] is not first["pets"]
+    assert cache.hits == 1
+
+
+def test_solr_hits_equal_misses_without_asking_solr_again(fake_solr, cache):
+    fake_solr.bodies[app.PETS_COLLECTION] = {"response": {"numFound": 1, "docs": [{"entity_id": 9, "name": ["Rex"]}]}}
+    first = app.run_search("rex", search_appointments=False)
+    second = app.run_search("rex", search_appointments=False)
+    assert second == first
+    assert first["pets"][0]["name"] == "Rex"
+    assert len(fake_solr.requests) == 1
+
+
+def test_a_new_generation_invalidates_cached_results(indexed, cache):
+    assert app.run_search("max9", search_appointments=False)["total"]["pets"] == 0
+    with app.index_write_lock:
+        app.publish_snapshot(pets=app.current_snapshot.pets.with_changes({9: {"id": 9, "name": "Max9"}}))
+    assert app.run_search("max9", search_appointments=False)["total"]["pets"] == 1
@@ -0,0 +1,39 @@
+import app
+
+PETS = [
+    {"id": 1, "name": "Rex", "breed": "Beagle", "species": "DOG", "ownerName": "Ann Lee"},
+    {"id": 2, "name": "Beagle", "breed": "Poodle", "species": "DOG", "ownerName": "Bob Stone"},
+    {"id": 3, "name": "Luna", "breed": "Siamese", "species": "CAT", "ownerName": "Ann Beagle"},
+    {"id": 4, "name": "Milo", "breed": "Beagle", "species": "DOG", "ownerName": "Cy Moss"},
+    {"id": 5, "name": "Coco", "breed": "Persian", "species": "CAT", "ownerName": "Dee Park"},
+]
+
+
+def ids(page):
+    return [pet["id"] for pet in page]
+
+
+def test_field_weights_rank_a_name_match_first():
+    index = app.SearchIndex(PETS, app.PET_SEARCH_FIELDS)
+    total, page = index.search("beagle")
+    assert total == 4
+    assert ids(page) == [2, 3, 1, 4]
+
+
+def test_every_query_term_must_match_as_a_substring():
+    index = app.SearchIndex(PETS, app.PET_SEARCH_FIELDS)
+    assert ids(index.search("beag ann")[1]) == [3, 1]
+    assert index.search("beagle coco") == (0, [])
+
+
+def test_pages_are_slices_of_one_ranking():
+    index = app.SearchIndex(PETS + [dict(pet, id=pet["id"] + 10) for pet in PETS], app.PET_SEARCH_FIELDS)
+    total, everything = index.search("beagle", limit=100)
+    pages = [index.search("beagle", limit=3, offset=offset)[1] for offset in range(0, total, 3)]
+    assert [pet for page in pages for pet in page] == everything
+    assert index.search("beagle", limit=3, offset=total) == (total, [])
+
+
+def test_equal_scores_keep_index_order():
+    index = app.SearchIndex([{"id": i, "name": "Max", "species": "DOG"} for i in range(1, 6)], app.PET_SEARCH_FIELDS)
+    assert ids(index.search("max", limit=3, offset=1)[1]) == [2, 3, 4]
@@ -0,0 +1,108 @@
+import importlib.util
+import os
+import threading
+import types
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def worker(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "serving_mode", "worker")
+    monkeypatch.setattr(app, "SHARED_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "SHARED_INDEX_POLL_SECONDS", 0)
+    monkeypatch.setattr(app, "request_spans_enabled", False)
+    monkeypatch.setattr(app, "refresh_shared_index", lambda: None)
+    return app.app.test_client()
+
+
+def test_worker_follows_the_span_flag_on_the_next_request(worker):
+    assert "Server-Timing" not in worker.get("/health").headers
+    app.set_request_spans(True)
+    app.request_spans_enabled = False   # another worker flipped the flag
+    assert "total;dur=" in worker.get("/health").headers["Server-Timing"]
+    app.set_request_spans(False)
+    app.request_spans_enabled = True
+    assert "Server-Timing" not in worker.get("/health").headers
+
+
+def test_server_timing_sums_each_phase():
+    value = app.server_timing([("solr", 0.002), ("search", 0.001), ("solr", 0.003)], 0.01)
+    assert value == 'solr;dur=5.00;desc="2x", search;dur=1.00;desc="1x", total;dur=10.00'
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(app, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(app, "request_spans_enabled", False)
+    return app.app.test_client()
+
+
+def test_admin_routes_are_hidden_without_a_token(monkeypatch):
+    monkeypatch.setattr(app, "ADMIN_TOKEN", "")
+    client = app.app.test_client()
+    assert client.get("/admin/spans", headers={"Authorization": "Bearer "}).status_code == 404
+    assert client.get("/admin/profile?seconds=0.01").status_code == 404
+
+
+def test_admin_routes_need_the_bearer_token(admin):
+    assert admin.get("/admin/spans").status_code == 401
+    assert admin.get("/admin/spans", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert admin.get("/admin/spans", headers={"Authorization": "Bearer secret"}).get_json() == {"enabled": False}
+
+
+def test_profile_returns_collapsed_stacks_of_busy_threads(admin):
+    stop = threading.Event()
+    busy = threading.Thread(target=stop.wait, name="busy-thread")
+    busy.start()
+    try:
+        response = admin.get("/admin/profile?seconds=0.05&hz=200", headers={"Authorization": "Bearer secret"})
+    finally:
+        stop.set()
+        busy.join()
+
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    busy_stacks = [line for line in lines if line.startswith("busy-thread;")]
+    assert busy_stacks and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert "wait (threading.py:" in busy_stacks[0]
+    assert admin.get("/admin/profile?seconds=120", headers={"Authorization": "Bearer secret"}).status_code == 400
+
+
+def test_spans_report_the_search_and_serialize_phases(admin, offline_index):
+    headers = {"Authorization": "Bearer secret"}
+    assert admin.post("/admin/spans", json={"enabled": "yes"}, headers=headers).status_code == 400
+    assert admin.post("/admin/spans", json={"enabled": True}, headers=headers).get_json() == {"enabled": True}
+
+    timing = admin.get("/api/search?q=rex").headers["Server-Timing"]
+
+    phases = [part.split(";")[0] for part in timing.split(", ")]
+    assert phases[-1] == "total" and {"search", "serialize"} <= set(phases)
+    admin.post("/admin/spans", json={"enabled": False}, headers=headers)
+    assert "Server-Timing" not in admin.get("/api/search?q=rex").headers
+
+
+def load_gunicorn_conf():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gunicorn.conf.py")
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("setting, flagged", [("1", True), ("0", False)])
+def test_gunicorn_seeds_the_span_flag_at_startup(monkeypatch, tmp_path, setting, flagged):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    (shared / "request-spans").touch()
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path / "prometheus"))
+    monkeypatch.setenv("SEARCH_SHARED_INDEX_DIR", str(shared))
+    monkeypatch.setenv("SEARCH_REQUEST_SPANS", setting)
+    conf = load_gunicorn_conf()
+    monkeypatch.setattr(conf.subprocess, "Popen", lambda *args, **kwargs: types.SimpleNamespace(pid=0))
+
+    conf.on_starting(types.SimpleNamespace(log=types.SimpleNamespace(info=lambda message: None)))
+
+    assert (shared / "request-spans").exists() == flagged
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+import app
+
+PETS = [
+    {"id": i, "name": f"Max{i}", "species": ["DOG", "CAT"][i % 2], "breed": ["Beagle", "Siamese", "Poodle"][i % 3],
+     "ownerName": ["John Smith", "Jane Doe"][i % 2]}
+    for i in range(1, 40)
+]
+
+
+@pytest.fixture
+def shared(offline_index, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "SHARED_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "SHARED_INDEX_POLL_SECONDS", 0)
+    monkeypatch.setattr(app, "_exported_bases", {})
+    monkeypatch.setattr(app, "_mapped_bases", {})
+    monkeypatch.setattr(app, "_shared_manifest_mtime", None)
+    with app.index_write_lock:
+        app.publish_snapshot(pets=app.SearchIndex(PETS, app.PET_SEARCH_FIELDS).with_changes({
+            1: None, 2: {"id": 2, "name": "Rex", "species": "BIRD", "breed": "Parakeet"}
+        }))
+    return tmp_path
+
+
+def worker_snapshot():
+    """Load the exported index the way a worker does."""
+    indexer_snapshot = app.current_snapshot
+    app.current_snapshot = app.IndexSnapshot(
+        0, app.SearchIndex(fields=app.PET_SEARCH_FIELDS), app.SearchIndex(fields=app.APPOINTMENT_SEARCH_FIELDS)
+    )
+    app.refresh_shared_index()
+    loaded, app.current_snapshot = app.current_snapshot, indexer_snapshot
+    return loaded
+
+
+def test_workers_search_the_mapped_segments_like_the_indexer(shared):
+    indexer = app.current_snapshot
+    app.export_shared_index(indexer)
+    worker = worker_snapshot()
+    assert worker.generation == indexer.generation
+    assert isinstance(worker.pets.base, app.MappedSegment)
+    for text, kwargs in (("max1", {}), ("smith", {"offset": 3, "limit": 4}), ("", {"filters": {"species": ["CAT"]}})):
+        assert worker.pets.query(text, facets=("species", "breed"), **kwargs) == \
+            indexer.pets.query(text, facets=("species", "breed"), **kwargs)
+    assert worker.pets.fuzzy_search("mxa12") == indexer.pets.fuzzy_search("mxa12")
+    assert worker.pets.suggest("ma") == indexer.pets.suggest("ma")
+    assert worker.pets.get(1) is None and worker.pets.get(2)["name"] == "Rex"
+
+
+def test_delta_only_generations_reuse_the_base_file(shared):
+    app.export_shared_index(app.current_snapshot)
+    files = sorted(name for name in os.listdir(shared) if name.endswith(".seg"))
+    with app.index_write_lock:
+        app.publish_snapshot(pets=app.current_snapshot.pets.with_changes({3: None}))
+    app.export_shared_index(app.current_snapshot)
+    assert sorted(name for name in os.listdir(shared) if name.endswith(".seg")) == files
+    assert worker_snapshot().pets.get(3) is None
+
+
+def test_superseded_base_files_are_pruned(shared):
+    for _ in range(4):
+        with app.index_write_lock:
+            app.publish_snapshot(pets=app.SearchIndex(PETS, app.PET_SEARCH_FIELDS))
+        app.export_shared_index(app.current_snapshot)
+    assert len([name for name in os.listdir(shared) if name.startswith("pets-")]) == 2
@@ -0,0 +1,61 @@
+import pytest
+
+import app
+
+PETS = [
+    {"id": i, "name": f"Max{i}", "species": "DOG" if i % 2 else "CAT", "ownerName": "John Smith"}
+    for i in range(1, 30)
+]
+
+
+@pytest.fixture
+def indexed(offline_index):
+    pets = app.SearchIndex(PETS, app.PET_SEARCH_FIELDS).with_changes({
+        3: None, 4: {"id": 4, "name": "Rex", "species": "BIRD"}, 100: {"id": 100, "name": "Luna", "species": "CAT"}
+    })
+    with app.index_write_lock:
+        app.publish_snapshot(pets=pets, kafka_offsets={("pet-events", 0): 17})
+    return app.current_snapshot
+
+
+def reset_index():
+    app.current_snapshot = app.IndexSnapshot(
+        0, app.SearchIndex(fields=app.PET_SEARCH_FIELDS), app.SearchIndex(fields=app.APPOINTMENT_SEARCH_FIELDS)
+    )
+
+
+def test_snapshot_round_trip_serves_the_mapped_base(indexed, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "_snapshot_bases", {})
+    path = str(tmp_path / "index.snapshot")
+    assert app.save_index_snapshot(path) == indexed.generation
+    reset_index()
+    assert app.load_index_snapshot(path)
+
+    pets = app.current_snapshot.pets
+    assert isinstance(pets.base, app.MappedSegment)
+    assert app.current_snapshot.kafka_offsets == {("pet-events", 0): 17}
+    assert pets.get(3) is None
+    assert pets.get(4)["name"] == "Rex"
+    assert pets.get(100)["name"] == "Luna"
+    assert len(pets) == len(indexed.pets)
+    for query in ("max1", "smith", "luna"):
+        assert pets.query(query, facets=("species",)) == indexed.pets.query(query, facets=("species",))
+
+
+def test_unchanged_base_is_not_rewritten(indexed, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "_snapshot_bases", {})
+    path = str(tmp_path / "index.snapshot")
+    app.save_index_snapshot(path)
+    files = sorted(p.name for p in tmp_path.iterdir())
+    with app.index_write_lock:
+        app.publish_snapshot(pets=app.current_snapshot.pets.with_changes({5: None}))
+    app.save_index_snapshot(path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == files
+
+
+def test_unreadable_snapshots_are_ignored(offline_index, tmp_path):
+    path = tmp_path / "index.snapshot"
+    assert not app.load_index_snapshot(str(path))
+    path.write_bytes(b"DVSNAP01\0\0\0")
+    assert not app.load_index_snapshot(str(path))
+    assert len(app.current_snapshot.pets) == 0
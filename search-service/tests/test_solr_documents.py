@@ -0,0 +1,30 @@
+import app
+
+PET = {
+    "id": 7, "name": "Max", "species": "DOG", "breed": "Beagle", "age": 3, "ownerName": "John Smith",
+    "ownerEmail": "john@example.com", "ownerPhone": "555-0101", "medicalNotes": None,
+    "createdAt": "2024-01-01T09:00:00", "updatedAt": "2024-01-02T09:00:00",
+}
+
+
+def test_solr_docs_carry_every_display_field():
+    solr_doc = app.pet_solr_doc(PET)
+    assert solr_doc["id"] == "pet_7"
+    assert solr_doc["entity_id"] == 7
+    assert solr_doc["breed_facet"] == "Beagle"
+    assert "medical_notes" not in solr_doc
+
+
+def test_hits_are_hydrated_from_stored_fields_without_the_index(fake_solr, offline_index):
+    stored = {key: [value] if isinstance(value, str) else value
+              for key, value in app.pet_solr_doc(PET).items()}
+    fake_solr.bodies[app.PETS_COLLECTION] = {"response": {"numFound": 1, "docs": [stored]}}
+    results = app.perform_solr_search("max", search_appointments=False)
+    assert results["pets"] == [PET]
+    assert results["total"] == {"pets": 1, "appointments": 0}
+    assert len(app.current_snapshot.pets) == 0
+
+
+def test_failed_solr_search_returns_none(fake_solr, monkeypatch):
+    monkeypatch.setattr(fake_solr, "get", lambda *args, **kwargs: (_ for _ in ()).throw(OSError("down")))
+    assert app.perform_solr_search("max") is None
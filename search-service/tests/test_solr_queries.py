@@ -0,0 +1,31 @@
+import app
+
+
+def test_user_input_is_escaped_and_lowercased():
+    assert app.escape_solr_query('  Max AND (Luna) "x" ') == 'max and \\(luna\\) \\"x\\"'
+    assert app.escape_solr_query("o'brien/mc-kay*") == "o'brien\\/mc\\-kay\\*"
+
+
+def test_text_queries_use_edismax_over_the_boosted_fields(fake_solr):
+    app.perform_solr_search("Max*", search_appointments=False, limit=5, offset=10)
+    [(collection, params)] = fake_solr.requests
+    assert collection == app.PETS_COLLECTION
+    assert params["q"] == "max\\*"
+    assert params["defType"] == "edismax"
+    assert params["qf"] == app.PETS_QUERY_FIELDS
+    assert params["mm"] == "100%"
+    assert (params["rows"], params["start"]) == (5, 10)
+    assert params["fl"].split(",") == [solr_field for solr_field, _ in app.PET_SOLR_FIELDS]
+
+
+def test_empty_queries_match_everything(fake_solr):
+    app.perform_solr_search("", search_pets=False)
+    [(collection, params)] = fake_solr.requests
+    assert collection == app.APPOINTMENTS_COLLECTION
+    assert params["q"] == "*:*"
+    assert "defType" not in params
+
+
+def test_filters_become_filter_queries():
+    fq = app.solr_filter_queries("appointments", {"status": ["SCHEDULED", 'A"B'], "date": ("2024-01-01", None)})
+    assert fq == ['status:("SCHEDULED" OR "A\\"B")', 'date:["2024-01-01" TO *]']
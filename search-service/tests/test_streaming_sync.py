@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+import app
+
+PAYLOAD = json.dumps([
+    {"id": 1, "name": "Rex", "age": 12, "weight": -3.5e2, "tags": ["a", "b"], "vaccinated": True},
+    {"id": 2, "name": "Zoë 🐾", "ownerName": "Renée", "notes": "line\nbreak \"quoted\"", "chip": None},
+    12345,
+    "plain",
+    [],
+    {},
+], ensure_ascii=False).encode("utf-8")
+
+
+def split(data, *cuts):
+    bounds = [0, *cuts, len(data)]
+    return [data[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def test_every_single_split_point_parses_like_json_loads():
+    expected = json.loads(PAYLOAD)
+    for cut in range(len(PAYLOAD) + 1):
+        assert list(app.iter_json_array(split(PAYLOAD, cut))) == expected, cut
+
+
+def test_one_byte_chunks_split_numbers_literals_and_utf8():
+    chunks = [PAYLOAD[i:i + 1] for i in range(len(PAYLOAD))]
+    assert list(app.iter_json_array(chunks)) == json.loads(PAYLOAD)
+
+
+def test_a_number_at_a_chunk_end_waits_for_its_remaining_digits():
+    assert list(app.iter_json_array([b"[1", b"2, 3", b"4]"])) == [12, 34]
+    assert list(app.iter_json_array([b"[1.5e", b"3]"])) == [1500.0]
+
+
+def test_whitespace_and_empty_arrays():
+    assert list(app.iter_json_array([b" \n[ ", b"", b" ] \n"])) == []
+    assert list(app.iter_json_array([b"[ 1 ,\t2 ]"])) == [1, 2]
+
+
+def test_items_are_yielded_as_they_arrive():
+    def chunks():
+        yield b'[{"id": 1},'
+        yield b'{"id": 2}'
+        raise AssertionError("read past the first item")
+
+    items = app.iter_json_array(chunks())
+    assert next(items) == {"id": 1}
+
+
+@pytest.mark.parametrize("chunks", [
+    [b'{"id": 1}'],
+    [b'[1 2]'],
+    [b'[1,, 2]'],
+    [b'[{"id": 1}', b', {"id": '],
+    [b'[1, 2'],
+    [b''],
+])
+def test_malformed_or_truncated_payloads_raise(chunks):
+    with pytest.raises(ValueError):
+        list(app.iter_json_array(chunks))
+
+
+def test_compact_documents_read_back_as_the_original_dicts():
+    documents = [
+        {"id": 1, "name": "Rex", "species": "DOG", "breed": "Beagle"},
+        {"id": 2, "name": "Luna", "species": "CAT", "breed": "Siamese"},
+        {"id": 3, "status": "SCHEDULED", "petName": "Rex"},
+    ]
+    compact = app.CompactDocuments(documents)
+
+    assert len(compact) == 3
+    assert list(compact) == documents
+    assert compact[2] == documents[2]
+    assert compact._rows[0][0] is compact._rows[1][0]
+
+
+def test_mirror_to_solr_indexes_fixed_size_chunks_and_commits_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app, "SYNC_CHUNK_SIZE", 2)
+    monkeypatch.setattr(app, "index_to_solr", lambda collection, docs, commit=True: calls.append((len(docs), commit)))
+    pets = [{"id": i, "name": f"Pet {i}", "species": "DOG"} for i in range(5)]
+
+    assert list(app.mirror_to_solr("pets", iter(pets))) == pets
+    assert calls == [(2, False), (2, False), (1, True)]
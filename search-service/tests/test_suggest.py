@@ -0,0 +1,77 @@
+import random
+
+import app
+
+PETS = [
+    {"id": 1, "name": "Max", "species": "DOG", "ownerName": "Mary Lee"},
+    {"id": 2, "name": "Max", "species": "CAT", "ownerName": "Ann Marsh"},
+    {"id": 3, "name": "Maya", "species": "DOG", "ownerName": "Max Stone"},
+    {"id": 4, "name": "Luna", "species": "CAT", "ownerName": "Mary Moss"},
+]
+
+
+def expected(documents, prefix, limit):
+    """Brute force: documents per name term starting with prefix, most common first."""
+    counts = {}
+    for document in documents:
+        terms = set(app.tokenize(document["name"])) | set(app.tokenize(document["ownerName"]))
+        for term in terms:
+            if term.startswith(prefix):
+                counts[term] = counts.get(term, 0) + 1
+    return sorted(counts.items(), key=lambda hit: (-hit[1], hit[0]))[:limit]
+
+
+def test_ranks_by_document_count_then_term():
+    index = app.SearchIndex(PETS, app.PET_SEARCH_FIELDS)
+    assert index.suggest("ma") == [("max", 3), ("mary", 2), ("marsh", 1), ("maya", 1)]
+    assert index.suggest("ma", limit=2) == [("max", 3), ("mary", 2)]
+    assert index.suggest("dog") == []
+
+
+def test_follows_adds_updates_and_deletes():
+    index = app.SearchIndex(PETS, app.PET_SEARCH_FIELDS).with_changes({
+        1: None,
+        4: dict(PETS[3], name="Mabel"),
+        5: {"id": 5, "name": "Mabel", "species": "DOG", "ownerName": "Ann Mabel"},
+    })
+    assert index.suggest("ma") == [("mabel", 2), ("max", 2), ("marsh", 1), ("mary", 1), ("maya", 1)]
+    assert index.suggest("lu") == []
+
+
+def test_wide_prefixes_match_brute_force_after_changes():
+    rng = random.Random(7)
+    names = ["b" + "".join(rng.choice("aeioulmnr") for _ in range(3)) for _ in range(600)]
+    documents = [
+        {"id": i, "name": rng.choice(names), "species": "DOG", "ownerName": f"{rng.choice(names)} {rng.choice(names)}"}
+        for i in range(1, 2001)
+    ]
+    index = app.SearchIndex(documents, app.PET_SEARCH_FIELDS)
+    assert not index.base.prefixes.top("b")[1]
+    live = {document["id"]: document for document in documents}
+    for _ in range(5):
+        changes = {}
+        for entity_id in rng.sample(range(1, 2200), 50):
+            if rng.random() < 0.3:
+                changes[entity_id] = None
+            else:
+                changes[entity_id] = {"id": entity_id, "name": "bzzz", "species": "CAT", "ownerName": rng.choice(names)}
+        index = index.with_changes(changes)
+        for entity_id, document in changes.items():
+            if document is None:
+                live.pop(entity_id, None)
+            else:
+                live[entity_id] = document
+        for prefix, limit in (("b", 10), ("b", 25), ("ba", 5), ("bzz", 3)):
+            assert index.suggest(prefix, limit) == expected(live.values(), prefix, limit)
+
+
+def test_endpoint_completes_the_last_word(offline_index, monkeypatch):
+    monkeypatch.setattr(app, "current_snapshot", app.current_snapshot.evolve(
+        pets=app.SearchIndex(PETS, app.PET_SEARCH_FIELDS)
+    ))
+    client = app.app.test_client()
+
+    body = client.get("/api/search/suggest?prefix=luna%20MA&limit=1").get_json()
+
+    assert body == {"prefix": "ma", "suggestions": [{"term": "max", "count": 3}]}
+    assert client.get("/api/search/suggest?prefix=%20").get_json() == {"prefix": "", "suggestions": []}